@@ -0,0 +1,295 @@
+"""
+ADX + RSI backtest over the Nifty 50 (settings in backtest/config.py)
+====================================================================
+Run:  python3 -m backtest.main                         # all NIFTY_50_SYMBOLS, bars from the cache
+      python3 -m backtest.main --refresh --start 2019-01-01
+      python3 -m backtest.main --symbols NSE:INFY-EQ,NSE:TCS-EQ --trades trades.csv
+      python3 -m backtest.main --synthetic 5000        # offline: fill the cache with generated bars
+
+Entry: ADX(ADX_PERIOD) crosses above ADX_THRESHOLD while RSI(RSI_PERIOD) is
+above RSI_THRESHOLD; long at that bar's close, one position per symbol at a
+time. Exit: the first later bar whose low reaches entry * (1 - SL_PCT) or
+whose high reaches entry * (1 + TP_PCT) – the stop when a bar spans both,
+and the open when the bar gaps through the level. Trades still open at the
+end are marked at the last close.
+
+Everything per bar is whole-array NumPy / pandas: Wilder smoothing runs as
+an `ewm(alpha=1/n, adjust=False)` seeded with the plain mean of the first n
+values (Wilder's own start), and every signal's exit is searched at once, a
+widening block of bars at a time. The only Python loop is over signals, to
+drop those that fire while a position is open.
+
+Bars come from a local cache, one .npz per symbol and timeframe under
+backtest/cache/. Missing symbols (or all of them with --refresh) are fetched
+from Fyers first, one request at a time; the symbols then run across a
+process pool, each worker reading its own bars from the cache.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backtest import config
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+COLUMNS   = ('time', 'open', 'high', 'low', 'close', 'volume')
+TRADE_COLUMNS = ('symbol', 'entry_bar', 'exit_bar', 'entry_time', 'exit_time', 'entry', 'exit',
+                 'sl', 'tp', 'result', 'pnl_pct')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BAR CACHE
+# ─────────────────────────────────────────────────────────────────────────────
+def cache_path(symbol: str, timeframe: str = config.TIMEFRAME, root: str = CACHE_DIR) -> str:
+    safe = ''.join(ch if ch.isalnum() or ch in '-_' else '_' for ch in symbol)
+    return os.path.join(root, f"{safe}_{timeframe}.npz")
+
+
+def load_bars(symbol: str, timeframe: str = config.TIMEFRAME, root: str = CACHE_DIR) -> dict:
+    """{column: array} from the cache (time as epoch seconds), or None."""
+    path = cache_path(symbol, timeframe, root)
+    if not os.path.exists(path): return None
+    with np.load(path) as f:
+        return {name: f[name] for name in COLUMNS}
+
+
+def save_bars(symbol: str, bars: dict, timeframe: str = config.TIMEFRAME, root: str = CACHE_DIR) -> str:
+    os.makedirs(root, exist_ok=True)
+    path = cache_path(symbol, timeframe, root)
+    np.savez(path, **{name: np.asarray(bars[name]) for name in COLUMNS})
+    return path
+
+
+def fetch_fyers(symbol: str, start: date, end: date, timeframe: str = config.TIMEFRAME) -> dict:
+    """History from the Fyers API in the chunks it allows (366 days of daily
+    bars, 100 days of intraday ones per request)."""
+    from fyers_apiv3 import fyersModel
+    fyers = fyersModel.FyersModel(client_id=config.CLIENT_ID, token=config.ACCESS_TOKEN,
+                                  is_async=False, log_path="")
+    step = timedelta(days=365 if timeframe in ('D', '1D') else 99)
+    candles, lo = [], start
+    while lo <= end:
+        hi = min(lo + step, end)
+        resp = fyers.history(data={"symbol": symbol, "resolution": timeframe, "date_format": "1",
+                                   "range_from": lo.isoformat(), "range_to": hi.isoformat(),
+                                   "cont_flag": "1"})
+        if resp.get('s') != 'ok':
+            raise RuntimeError(f"{symbol}: {resp.get('message', resp)}")
+        candles += resp.get('candles') or []
+        lo = hi + timedelta(days=1)
+    arr = np.array(candles, dtype=np.float64).reshape(-1, 6)
+    arr = arr[np.unique(arr[:, 0], return_index=True)[1]]   # sorted, no duplicate bars
+    return dict(zip(COLUMNS, (arr[:, 0].astype(np.int64),) + tuple(arr[:, 1:].T)))
+
+
+def synthetic_bars(symbol: str, rows: int, seed: int = 0) -> dict:
+    """Daily-ish random walk per symbol, for running without an API token."""
+    rng = np.random.default_rng([seed, *symbol.encode()])
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.018, rows)))
+    open_ = np.r_[close[0], close[:-1]] * np.exp(rng.normal(0, 0.004, rows))
+    wick = np.abs(rng.normal(0, 0.008, (2, rows))) * close
+    start = np.datetime64('2000-01-03', 's').astype(np.int64)
+    return {'time': start + np.arange(rows, dtype=np.int64) * 86400, 'open': open_,
+            'high': np.maximum(open_, close) + wick[0], 'low': np.minimum(open_, close) - wick[1],
+            'close': close, 'volume': rng.integers(1e5, 1e7, rows).astype(np.float64)}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# INDICATORS
+# ─────────────────────────────────────────────────────────────────────────────
+def wilder(x: np.ndarray, n: int) -> np.ndarray:
+    """Wilder's moving average: mean of the first n valid values, then
+    y += (x - y) / n. Leading NaNs in `x` are skipped."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    first = int(np.argmax(~np.isnan(x))) if (~np.isnan(x)).any() else len(x)
+    if len(x) - first < n: return out
+    seeded = x[first + n - 1:].copy()
+    seeded[0] = x[first:first + n].mean()
+    out[first + n - 1:] = pd.Series(seeded).ewm(alpha=1.0 / n, adjust=False).mean().to_numpy()
+    return out
+
+
+def rsi(close: np.ndarray, n: int = config.RSI_PERIOD) -> np.ndarray:
+    delta = np.diff(close, prepend=np.nan)
+    gain = wilder(np.where(np.isnan(delta), np.nan, np.maximum(delta, 0)), n)
+    loss = wilder(np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0)), n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100 - 100 / (1 + gain / loss))
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, n: int = config.ADX_PERIOD) -> np.ndarray:
+    prev = np.r_[np.nan, close[:-1]]
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    tr[0] = np.nan
+    up, down = np.diff(high, prepend=np.nan), -np.diff(low, prepend=np.nan)
+    plus  = np.where((up > down) & (up > 0), up, 0.0);     plus[0] = np.nan
+    minus = np.where((down > up) & (down > 0), down, 0.0); minus[0] = np.nan
+    atr = wilder(tr, n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pdi, mdi = 100 * wilder(plus, n) / atr, 100 * wilder(minus, n) / atr
+        dx = np.where(pdi + mdi == 0, 0.0, 100 * np.abs(pdi - mdi) / (pdi + mdi))
+    dx[np.isnan(pdi)] = np.nan
+    return wilder(dx, n)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BACKTEST
+# ─────────────────────────────────────────────────────────────────────────────
+def exit_bars(high, low, entry, sl, tp, width: int = 16) -> np.ndarray:
+    """First bar after each entry whose low reaches `sl` or high reaches
+    `tp`, -1 if none. All entries are searched together, `width` bars at a
+    time, the block widening for the ones still unresolved."""
+    n = len(high)
+    out = np.full(len(entry), -1, np.int64)
+    start = np.asarray(entry, np.int64) + 1
+    todo = np.flatnonzero(start < n)
+    while len(todo):
+        idx = start[todo, None] + np.arange(width)
+        clipped = np.minimum(idx, n - 1)
+        hit = (idx < n) & ((low[clipped] <= sl[todo, None]) | (high[clipped] >= tp[todo, None]))
+        found = hit.any(axis=1)
+        out[todo[found]] = idx[found, hit[found].argmax(axis=1)]
+        start[todo] += width
+        todo = todo[~found & (start[todo] < n)]
+        width *= 4
+    return out
+
+
+def signals(bars: dict, adx_period=config.ADX_PERIOD, adx_threshold=config.ADX_THRESHOLD,
+            rsi_period=config.RSI_PERIOD, rsi_threshold=config.RSI_THRESHOLD) -> np.ndarray:
+    """Bars where ADX crosses above its threshold with RSI above its own."""
+    a = adx(bars['high'], bars['low'], bars['close'], adx_period)
+    r = rsi(bars['close'], rsi_period)
+    cross = np.r_[False, (a[1:] > adx_threshold) & (a[:-1] <= adx_threshold)]
+    return np.flatnonzero(cross & (r > rsi_threshold))
+
+
+def backtest(bars: dict, sl_pct: float = config.SL_PCT, tp_pct: float = config.TP_PCT, **params) -> pd.DataFrame:
+    """One row per trade: entry / exit bar and time, prices, result and P&L %."""
+    O, H, L, C = (np.asarray(bars[k], dtype=np.float64) for k in ('open', 'high', 'low', 'close'))
+    n = len(C)
+    entry = signals(bars, **params)
+    entry = entry[entry < n - 1]   # needs a later bar to exit on
+    price = C[entry]
+    sl, tp = price * (1 - sl_pct), price * (1 + tp_pct)
+    exit_ = exit_bars(H, L, entry, sl, tp)
+
+    # One position at a time: skip signals before the previous exit
+    keep, busy_until = np.zeros(len(entry), bool), -1
+    for k, (i, j) in enumerate(zip(entry.tolist(), exit_.tolist())):
+        if i > busy_until:
+            keep[k] = True; busy_until = j if j >= 0 else n
+    entry, price, sl, tp, exit_ = entry[keep], price[keep], sl[keep], tp[keep], exit_[keep]
+
+    closed = exit_ >= 0
+    j = np.where(closed, exit_, n - 1)
+    stop = closed & (L[j] <= sl)                       # stop first when a bar spans both
+    exit_price = np.where(stop, np.minimum(O[j], sl),
+                          np.where(closed, np.maximum(O[j], tp), C[n - 1]))
+    T = np.asarray(bars['time'])
+    return pd.DataFrame({
+        'entry_bar': entry, 'exit_bar': j,
+        'entry_time': pd.to_datetime(T[entry], unit='s'), 'exit_time': pd.to_datetime(T[j], unit='s'),
+        'entry': price, 'exit': exit_price, 'sl': sl, 'tp': tp,
+        'result': np.where(~closed, 'open', np.where(stop, 'loss', 'win')),
+        'pnl_pct': (exit_price / price - 1) * 100,
+    })
+
+
+def summarize(trades: pd.DataFrame) -> dict:
+    res = trades['result']
+    wins, losses = int((res == 'win').sum()), int((res == 'loss').sum())
+    closed = wins + losses
+    return {'trades': len(trades), 'wins': wins, 'losses': losses, 'open': int((res == 'open').sum()),
+            'win_rate': wins / closed * 100 if closed else 0.0,
+            'pnl_pct': float(trades['pnl_pct'].sum()),
+            'avg_pct': float(trades['pnl_pct'].mean()) if len(trades) else 0.0}
+
+
+def run_symbol(symbol: str, timeframe: str = config.TIMEFRAME, root: str = CACHE_DIR):
+    """Worker: (symbol, bars, summary, trades) from the cached bars."""
+    bars = load_bars(symbol, timeframe, root)
+    if bars is None or len(bars['close']) == 0:
+        return symbol, 0, None, None
+    trades = backtest(bars)
+    trades.insert(0, 'symbol', symbol)
+    return symbol, len(bars['close']), summarize(trades), trades
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MAIN
+# ─────────────────────────────────────────────────────────────────────────────
+def fill_cache(symbols, start, end, timeframe, root, refresh=False, synthetic=0):
+    for symbol in symbols:
+        if not refresh and os.path.exists(cache_path(symbol, timeframe, root)): continue
+        try:
+            bars = synthetic_bars(symbol, synthetic) if synthetic else fetch_fyers(symbol, start, end, timeframe)
+        except Exception as e:   # a missing token or symbol shouldn't stop the rest
+            print(f"  {symbol:<22} fetch failed: {e}")
+            continue
+        save_bars(symbol, bars, timeframe, root)
+        print(f"  {symbol:<22} {len(bars['close']):>6} bars cached")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ADX + RSI backtest over the Nifty 50")
+    ap.add_argument('--symbols', default='', help="comma-separated (default: config.NIFTY_50_SYMBOLS)")
+    ap.add_argument('--timeframe', default=config.TIMEFRAME)
+    ap.add_argument('--start', default=(date.today() - timedelta(days=5 * 365)).isoformat())
+    ap.add_argument('--end', default=date.today().isoformat())
+    ap.add_argument('--cache', default=CACHE_DIR)
+    ap.add_argument('--refresh', action='store_true', help="refetch every symbol, not just missing ones")
+    ap.add_argument('--synthetic', type=int, default=0, metavar='BARS',
+                    help="cache generated bars instead of fetching from Fyers")
+    ap.add_argument('--workers', type=int, default=os.cpu_count())
+    ap.add_argument('--trades', help="write every trade to this CSV")
+    args = ap.parse_args(argv)
+    symbols = [s for s in args.symbols.split(',') if s] or config.NIFTY_50_SYMBOLS
+
+    print("=" * 50)
+    print(f"ADX({config.ADX_PERIOD}) > {config.ADX_THRESHOLD} & RSI({config.RSI_PERIOD}) > {config.RSI_THRESHOLD}"
+          f"  SL {config.SL_PCT:.0%} / TP {config.TP_PCT:.0%}  [{args.timeframe}]")
+    print("=" * 50)
+    t0 = time.perf_counter()
+    fill_cache(symbols, date.fromisoformat(args.start), date.fromisoformat(args.end),
+               args.timeframe, args.cache, args.refresh, args.synthetic)
+
+    t1 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(run_symbol, symbols, [args.timeframe] * len(symbols),
+                                [args.cache] * len(symbols)))
+
+    print(f"\n{'Symbol':<22} {'Bars':>6} {'Trades':>6} {'Wins':>5} {'Loss':>5} {'Open':>5} {'Win%':>6} {'P&L %':>8}")
+    all_trades, total_bars = [], 0
+    for symbol, n, s, trades in results:
+        if s is None:
+            print(f"{symbol:<22} {'no cached bars':>20}")
+            continue
+        total_bars += n
+        all_trades.append(trades)
+        print(f"{symbol:<22} {n:>6} {s['trades']:>6} {s['wins']:>5} {s['losses']:>5} {s['open']:>5} "
+              f"{s['win_rate']:>5.1f}% {s['pnl_pct']:>+8.2f}")
+
+    trades = pd.concat(all_trades, ignore_index=True) if all_trades else pd.DataFrame(columns=TRADE_COLUMNS)
+    s = summarize(trades)
+    print("\n" + "=" * 50)
+    print("SUMMARY")
+    print("=" * 50)
+    print(f"Symbols      : {len(all_trades)} / {len(symbols)}  ({total_bars:,} bars)")
+    print(f"Total Trades : {s['trades']}  ({s['wins']} wins, {s['losses']} losses, {s['open']} open)")
+    print(f"Win Rate     : {s['win_rate']:.1f}%")
+    print(f"Total P&L %  : {s['pnl_pct']:+.2f}  (avg {s['avg_pct']:+.2f} per trade)")
+    print(f"Time         : {t1 - t0:.2f}s data, {time.perf_counter() - t1:.2f}s backtest")
+    if args.trades:
+        trades.to_csv(args.trades, index=False)
+        print(f"Trades       : {args.trades}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
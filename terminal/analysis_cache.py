@@ -0,0 +1,119 @@
+"""
+In-process caches for the API server.
+
+  • LRUCache       – size + TTL bounded mapping with hit/miss counters
+  • AnalysisCache  – SMCEngine state per (symbol, tf, length, rr, ...) that is
+                     extended bar by bar as a replay steps forward, and rewound
+                     from its nearest checkpoint when it steps back, instead of
+                     being rebuilt from scratch on every request
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from checkpoints import Checkpoints
+
+
+class LRUCache:
+    """Least-recently-used mapping; entries also expire `ttl` seconds after
+    they were last stored."""
+    def __init__(self, maxsize: int = 128, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self._data   = OrderedDict()   # key -> (stored_at, value)
+        self._lock   = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and self.ttl is not None and time.monotonic() - item[0] > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+            "hits": self.hits, "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions, "expirations": self.expirations,
+        }
+
+
+def data_version(df) -> tuple:
+    """Identity of a fetched bar window: its span plus the (possibly still
+    forming) last bar. Any change means cached engine state is stale."""
+    if len(df) == 0: return (0,)
+    last = df.iloc[-1]
+    return (len(df), df['time'].iloc[0], last['time'], last['high'], last['low'], last['close'])
+
+
+class _State:
+    __slots__ = ('engine', 'version', 'checkpoints', 'lock')
+    def __init__(self, engine, version, every):
+        self.engine = engine; self.version = version
+        self.checkpoints = Checkpoints(engine, every)
+        self.lock = threading.Lock()
+
+
+class AnalysisCache:
+    """Engine per analysis key, moved to the requested bar over one bar window.
+    Safe to use from several threads: each engine is held by one at a time."""
+    def __init__(self, maxsize: int = 64, ttl: float = 900.0, checkpoint_every: int = 100):
+        self.engines  = LRUCache(maxsize, ttl)
+        self._lock    = threading.Lock()
+        self.checkpoint_every = checkpoint_every
+        self.extends  = 0   # forward steps served by extending a cached engine
+        self.rewinds  = 0   # backward steps served from a checkpoint
+        self.replays  = 0   # full replays (new key or new data)
+
+    @contextmanager
+    def engine_for(self, key, df, version, upto: int, factory):
+        """SMCEngine for `key` that has processed exactly df[:upto], held
+        exclusively for the `with` block."""
+        with self._lock:
+            state = self.engines.get(key)
+            fresh = state is None or state.version != version
+            if fresh:
+                state = _State(factory(), version, self.checkpoint_every)
+                self.replays += 1
+            self.engines.put(key, state)
+        with state.lock:
+            if not fresh:
+                if upto < state.engine.bar_count: self.rewinds += 1
+                else:                             self.extends += 1
+            state.checkpoints.seek(df, upto)
+            yield state.engine
+
+    def stats(self) -> dict:
+        return dict(self.engines.stats(), extends=self.extends, rewinds=self.rewinds,
+                    replays=self.replays)
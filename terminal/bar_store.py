@@ -0,0 +1,171 @@
+"""
+Local OHLC bar store  –  one append-only file per (symbol, timeframe)
+=====================================================================
+Run:  python3 bar_store.py sync EURUSDm,XAUUSDm --tf 15 --bars 100000
+      python3 bar_store.py import mock_data_15m.csv --symbol MOCK --tf 15
+      python3 bar_store.py info
+
+Layout: <root>/<symbol>/<tf>.bars holds fixed-width little-endian records of
+BAR_DTYPE (time as datetime64[s], then open/high/low/close float64), sorted
+by time with no header. Reads are np.memmap views, so a range of millions of
+bars costs nothing until it is touched; `replay` feeds such a view to an
+SMCEngine chunk by chunk without building a DataFrame.
+
+Only closed bars are stored: a sync drops the newest fetched bar (the one
+still forming) and appends just the bars newer than the last stored time.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import smc_kernel
+
+BAR_DTYPE = np.dtype([('time', '<M8[s]'), ('open', '<f8'), ('high', '<f8'),
+                      ('low', '<f8'), ('close', '<f8')])
+FIELDS = BAR_DTYPE.names
+DEFAULT_ROOT = os.environ.get('SMC_BAR_STORE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bars'))
+
+
+def _t(value) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(value).to_datetime64(), 's')
+
+
+def to_records(bars) -> np.ndarray:
+    """BAR_DTYPE records from a DataFrame, dict of arrays or structured array
+    with time and OHLC fields (time as datetimes, or epoch seconds as MT5
+    returns it)."""
+    t = np.asarray(bars['time'])
+    rec = np.empty(len(t), BAR_DTYPE)
+    rec['time'] = t.astype('M8[s]') if t.dtype.kind == 'M' else t.astype(np.int64).view('M8[s]')
+    for name in FIELDS[1:]:
+        rec[name] = np.asarray(bars[name], dtype=np.float64)
+    return rec
+
+
+def to_frame(bars) -> pd.DataFrame:
+    """Records copied into the usual time/open/high/low/close DataFrame."""
+    return pd.DataFrame({name: np.array(bars[name]) for name in FIELDS})
+
+
+class BarStore:
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+
+    def path(self, symbol: str, tf: int) -> str:
+        return os.path.join(self.root, symbol, f"{int(tf)}.bars")
+
+    def count(self, symbol: str, tf: int) -> int:
+        """Complete records on disk (a torn trailing write is ignored)."""
+        try:
+            return os.path.getsize(self.path(symbol, tf)) // BAR_DTYPE.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def series(self):
+        """(symbol, tf) of every stored series."""
+        if not os.path.isdir(self.root): return []
+        return sorted((sym, int(name[:-5])) for sym in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, sym))
+                      for name in os.listdir(os.path.join(self.root, sym)) if name.endswith('.bars'))
+
+    def read(self, symbol: str, tf: int, start=None, end=None) -> np.ndarray:
+        """Read-only memory-mapped records with start <= time < end."""
+        n = self.count(symbol, tf)
+        if n == 0: return np.empty(0, BAR_DTYPE)
+        bars = np.memmap(self.path(symbol, tf), BAR_DTYPE, mode='r', shape=(n,))
+        t = bars['time']
+        lo = 0 if start is None else int(np.searchsorted(t, _t(start), 'left'))
+        hi = n if end is None else int(np.searchsorted(t, _t(end), 'left'))
+        return bars[lo:hi]
+
+    def frame(self, symbol: str, tf: int, start=None, end=None) -> pd.DataFrame:
+        return to_frame(self.read(symbol, tf, start, end))
+
+    def last_time(self, symbol: str, tf: int):
+        n = self.count(symbol, tf)
+        return None if n == 0 else self.read(symbol, tf)['time'][n - 1]
+
+    def append(self, symbol: str, tf: int, bars) -> int:
+        """Append the bars newer than the last stored one; returns how many."""
+        rec = to_records(bars)
+        last = self.last_time(symbol, tf)
+        if last is not None: rec = rec[rec['time'] > last]
+        if len(rec) == 0: return 0
+        if not (rec['time'][1:] > rec['time'][:-1]).all():
+            raise ValueError(f"{symbol}/{tf}: bar times must be strictly increasing")
+
+        path = self.path(symbol, tf)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'ab') as f:
+            f.truncate(self.count(symbol, tf) * BAR_DTYPE.itemsize)   # drop a torn write
+            f.write(rec.tobytes())
+        return len(rec)
+
+    def sync(self, symbol: str, tf: int, fetch, closed_only: bool = True) -> int:
+        """Append what `fetch(since)` returns – the bars after `since` (None:
+        nothing stored yet) – leaving out the still-forming newest bar."""
+        bars = fetch(self.last_time(symbol, tf))
+        if bars is None or len(bars) == 0: return 0
+        if closed_only: bars = bars[:-1]
+        return self.append(symbol, tf, bars)
+
+
+def replay(engine, bars, chunk: int = 1 << 20):
+    """Run `engine` over a record array (e.g. a `BarStore.read` memmap),
+    continuing from its current state. Python-path engines get the bars in
+    `chunk`-sized slices; a fresh engine that can use the compiled kernel
+    gets them in one call."""
+    if engine.bar_count == 0 and engine.backend != 'python' and smc_kernel.HAVE_NUMBA:
+        chunk = max(len(bars), 1)
+    for i in range(0, len(bars), chunk):
+        b = bars[i:i + chunk]
+        engine.extend_arrays(b['time'], b['high'], b['low'], b['close'])
+    return engine
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────────────
+def sync_mt5(store: BarStore, symbols, tf: int = 15, bars: int = 100_000) -> dict:
+    """New closed bars for each symbol; a series not stored yet is backfilled
+    with the newest `bars`."""
+    from data_source import MT5Source
+    src = MT5Source()
+    def fetch(sym):
+        return lambda since: (src.fetch(sym, tf, count=bars) if since is None
+                              else src.fetch(sym, tf, start=since + np.timedelta64(1, 's')))
+    return {sym: store.sync(sym, tf, fetch(sym)) for sym in symbols}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local OHLC bar store")
+    ap.add_argument('--root', default=DEFAULT_ROOT)
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('sync', help="append new closed bars from MT5")
+    p.add_argument('symbols', help="comma-separated MT5 symbols")
+    p.add_argument('--tf', type=int, default=15, help="timeframe in minutes")
+    p.add_argument('--bars', type=int, default=100_000, help="bars to backfill for a new series")
+    p = sub.add_parser('import', help="append bars from a CSV file (time,open,high,low,close)")
+    p.add_argument('csv')
+    p.add_argument('--symbol', required=True)
+    p.add_argument('--tf', type=int, default=15)
+    sub.add_parser('info', help="list stored series")
+    args = ap.parse_args(argv)
+
+    store = BarStore(args.root)
+    if args.cmd == 'sync':
+        for sym, n in sync_mt5(store, [s for s in args.symbols.split(',') if s], args.tf, args.bars).items():
+            print(f"{sym}/{args.tf}: +{n} bars ({store.count(sym, args.tf)} stored)")
+    elif args.cmd == 'import':
+        n = store.append(args.symbol, args.tf, pd.read_csv(args.csv, parse_dates=['time']))
+        print(f"{args.symbol}/{args.tf}: +{n} bars ({store.count(args.symbol, args.tf)} stored)")
+    else:
+        for sym, tf in store.series():
+            t = store.read(sym, tf)['time']
+            print(f"{sym:>12} {tf:>4}  {len(t):>9} bars  {t[0]} → {t[-1]}")
+
+
+if __name__ == '__main__':
+    main()
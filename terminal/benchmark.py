@@ -0,0 +1,253 @@
+"""
+SMCEngine and API benchmarks
+============================
+Run:  python3 benchmark.py                                   # writes benchmark.json
+      python3 benchmark.py --sizes 1000,10000,100000,1000000 --out big.json
+      python3 benchmark.py --baseline benchmark.json --out new.json   # exit 1 on regressions
+      python3 benchmark.py --only engine/full                # cases whose name starts with this
+
+Cases
+  engine/full/<regime>/n=<bars>/len=<length>/<backend>  – SMCEngine.update on a fresh engine
+  engine/live/<regime>/n=<bars>                         – one closed bar via extend() on a primed engine
+  engine/replay/<regime>/n=<bars>                       – the same bar as a full update() from scratch
+  api/...                                               – /api/history and /api/engine/analyze through
+                                                          TestClient, bars from SyntheticSource
+Regimes are synthetic.py models: 'trend' (long one-way runs: more OBs, very
+few BOS / CHoCH) and 'choppy' (short ranging / volatile runs: structure
+breaks all the time). Full-replay cases record the OBs, structure events and
+trades found, so the mix behind a timing is visible.
+
+Every case reports p50 / p99 wall time per run, bars/sec where bars are
+processed, and the peak traced allocation of one extra run (tracemalloc,
+which sees NumPy buffers too). Comparing with a baseline flags cases whose
+bars/sec (else p50) is worse by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import smc_kernel
+from smc_engine_v2 import SMCEngine
+from synthetic import generate_frame
+
+REGIME_SETS = {
+    'trend':  {'up':       (0.0006,  0.0010, 0.0004, 800),
+               'down':     (-0.0006, 0.0010, 0.0004, 800)},
+    'choppy': {'range':    (0.0,     0.0015, 0.0008, 60),
+               'volatile': (0.0,     0.0040, 0.0015, 30)},
+}
+SIZES      = (1_000, 10_000, 100_000)
+LENGTHS    = (5, 20, 50)
+PYTHON_MAX = 100_000   # larger full replays only on the compiled backend
+LIVE_STEPS = 200
+
+
+def measure(fn, bars: int = 0, min_time: float = 0.5, max_runs: int = 50, memory: bool = True) -> dict:
+    """Run `fn` at least 3 times (once if a run takes over 5 s) and until
+    `min_time` has passed, after one untimed warm-up run (JIT loading, first
+    allocations); one more traced run gives the peak memory."""
+    fn()
+    times = []
+    while len(times) < max_runs:
+        t = time.perf_counter(); fn(); times.append(time.perf_counter() - t)
+        if (len(times) >= 3 or times[0] > 5) and sum(times) >= min_time: break
+    out = {"runs": len(times),
+           "p50_ms": float(np.percentile(times, 50)) * 1e3,
+           "p99_ms": float(np.percentile(times, 99)) * 1e3}
+    if bars: out["bars_per_sec"] = bars / float(np.median(times))
+    if memory:
+        tracemalloc.start()
+        try:
+            fn(); out["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return out
+
+
+def measure_steps(make, n: int, memory: bool = True) -> dict:
+    """Per-call latency of `step(i)` for i in range(n), `step = make()`; peak
+    memory comes from a second, traced pass with a fresh `make()`."""
+    step = make()
+    times = []
+    for i in range(n):
+        t = time.perf_counter(); step(i); times.append(time.perf_counter() - t)
+    out = {"runs": n, "p50_ms": float(np.percentile(times, 50)) * 1e3,
+           "p99_ms": float(np.percentile(times, 99)) * 1e3, "bars_per_sec": n / sum(times)}
+    if memory:
+        tracemalloc.start()
+        try:
+            step = make()
+            for i in range(n): step(i)
+            out["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CASES
+# ─────────────────────────────────────────────────────────────────────────────
+def _full(df, length, backend, memory):
+    res = measure(lambda: SMCEngine(length=length, backend=backend).update(df), bars=len(df), memory=memory)
+    e = SMCEngine(length=length, backend=backend); e.update(df)
+    return dict(res, obs=len(e.obs), structure=len(e.structure), trades=len(e.trades))
+
+
+def _live(df, memory):
+    steps = min(LIVE_STEPS, len(df) // 2)
+    head = len(df) - steps
+    def make():
+        live = SMCEngine(length=20); live.update(df.iloc[:head])
+        return lambda i: live.extend(df.iloc[head + i:head + i + 1])
+    return measure_steps(make, steps, memory)
+
+
+def _replay(df, memory):
+    steps = min(LIVE_STEPS, len(df) // 2)
+    head = len(df) - steps
+    return measure_steps(lambda: lambda i: SMCEngine(length=20).update(df.iloc[:head + i + 1]),
+                         max(3, min(steps, int(2e6 // len(df)))), memory)
+
+
+def engine_cases(sizes, lengths, backends):
+    """(name, run) pairs; run(memory) measures the case."""
+    for regime, model in REGIME_SETS.items():
+        for n in sizes:
+            data = {}
+            def df(n=n, model=model, data=data):   # generated on first use, shared by the cases of this size
+                if 'df' not in data: data['df'] = generate_frame(n, seed=1, tf=1, regimes=model)
+                return data['df']
+            for length in lengths:
+                for backend in backends:
+                    if backend == 'python' and n > PYTHON_MAX: continue
+                    yield (f"engine/full/{regime}/n={n}/len={length}/{backend}",
+                           lambda memory, df=df, length=length, backend=backend: _full(df(), length, backend, memory))
+            # A live bar: extend a primed engine vs replay everything again
+            yield f"engine/live/{regime}/n={n}", lambda memory, df=df: _live(df(), memory)
+            yield f"engine/replay/{regime}/n={n}", lambda memory, df=df: _replay(df(), memory)
+
+
+def api_cases(memory=True):
+    os.environ['SMC_DATA_SOURCE'] = 'synthetic'
+    from fastapi.testclient import TestClient
+    import server
+
+    with TestClient(server.app) as client:
+        def get(path, **params):
+            r = client.get(path, params=params); r.raise_for_status()
+
+        def post(path, payload):
+            r = client.post(path, json=payload); r.raise_for_status()
+
+        def cold(fn):
+            def run():
+                server.BAR_CACHE.clear(); server.ANALYSIS_CACHE.engines.clear(); fn()
+            return run
+
+        history = lambda: get('/api/history', symbol='EURUSD', count=2000)
+        analyze = lambda **kw: post('/api/engine/analyze', dict(dict(symbol='EURUSD', currentIndex=2000,
+                                                                     length=20, rr=3.0), **kw))
+        def replay():
+            # Bar replay: each request is one bar further than the last
+            server.ANALYSIS_CACHE.engines.clear(); analyze(currentIndex=1000)
+            return lambda i: analyze(currentIndex=1001 + i)
+
+        cases = {
+            "api/history/cold":       lambda: measure(cold(history), memory=memory),
+            "api/history/cached":     lambda: measure(history, memory=memory),
+            "api/history/columns":    lambda: measure(lambda: get('/api/history', symbol='EURUSD', count=2000,
+                                                                  format='columns'), memory=memory),
+            "api/analyze/cold":       lambda: measure(cold(analyze), bars=2000, memory=memory),
+            "api/analyze/cached":     lambda: measure(analyze, bars=2000, memory=memory),
+            "api/analyze/rr_targets": lambda: measure(cold(lambda: analyze(rr_targets=[1.0, 2.0, 3.0, 5.0])),
+                                                      bars=2000, memory=memory),
+            "api/analyze/step":       lambda: measure_steps(replay, 500, memory),
+        }
+        yield from cases.items()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# REPORT
+# ─────────────────────────────────────────────────────────────────────────────
+def environment() -> dict:
+    import pandas as pd
+    return {"time": time.strftime('%Y-%m-%dT%H:%M:%S'), "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__, "numba": smc_kernel.HAVE_NUMBA,
+            "machine": platform.machine(), "platform": platform.platform()}
+
+
+def row(name: str, res: dict) -> str:
+    bps = f"{res['bars_per_sec']:>13,.0f} bars/s" if 'bars_per_sec' in res else ' ' * 20
+    mem = f"{res['peak_mb']:>8.1f} MB" if res.get('peak_mb') is not None else ''
+    return f"{name:<46} {res['p50_ms']:>10.3f} ms p50 {res['p99_ms']:>10.3f} ms p99 {bps} {mem}"
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """(case, metric, baseline, current, relative change) for every case in
+    both runs, worst first; a positive change is a slowdown."""
+    out = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None: continue
+        if 'bars_per_sec' in new and 'bars_per_sec' in old:
+            change = old['bars_per_sec'] / new['bars_per_sec'] - 1
+            out.append((name, 'bars_per_sec', old['bars_per_sec'], new['bars_per_sec'], change))
+        else:
+            out.append((name, 'p50_ms', old['p50_ms'], new['p50_ms'], new['p50_ms'] / old['p50_ms'] - 1))
+    return sorted(out, key=lambda r: -r[4])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark SMCEngine and the API")
+    ap.add_argument('--sizes', default=','.join(map(str, SIZES)), help="comma-separated bar counts")
+    ap.add_argument('--lengths', default=','.join(map(str, LENGTHS)))
+    ap.add_argument('--backends', default='auto,python' if smc_kernel.HAVE_NUMBA else 'python')
+    ap.add_argument('--only', default='', help="run only cases whose name starts with this")
+    ap.add_argument('--no-api', action='store_true')
+    ap.add_argument('--no-memory', action='store_true', help="skip the tracemalloc runs")
+    ap.add_argument('--out', default='benchmark.json')
+    ap.add_argument('--baseline', help="earlier --out file to compare against")
+    ap.add_argument('--tolerance', type=float, default=0.25, help="slowdown that counts as a regression")
+    args = ap.parse_args(argv)
+
+    memory = not args.no_memory
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    lengths = [int(s) for s in args.lengths.split(',') if s]
+    backends = [s for s in args.backends.split(',') if s]
+
+    results = {}
+    for name, run in engine_cases(sizes, lengths, backends):
+        if name.startswith(args.only):
+            results[name] = run(memory)
+            print(row(name, results[name]), flush=True)
+    if not args.no_api and 'api/'.startswith(args.only[:4]):   # no server import for engine-only runs
+        for name, run in api_cases(memory):
+            if name.startswith(args.only):
+                results[name] = run()
+                print(row(name, results[name]), flush=True)
+
+    with open(args.out, 'w') as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\n{len(results)} cases → {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        diff = compare(results, baseline)
+        worse = [d for d in diff if d[4] > args.tolerance]
+        print(f"\nvs {args.baseline}: {len(diff)} cases compared, {len(worse)} regressions (> {args.tolerance:.0%} slower)")
+        for name, metric, old, new, change in diff:
+            flag = 'REGRESSION' if change > args.tolerance else ''
+            print(f"  {name:<46} {metric:<12} {old:>14,.3f} → {new:>14,.3f}  {change:+7.1%} {flag}")
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Replay checkpoints for SMCEngine.
+
+`Checkpoints` wraps an engine running over one fixed bar window and keeps an
+`SMCEngine.snapshot()` every `every` bars. `seek(df, idx)` moves the engine to
+exactly df[:idx] in either direction: forward it just extends, backward it
+restores the nearest snapshot at or before `idx` and replays the gap, so a
+seek costs at most `every` bar updates.
+
+Snapshots only hold the ring buffer, scalars, active OBs and open trades
+(outputs are shared, append-only lists), and at most `max_snapshots` are kept:
+when full, every other one is dropped and the spacing doubles.
+"""
+from bisect import bisect_right
+
+
+class Checkpoints:
+    def __init__(self, engine, every: int = 100, max_snapshots: int = 64):
+        self.engine        = engine
+        self.every         = every
+        self.max_snapshots = max_snapshots
+        self._snaps        = {}   # bar_count -> snapshot
+        self._marks        = []   # sorted bar_counts
+
+    def __len__(self):
+        return len(self._marks)
+
+    def clear(self):
+        self._snaps.clear(); self._marks.clear()
+
+    def _save(self):
+        n = self.engine.bar_count
+        if n not in self._snaps:
+            self._marks.insert(bisect_right(self._marks, n), n)
+        self._snaps[n] = self.engine.snapshot()
+        if len(self._marks) > self.max_snapshots:
+            self.every *= 2
+            self._marks = [m for m in self._marks if m % self.every == 0]
+            self._snaps = {m: self._snaps[m] for m in self._marks}
+
+    def advance(self, df, idx: int):
+        """Extend forward to df[:idx], snapshotting on every `every`-th bar."""
+        eng = self.engine
+        while eng.bar_count < idx:
+            stop = min(idx, (eng.bar_count // self.every + 1) * self.every)
+            eng.extend(df.iloc[eng.bar_count:stop])
+            if eng.bar_count % self.every == 0:
+                self._save()
+
+    def seek(self, df, idx: int):
+        """Leave the engine at exactly df[:idx]; returns bars replayed."""
+        eng = self.engine
+        idx = max(0, min(idx, len(df)))
+        if idx < eng.bar_count:
+            k = bisect_right(self._marks, idx)
+            if k: eng.restore(self._snaps[self._marks[k - 1]])
+            else: eng._reset_state()
+        start = eng.bar_count
+        self.advance(df, idx)
+        return idx - start
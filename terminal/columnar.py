@@ -0,0 +1,142 @@
+"""
+Columnar (struct-of-arrays) result tables for SMCEngine(columnar=True).
+
+Each table keeps one contiguous NumPy array per field, preallocated and grown
+geometrically, so `columns()` / `buffers()` / `to_frame()` hand out views of
+the engine's own storage instead of building Python objects per row.
+Views are invalidated by the next append that has to grow the table.
+
+Time columns follow the bars the engine is fed: datetime64[ns] for
+datetime64 times, int64 for integer ones (e.g. epoch seconds), set by
+`ResultColumns.set_time_dtype` before the first row.
+"""
+import numpy as np
+import pandas as pd
+
+# Code tables for the small categorical fields
+KINDS   = ('BOS', 'CHoCH')
+DIRS    = ('LONG', 'SHORT')
+RESULTS = ('open', 'win', 'loss')
+
+OB_COLUMNS = (
+    ('time', 'datetime64[ns]'), ('high', 'f8'), ('low', 'f8'), ('bias', 'i1'),
+    ('partial', '?'), ('cur_h', 'f8'), ('cur_l', 'f8'), ('mitigated', '?'), ('is_refined', '?'),
+)
+STRUCTURE_COLUMNS = (
+    ('time', 'datetime64[ns]'), ('level', 'f8'), ('kind', 'i1'), ('direction', 'i1'),
+)
+TRADE_COLUMNS = (
+    ('time', 'datetime64[ns]'), ('dir', 'i1'), ('entry', 'f8'), ('sl', 'f8'), ('tp', 'f8'), ('result', 'i1'),
+    ('exit_bar', 'i8'),   # bar index the `rr` target or stop is hit on, -1 while open
+)
+TARGET_COLUMNS = (   # one row per (trade, rr target): row = trade * len(rr_targets) + k
+    ('trade', 'i8'), ('rr', 'f8'), ('tp', 'f8'), ('result', 'i1'),
+)
+CATEGORIES = {'kind': KINDS, 'dir': DIRS, 'result': RESULTS}
+
+
+class ColumnStore:
+    def __init__(self, schema, capacity: int = 256):
+        self.schema = tuple(schema)
+        self.names  = tuple(name for name, _ in self.schema)
+        self._n     = 0
+        self._cols  = {name: np.empty(capacity, dtype) for name, dtype in self.schema}
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def capacity(self):
+        return len(self._cols[self.names[0]])
+
+    def _grow(self):
+        cap = max(self.capacity * 2, 16)
+        for name, arr in self._cols.items():
+            new = np.empty(cap, arr.dtype)
+            new[:self._n] = arr[:self._n]
+            self._cols[name] = new
+
+    def append(self, *values) -> int:
+        """Append one row given in schema order, return its row index."""
+        row = self._n
+        if row == self.capacity: self._grow()
+        for arr, v in zip(self._cols.values(), values):
+            arr[row] = v
+        self._n = row + 1
+        return row
+
+    def extend(self, *columns) -> int:
+        """Append len(columns[0]) rows given as one array per field in schema
+        order, return the first new row index."""
+        row, n = self._n, len(columns[0])
+        while row + n > self.capacity: self._grow()
+        for arr, values in zip(self._cols.values(), columns):
+            arr[row:row + n] = values
+        self._n = row + n
+        return row
+
+    def retype(self, name: str, dtype):
+        """Change an empty column's dtype."""
+        if self._n: raise ValueError(f"column {name!r} already holds rows")
+        self._cols[name] = np.empty(self.capacity, dtype)
+
+    def truncate(self, n: int):
+        """Drop every row from `n` on (storage is kept for reuse)."""
+        self._n = min(self._n, n)
+
+    def set(self, row: int, **values):
+        for name, v in values.items():
+            self._cols[name][row] = v
+
+    def get(self, row: int, name: str):
+        return self._cols[name][row]
+
+    def __getitem__(self, name):
+        return self._cols[name][:self._n]
+
+    def columns(self) -> dict:
+        """Zero-copy views of every column, trimmed to the filled rows."""
+        return {name: arr[:self._n] for name, arr in self._cols.items()}
+
+    def buffers(self) -> dict:
+        """Arrow-style raw buffers: name -> (numpy dtype str, memoryview)."""
+        return {name: (arr.dtype.str, memoryview(arr)) for name, arr in self.columns().items()}
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame over the column views; code fields become Categoricals."""
+        data = {}
+        for name, arr in self.columns().items():
+            if name in CATEGORIES:
+                data[name] = pd.Categorical.from_codes(arr, CATEGORIES[name])
+            else:
+                data[name] = arr
+        return pd.DataFrame(data, copy=False)
+
+
+class ResultColumns:
+    """The three engine outputs as column stores (plus per-RR trade targets)."""
+    def __init__(self, capacity: int = 256, targets: bool = False):
+        self.obs       = ColumnStore(OB_COLUMNS, capacity)
+        self.structure = ColumnStore(STRUCTURE_COLUMNS, capacity)
+        self.trades    = ColumnStore(TRADE_COLUMNS, capacity)
+        self.targets   = ColumnStore(TARGET_COLUMNS, capacity) if targets else None
+
+    def set_time_dtype(self, dtype):
+        """Match the time columns to the bar times: int64 for integer times,
+        datetime64[ns] otherwise."""
+        dtype = 'i8' if np.dtype(dtype).kind in 'iu' else 'datetime64[ns]'
+        for store in (self.obs, self.structure, self.trades):
+            if store._cols['time'].dtype != dtype: store.retype('time', dtype)
+
+    def add_ob(self, ob) -> int:
+        return self.obs.append(ob.time, ob.high, ob.low, ob.bias, ob.partial,
+                               ob.cur_h, ob.cur_l, ob.mitigated, ob.is_refined)
+
+    def sync_ob(self, row: int, ob):
+        self.obs.set(row, partial=ob.partial, cur_h=ob.cur_h, cur_l=ob.cur_l, mitigated=ob.mitigated)
+
+    def to_frames(self) -> dict:
+        frames = {'obs': self.obs.to_frame(), 'structure': self.structure.to_frame(),
+                  'trades': self.trades.to_frame()}
+        if self.targets is not None: frames['targets'] = self.targets.to_frame()
+        return frames
@@ -1,38 +1,31 @@
 import pandas as pd
-import numpy as np
-import MetaTrader5 as mt5
-from datetime import datetime, timedelta
 import os
 
+from synthetic import random_walk
+
 def generate_data(rows: int = 2000, start_price: float = 1.10) -> pd.DataFrame:
-    np.random.seed(99)
-    # Use the provided starting price
-    closes = np.cumprod(1 + np.random.normal(0, 0.0018, rows)) * start_price
-    start  = datetime(2025, 1, 1)
-    out    = []
-    for i in range(rows):
-        t = start + timedelta(minutes=15 * i)
-        c = closes[i]
-        o = closes[i-1] if i > 0 else c
-        h = max(o, c) + abs(np.random.normal(0, c * 0.0006))
-        l = min(o, c) - abs(np.random.normal(0, c * 0.0006))
-        out.append({
-            'time': t, 
-            'open': float(round(o, 5)), 
-            'high': float(round(h, 5)),
-            'low': float(round(l, 5)), 
-            'close': float(round(c, 5))
-        })
-    return pd.DataFrame(out)
+    """The seed-99 mock series (see synthetic.random_walk), priced from start_price."""
+    return random_walk(rows, seed=99, start_price=start_price, decimals=5)
+
+def load_mt5():
+    """The MetaTrader5 module, imported on first use; None where it isn't
+    installed (it only exists for Windows)."""
+    try:
+        import MetaTrader5 as mt5
+    except ImportError:
+        return None
+    return mt5
 
-def fetch_mt5_data(symbol="BTCUSDm", timeframe=mt5.TIMEFRAME_M1, bars=2000):
-    if not mt5.initialize():
+def fetch_mt5_data(symbol="BTCUSDm", timeframe=None, bars=2000):
+    mt5 = load_mt5()
+    if mt5 is None or not mt5.initialize():
         # Fallback to synthetic if MT5 not available
         return generate_data(bars)
         
     # Ensure symbol is in Market Watch
     mt5.symbol_select(symbol, True)
     
+    if timeframe is None: timeframe = mt5.TIMEFRAME_M1
     rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, bars)
     if rates is None:
         return generate_data(bars)
@@ -42,6 +35,11 @@ def fetch_mt5_data(symbol="BTCUSDm", timeframe=mt5.TIMEFRAME_M1, bars=2000):
     # Filter columns
     return df[['time', 'open', 'high', 'low', 'close']]
 
+def mt5_timeframe(minutes: int):
+    mt5 = load_mt5()
+    tf_map = {1: mt5.TIMEFRAME_M1, 5: mt5.TIMEFRAME_M5, 15: mt5.TIMEFRAME_M15, 60: mt5.TIMEFRAME_H1, 240: mt5.TIMEFRAME_H4}
+    return tf_map.get(int(minutes), mt5.TIMEFRAME_M15)
+
 class DataFeed:
     # Legacy class for other potential imports
     def __init__(self, mode="live"):
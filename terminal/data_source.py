@@ -0,0 +1,279 @@
+"""
+Bar data sources.
+
+Every source answers `fetch(symbol, tf, start=None, end=None, count=None)`
+with a time/open/high/low/close DataFrame, oldest bar first, holding the bars
+with start <= time < end (the newest `count` of them when given), and
+`subscribe(symbol, tf)` with a generator of refreshed windows. `tf` is the
+timeframe in minutes.
+
+  MT5Source        – the MetaTrader5 terminal (the package is imported on first use)
+  CSVSource        – CSV files such as mock_data_15m.csv
+  StoreSource      – the local bar store (bar_store.py)
+  SyntheticSource  – generated random-walk bars
+  ReplaySource     – another source revealed one bar at a time on the wall
+                     clock: a live feed for machines without a terminal
+  FallbackSource   – the first of several sources that returns any bars
+
+`source_from_spec()` builds one from a string such as the SMC_DATA_SOURCE
+environment variable: 'mt5' (the default: MT5, synthetic bars when no
+terminal answers), 'csv[:PATH]', 'store[:ROOT]', 'synthetic' or
+'replay[:<spec>]'.
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from data_feed import generate_data, load_mt5, mt5_timeframe
+
+COLUMNS = ['time', 'open', 'high', 'low', 'close']
+DEFAULT_WATCHLIST = ["BTCUSDm", "EURUSDm", "XAUUSDm"]
+MOCK_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mock_data_15m.csv')
+
+
+def fallback_price(symbol: str) -> float:
+    # Starting price for synthetic fallback based on common symbols
+    # EURUSD ~1.1, BTC ~60k, ETH ~2500, BCH ~500, Gold ~2000
+    s_upper = symbol.upper()
+    if "BTC" in s_upper: return 65000.0
+    if "ETH" in s_upper: return 2500.0
+    if "BCH" in s_upper: return 520.0
+    if "XAU" in s_upper or "GOLD" in s_upper: return 2300.0
+    return 1.10
+
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame(columns=COLUMNS)
+
+
+def _window(df: pd.DataFrame, start=None, end=None, count=None) -> pd.DataFrame:
+    t = df['time']
+    lo = 0 if start is None else int(t.searchsorted(pd.Timestamp(start), 'left'))
+    hi = len(df) if end is None else int(t.searchsorted(pd.Timestamp(end), 'left'))
+    if count is not None: lo = max(lo, hi - count)
+    return df.iloc[lo:hi].reset_index(drop=True)
+
+
+def _utc(value) -> datetime:
+    return pd.Timestamp(value).to_pydatetime().replace(tzinfo=timezone.utc)
+
+
+class DataSource(ABC):
+    name  = 'source'
+    error = None   # why the last fetch came back empty, where known
+
+    @abstractmethod
+    def fetch(self, symbol: str, tf: int, start=None, end=None, count=None) -> pd.DataFrame:
+        """Bars with start <= time < end, oldest first (see the module docstring)."""
+
+    def subscribe(self, symbol: str, tf: int, count: int = 10, interval: float = 1.0, stop=None):
+        """Newest `count` bars, yielded whenever the last one changes (polled
+        every `interval` seconds) until `stop()` returns True."""
+        last = None
+        while not (stop and stop()):
+            bars = self.fetch(symbol, tf, count=count)
+            key = None if bars.empty else tuple(bars.iloc[-1])
+            if key != last:
+                last = key
+                yield bars
+            time.sleep(interval)
+
+    def symbols(self) -> list:
+        return []
+
+    def account(self):
+        """Broker account details, for sources that have one."""
+        return None
+
+    def connect(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class MT5Source(DataSource):
+    name = 'mt5'
+
+    def _mt5(self):
+        mt5 = load_mt5()
+        if mt5 is None:
+            self.error = "MetaTrader5 package not installed"
+        elif not mt5.initialize():
+            self.error = str(mt5.last_error())
+        else:
+            return mt5
+        return None
+
+    def connect(self) -> bool:
+        return self._mt5() is not None
+
+    def close(self):
+        mt5 = load_mt5()
+        if mt5 is not None: mt5.shutdown()
+
+    def fetch(self, symbol, tf, start=None, end=None, count=None):
+        mt5 = self._mt5()
+        if mt5 is None: return _empty()
+        # Ensure symbol is in Market Watch
+        mt5.symbol_select(symbol, True)
+        timeframe = mt5_timeframe(tf)
+        if start is not None:
+            stop  = _utc(end) if end is not None else datetime.now(timezone.utc) + timedelta(days=1)
+            rates = mt5.copy_rates_range(symbol, timeframe, _utc(start), stop)
+        elif end is not None:
+            rates = mt5.copy_rates_from(symbol, timeframe, _utc(end), count or 2000)
+        else:
+            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count or 2000)
+        if rates is None or len(rates) == 0:
+            self.error = str(mt5.last_error())
+            return _empty()
+        df = pd.DataFrame(rates)
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        return _window(df[COLUMNS], start, end, count)
+
+    def symbols(self):
+        mt5 = self._mt5()
+        symbols = mt5.symbols_get() if mt5 is not None else None
+        if not symbols: return []
+        return [s.name for s in symbols if s.visible] or [s.name for s in symbols[:50]]
+
+    def account(self):
+        mt5 = self._mt5()
+        acc = mt5.account_info() if mt5 is not None else None
+        if acc is None: return None
+        return {
+            "name": str(getattr(acc, "name", "N/A")),
+            "server": str(getattr(acc, "server", "N/A")),
+            "balance": float(getattr(acc, "balance", 0.0)),
+            "equity": float(getattr(acc, "equity", 0.0)),
+            "currency": str(getattr(acc, "currency", "USD")),
+            "trade_mode": int(getattr(acc, "trade_mode", 0)),
+        }
+
+
+class CSVSource(DataSource):
+    """`files` is one path served for every symbol, or {symbol: path}. A file
+    holds a single timeframe, which is returned whatever `tf` asks for."""
+    name = 'csv'
+
+    def __init__(self, files=MOCK_CSV):
+        self.files   = dict(files) if isinstance(files, dict) else {None: files}
+        self._frames = {}
+
+    def _frame(self, symbol):
+        path = self.files.get(symbol, self.files.get(None))
+        if path is None: return _empty()
+        if path not in self._frames:
+            self._frames[path] = pd.read_csv(path, parse_dates=['time'])[COLUMNS]
+        return self._frames[path]
+
+    def fetch(self, symbol, tf, start=None, end=None, count=None):
+        return _window(self._frame(symbol), start, end, count)
+
+    def symbols(self):
+        return [s for s in self.files if s is not None]
+
+
+class StoreSource(DataSource):
+    name = 'store'
+
+    def __init__(self, store=None):
+        if store is None:
+            from bar_store import BarStore
+            store = BarStore()
+        self.store = store
+
+    def fetch(self, symbol, tf, start=None, end=None, count=None):
+        from bar_store import to_frame
+        bars = self.store.read(symbol, tf, start, end)
+        return to_frame(bars if count is None else bars[max(len(bars) - count, 0):])
+
+    def symbols(self):
+        return sorted({sym for sym, _ in self.store.series()})
+
+
+class SyntheticSource(DataSource):
+    """data_feed.generate_data bars, priced per symbol (see fallback_price)."""
+    name = 'synthetic'
+
+    def __init__(self, rows: int = 2000):
+        self.rows = rows
+
+    def fetch(self, symbol, tf, start=None, end=None, count=None):
+        df = generate_data(max(count or 0, self.rows), start_price=fallback_price(symbol))
+        return _window(df, start, end, count)
+
+
+class ReplaySource(DataSource):
+    """`base` played back as a live feed: the first `start` bars are visible
+    at once and one more appears every 1 / `speed` seconds. The newest visible
+    bar stands in for the forming one."""
+    name = 'replay'
+
+    def __init__(self, base: DataSource, start: int = 200, speed: float = 1.0, history: int = 100_000):
+        self.base    = base
+        self.start   = start
+        self.speed   = speed
+        self.history = history
+        self._series = {}
+        self._t0     = time.monotonic()
+
+    def _visible(self, symbol, tf):
+        df = self._series.get((symbol, tf))
+        if df is None:
+            df = self._series[(symbol, tf)] = self.base.fetch(symbol, tf, count=self.history)
+        n = self.start + int((time.monotonic() - self._t0) * self.speed)
+        return df.iloc[:n]
+
+    def fetch(self, symbol, tf, start=None, end=None, count=None):
+        return _window(self._visible(symbol, tf), start, end, count)
+
+    def symbols(self):
+        return self.base.symbols()
+
+
+class FallbackSource(DataSource):
+    """Bars from the first source that has any."""
+    name = 'fallback'
+
+    def __init__(self, *sources: DataSource):
+        self.sources = sources
+
+    @property
+    def error(self):
+        return next((s.error for s in self.sources if s.error), None)
+
+    def fetch(self, symbol, tf, start=None, end=None, count=None):
+        for src in self.sources:
+            df = src.fetch(symbol, tf, start, end, count)
+            if not df.empty: break
+        return df
+
+    def symbols(self):
+        return next((syms for syms in (s.symbols() for s in self.sources) if syms), [])
+
+    def account(self):
+        return next((acc for acc in (s.account() for s in self.sources) if acc is not None), None)
+
+    def connect(self) -> bool:
+        return any([s.connect() for s in self.sources])
+
+    def close(self):
+        for s in self.sources: s.close()
+
+
+def source_from_spec(spec: str = None) -> DataSource:
+    spec = spec or os.environ.get('SMC_DATA_SOURCE', 'mt5')
+    kind, _, arg = spec.partition(':')
+    if kind == 'mt5':       return FallbackSource(MT5Source(), SyntheticSource())
+    if kind == 'csv':       return CSVSource(arg or MOCK_CSV)
+    if kind == 'store':
+        from bar_store import BarStore
+        return StoreSource(BarStore(arg) if arg else None)
+    if kind == 'synthetic': return SyntheticSource()
+    if kind == 'replay':    return ReplaySource(source_from_spec(arg or 'csv'))
+    raise ValueError(f"unknown data source {spec!r}")
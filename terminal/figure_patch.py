@@ -0,0 +1,97 @@
+"""
+Incremental Plotly figure updates for the Dash app.
+
+A chart is described by its *parts*: {path: value}, where a path such as
+('data', 0, 'close') or ('layout', 'shapes') names a spot in the figure.
+`FigureSync` remembers the parts the browser last received and turns the
+next set into a `dash.Patch` holding only the differences:
+
+  • a list that grew keeps its prefix and is extended (new candles, trades),
+  • a few changed items are set in place – field by field for dicts, so an
+    OB whose right edge moved sends just `x1`,
+  • anything else (a shifted list, a new window) is assigned whole.
+
+The full figure is only sent when the structure changes (first render, a
+reset, a new candle window), and `window()` keeps at most `2 * max_candles`
+candles in the browser, trimming back to `max_candles` in one rebuild.
+"""
+import dash
+from dash import Patch
+
+
+def _node(patch, path):
+    for key in path:
+        patch = patch[key]
+    return patch
+
+
+def _dict_ops(old: dict, new: dict) -> list:
+    """(key, value) for every field that differs, or None when keys differ."""
+    if old.keys() != new.keys(): return None
+    return [(k, v) for k, v in new.items() if old[k] != v]
+
+
+def patch_list(node, key, old: list, new: list, max_ops: int = None) -> int:
+    """Put into `node[key]` the changes from `old` to `new`; returns the
+    number of operations (1 when the list is assigned whole)."""
+    if old == new: return 0
+    n = min(len(old), len(new))
+    changed = [i for i in range(n) if old[i] != new[i]]
+    if len(new) < len(old):   # shrank: nothing to extend, send it whole
+        node[key] = new; return 1
+    ops = []
+    for i in changed:
+        fields = _dict_ops(old[i], new[i]) if isinstance(old[i], dict) and isinstance(new[i], dict) else None
+        ops += [(i, k, v) for k, v in fields] if fields else [(i, None, new[i])]
+    limit = max(8, len(new) if max_ops is None else max_ops)
+    if len(ops) > limit:
+        node[key] = new; return 1
+    for i, field, v in ops:
+        if field is None: node[key][i] = v
+        else:             node[key][i][field] = v
+    if len(new) > len(old): node[key].extend(new[len(old):])
+    return len(ops) + (len(new) > len(old))
+
+
+def diff_parts(patch, old: dict, new: dict) -> int:
+    """Write the differences between two parts dicts into `patch`."""
+    ops = 0
+    for path, value in new.items():
+        prev = old[path]
+        if isinstance(value, list) and isinstance(prev, list) and path[-1] != 'range':
+            ops += patch_list(_node(patch, path[:-1]), path[-1], prev, value)
+        elif prev != value:
+            _node(patch, path[:-1])[path[-1]] = value; ops += 1
+    return ops
+
+
+class FigureSync:
+    """The parts the browser holds, so the next update can be a Patch."""
+    def __init__(self, max_candles: int = 360):
+        self.max_candles = max_candles
+        self.sent  = None
+        self.start = None   # first bar of the candle window
+        self.full = self.patches = 0
+
+    def reset(self):
+        self.sent = self.start = None
+
+    def window(self, n: int, visible: int) -> int:
+        """First of `n` bars to draw: fixed while the window grows, moved
+        (forcing a rebuild) once it doubles or the view falls before it."""
+        if self.start is None or n - self.start > 2 * self.max_candles or n < self.start + visible:
+            self.start = max(0, n - self.max_candles)
+            self.sent = None
+        return self.start
+
+    def update(self, parts: dict, build):
+        """`build(parts)` the first time or after a reset, else a Patch (or
+        `dash.no_update` when nothing changed)."""
+        old, self.sent = self.sent, parts
+        if old is None or old.keys() != parts.keys():
+            self.full += 1
+            return build(parts)
+        patch = Patch()
+        if not diff_parts(patch, old, parts): return dash.no_update
+        self.patches += 1
+        return patch
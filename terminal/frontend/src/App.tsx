@@ -7,6 +7,23 @@ import Chart from './components/Chart';
 import type { CandlestickData, Time } from 'lightweight-charts';
 
 const API_BASE = 'http://127.0.0.1:8085/api';
+const WS_BASE = 'ws://127.0.0.1:8085/ws';
+
+// Stream deltas: rows keyed by `id` – updates replace what we hold, new rows are added
+const mergeById = (rows: any[], updated: any[], added: any[], prepend = false) => {
+  const byId = new Map(updated.map((r: any) => [r.id, r]));
+  const merged = rows.map((r: any) => byId.get(r.id) ?? r);
+  return prepend ? [...added, ...merged] : [...merged, ...added];
+};
+
+// Incoming candles replace any we hold from their first time on (the forming bar)
+const mergeCandles = (prev: CandlestickData<Time>[], incoming: CandlestickData<Time>[]) => {
+  if (!incoming.length) return prev;
+  const first = incoming[0].time as number;
+  let i = prev.length;
+  while (i > 0 && (prev[i - 1].time as number) >= first) i--;
+  return [...prev.slice(0, i), ...incoming];
+};
 
 function App() {
   // Config State
@@ -58,6 +75,7 @@ function App() {
 
   // SMC Update
   useEffect(() => {
+    if (liveFeed) return; // the live stream pushes its own analysis
     if (candlesticks.length > 0) {
       axios.post(`${API_BASE}/engine/analyze`, {
         symbol, timeframe: tf, currentIndex, rr, length: smcLength
@@ -65,7 +83,7 @@ function App() {
         setAnalysis({ ...res.data, receivedSymbol: symbol });
       });
     }
-  }, [currentIndex, candlesticks, symbol, tf, rr, smcLength]);
+  }, [currentIndex, candlesticks, symbol, tf, rr, smcLength, liveFeed]);
 
   const effectiveAnalysis = analysis.receivedSymbol === symbol ? analysis : {
     obs: [],
@@ -79,29 +97,34 @@ function App() {
     setCurrentIndex(prev => Math.min(prev + count, candlesticks.length));
   };
 
-  // Real Live Feed Fetcher
-  const fetchLiveUpdate = useCallback(async () => {
-    try {
-      const res = await axios.get(`${API_BASE}/history?symbol=${symbol}&timeframe=${tf}&count=2000`);
-      const newCandles = res.data.candles;
-      if (newCandles.length > 0) {
-        setCandlesticks(newCandles);
-        setCurrentIndex(newCandles.length); // Always show latest in live mode
-      }
-    } catch (err) {
-      console.error("Live fetch failed", err);
-    }
-  }, [symbol, tf]);
-
-  // Live interval (Real Live Feed + Bar Replay)
+  // Real Live Feed: one snapshot, then only deltas pushed by the server
   useEffect(() => {
-    if (liveFeed) {
-      // Fetch initially when turned on
-      fetchLiveUpdate();
-      const interval = setInterval(fetchLiveUpdate, speed);
-      return () => clearInterval(interval);
-    }
-  }, [liveFeed, speed, fetchLiveUpdate]);
+    if (!liveFeed) return;
+    const ws = new WebSocket(`${WS_BASE}/stream?symbol=${symbol}&tf=${tf}&length=${smcLength}&rr=${rr}`);
+    ws.onmessage = (ev) => {
+      const msg = JSON.parse(ev.data);
+      if (msg.type === 'snapshot') {
+        setCandlesticks(msg.candles);
+        setCurrentIndex(msg.candles.length);
+        setAnalysis({
+          obs: msg.obs, structure: msg.structure, trades: msg.trades,
+          trend: msg.trend, trails: msg.trails, receivedSymbol: symbol
+        });
+      } else {
+        setCandlesticks(prev => mergeCandles(prev, msg.candles));
+        setAnalysis((prev: any) => ({
+          ...prev,
+          obs: mergeById(prev.obs, msg.obs_updated, msg.obs_new, true),
+          structure: [...prev.structure, ...msg.structure],
+          trades: mergeById(prev.trades || [], msg.trades_updated, msg.trades_new),
+          trend: msg.trend,
+          trails: msg.trails
+        }));
+      }
+    };
+    ws.onerror = (err) => console.error("Live stream failed", err);
+    return () => ws.close();
+  }, [liveFeed, symbol, tf, smcLength, rr]);
 
   // Bar Replay only when live feed is OFF
   useEffect(() => {
@@ -151,7 +174,7 @@ function App() {
 
       <div className="flex-1 flex overflow-hidden relative">
         <Chart
-          data={candlesticks.slice(0, currentIndex)}
+          data={liveFeed ? candlesticks : candlesticks.slice(0, currentIndex)}
           obs={effectiveAnalysis.obs}
           structure={effectiveAnalysis.structure}
           trend={effectiveAnalysis.trend}
@@ -0,0 +1,243 @@
+"""
+Golden-output parity harness for SMCEngine
+==========================================
+Run:  python3 golden.py check                       # every mode against golden/*.json
+      python3 golden.py check --mode incremental --dataset mock_data_15m
+      python3 golden.py record                      # rewrite golden/*.json (deliberate changes only)
+
+golden/<dataset>.json holds the OBs, structure events, trades and final trend
+/ trails the reference run – the pure-Python bar loop, replaying the whole
+dataset with rr=RR and rr_targets=RR_TARGETS – produced for each of LENGTHS,
+stored column by column. That loop is the line-by-line port of stable.pine,
+so the files pin down its behaviour; any optimisation has to reproduce them.
+
+Every mode in MODES builds its engine a different way – compiled kernel,
+bar-by-bar extension, columnar tables, checkpoint seeks, several RR targets –
+and `diff` compares what it found with the golden run: times, kinds,
+directions, flags and results exactly, prices within `rtol`. A dataset whose
+bars no longer hash to the recorded checksum is reported as changed rather
+than diffed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import smc_kernel
+from checkpoints import Checkpoints
+from smc_engine_v2 import SMCEngine
+from synthetic import generate_frame, random_walk
+
+HERE       = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(HERE, 'golden')
+
+DATASETS = {
+    'mock_data_15m': lambda: pd.read_csv(os.path.join(HERE, 'mock_data_15m.csv'), parse_dates=['time']),
+    'random_walk':   lambda: random_walk(3000, seed=99, start_price=68000, decimals=2),
+    'regimes':       lambda: generate_frame(5000, seed=3, tf=5),
+    # coarse prices: equal highs / lows and same-bar TP / SL hits
+    'ticks':         lambda: generate_frame(3000, seed=11, tf=1, decimals=1),
+}
+LENGTHS    = (5, 20, 50)
+RR         = 3.0
+RR_TARGETS = (1.0, 2.0, 3.0, 5.0)
+
+OB_FIELDS        = ('time', 'bias', 'high', 'low', 'partial', 'cur_h', 'cur_l', 'mitigated', 'is_refined')
+STRUCTURE_FIELDS = ('time', 'kind', 'direction', 'level')
+TRADE_FIELDS     = ('time', 'dir', 'entry', 'sl', 'tp', 'result')
+TARGET_FIELDS    = ('tps', 'results')
+PRICE_FIELDS     = {'high', 'low', 'cur_h', 'cur_l', 'level', 'entry', 'sl', 'tp', 'tps', 'trail_top', 'trail_bottom'}
+
+
+def _time(t):
+    return None if t is None else pd.Timestamp(t).isoformat()
+
+
+def _value(field, v):
+    if field == 'time' or field.endswith('_time'): return _time(v)
+    if isinstance(v, (bool, np.bool_)):           return bool(v)
+    if isinstance(v, (int, np.integer)):          return int(v)
+    if isinstance(v, (float, np.floating)):       return float(v)
+    if isinstance(v, (list, tuple)):              return [_value(field, x) for x in v]
+    return v
+
+
+def checksum(df: pd.DataFrame) -> str:
+    h = hashlib.sha256(df['time'].values.astype('M8[s]').view(np.int64).tobytes())
+    for name in ('open', 'high', 'low', 'close'):
+        h.update(np.ascontiguousarray(df[name].values, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def outputs(engine: SMCEngine) -> dict:
+    """Engine results as {table: {field: [values]}} plus the final state."""
+    trade_fields = TRADE_FIELDS + (TARGET_FIELDS if engine.rr_targets else ())
+    tables = {
+        'obs':       (OB_FIELDS, [{f: getattr(o, f) for f in OB_FIELDS} for o in engine.obs]),
+        'structure': (STRUCTURE_FIELDS, [{f: getattr(s, f) for f in STRUCTURE_FIELDS} for s in engine.structure]),
+        'trades':    (trade_fields, engine.trades),
+    }
+    out = {name: {f: [_value(f, row[f]) for row in rows] for f in fields} for name, (fields, rows) in tables.items()}
+    out['state'] = {f: _value(f, getattr(engine, f)) for f in
+                    ('trend', 'trail_top', 'trail_top_time', 'trail_bottom', 'trail_bot_time')}
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MODES  –  each returns an engine that has processed all of df
+# ─────────────────────────────────────────────────────────────────────────────
+def reference(df, length, rr_targets=RR_TARGETS):
+    e = SMCEngine(length=length, rr=RR, rr_targets=rr_targets, backend='python')
+    e.update(df)
+    return e
+
+
+def compiled(df, length):
+    e = SMCEngine(length=length, rr=RR, backend='numba' if smc_kernel.HAVE_NUMBA else 'python')
+    if smc_kernel.HAVE_NUMBA: e.update(df)
+    else: e._run_kernel(df['time'].values, df['high'].values, df['low'].values, df['close'].values)
+    return e
+
+
+def incremental(df, length):
+    """A short history, then uneven chunks, then single bars via push_bar."""
+    e = SMCEngine(length=length, rr=RR, backend='python')
+    i = len(df) // 4
+    e.update(df.iloc[:i])
+    for size in [1, 7, 64, 3, 250, 2] * (len(df) // 327 + 1):
+        if i >= len(df) * 3 // 4: break
+        e.extend(df.iloc[i:i + size]); i += size
+    for row in df.iloc[i:].itertuples(index=False):
+        e.push_bar(row.time, row.open, row.high, row.low, row.close)
+    return e
+
+
+def columnar(df, length):
+    e = SMCEngine(length=length, rr=RR, columnar=True, backend='python')
+    e.update(df)
+    return e
+
+
+def checkpoints(df, length):
+    """Bar replay: seeks forward and back through checkpoints, ending at the last bar."""
+    e = SMCEngine(length=length, rr=RR, columnar=True, backend='python')
+    replay = Checkpoints(e, every=50)
+    n = len(df)
+    for idx in (n // 2, n // 3, n // 3 + 1, n - 10, 7, n * 2 // 3, n):
+        replay.seek(df, idx)
+    return e
+
+
+def multi_rr(df, length):
+    e = SMCEngine(length=length, rr=RR, rr_targets=RR_TARGETS)
+    e.update(df)
+    return e
+
+
+MODES = {'full': lambda df, length: reference(df, length, ()), 'compiled': compiled,
+         'incremental': incremental, 'columnar': columnar, 'checkpoints': checkpoints, 'multi_rr': multi_rr}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# GOLDEN FILES
+# ─────────────────────────────────────────────────────────────────────────────
+def golden_path(dataset: str) -> str:
+    return os.path.join(GOLDEN_DIR, f"{dataset}.json")
+
+
+def record(dataset: str) -> str:
+    df = DATASETS[dataset]()
+    golden = {"dataset": dataset, "bars": len(df), "checksum": checksum(df), "rr": RR,
+              "rr_targets": list(RR_TARGETS),
+              "runs": {str(length): outputs(reference(df, length)) for length in LENGTHS}}
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    path = golden_path(dataset)
+    with open(path, 'w') as f:
+        json.dump(golden, f, separators=(',', ':'))
+        f.write('\n')
+    return path
+
+
+def load(dataset: str) -> dict:
+    with open(golden_path(dataset)) as f:
+        return json.load(f)
+
+
+def _close(a, b, rtol: float) -> bool:
+    if a is None or b is None: return a is b
+    if isinstance(a, list):    return len(a) == len(b) and all(_close(x, y, rtol) for x, y in zip(a, b))
+    return abs(a - b) <= rtol * max(abs(a), abs(b), 1.0)
+
+
+def diff(expected: dict, actual: dict, rtol: float = 1e-9, limit: int = 10) -> list:
+    """Mismatches between two `outputs()`, as readable strings (at most
+    `limit` per table). Fields missing from `actual` are not compared."""
+    out = []
+    for table in ('obs', 'structure', 'trades'):
+        exp, act = expected[table], actual[table]
+        n_exp, n_act = len(exp['time']), len(act['time'])
+        if n_exp != n_act:
+            out.append(f"{table}: {n_act} rows, expected {n_exp}")
+        found = 0
+        for i in range(min(n_exp, n_act)):
+            bad = [f"{f}={act[f][i]!r} (expected {exp[f][i]!r})" for f in act if f in exp and
+                   not (_close(act[f][i], exp[f][i], rtol) if f in PRICE_FIELDS else act[f][i] == exp[f][i])]
+            if bad:
+                found += 1
+                if found <= limit: out.append(f"{table}[{i}] @ {exp['time'][i]}: " + ', '.join(bad))
+        if found > limit: out.append(f"{table}: … {found - limit} more rows differ")
+    for f, v in expected['state'].items():
+        a = actual['state'][f]
+        if not (_close(a, v, rtol) if f in PRICE_FIELDS else a == v):
+            out.append(f"state.{f}={a!r} (expected {v!r})")
+    return out
+
+
+def check(datasets=None, modes=None, rtol: float = 1e-9, verbose: bool = True) -> dict:
+    """{(dataset, length, mode): [mismatches]} for every combination; a
+    dataset whose bars changed since recording gets a single entry."""
+    failures = {}
+    for name in datasets or DATASETS:
+        golden = load(name)
+        df = DATASETS[name]()
+        if checksum(df) != golden['checksum']:
+            failures[(name, None, None)] = [f"dataset changed since recording ({checksum(df)} != {golden['checksum']})"]
+            continue
+        for length in LENGTHS:
+            expected = golden['runs'][str(length)]
+            for mode in modes or MODES:
+                problems = diff(expected, outputs(MODES[mode](df, length)), rtol)
+                if problems: failures[(name, length, mode)] = problems
+                if verbose:
+                    print(f"{name:<14} length={length:<3} {mode:<12} {'OK' if not problems else 'MISMATCH'}")
+    return failures
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Golden-output parity harness for SMCEngine")
+    ap.add_argument('cmd', choices=('check', 'record'))
+    ap.add_argument('--dataset', default='', help="comma-separated (default: all)")
+    ap.add_argument('--mode', default='', help=f"comma-separated, of {', '.join(MODES)} (default: all)")
+    ap.add_argument('--rtol', type=float, default=1e-9, help="relative tolerance on prices")
+    args = ap.parse_args(argv)
+    datasets = [s for s in args.dataset.split(',') if s] or list(DATASETS)
+    modes = [s for s in args.mode.split(',') if s] or list(MODES)
+
+    if args.cmd == 'record':
+        for name in datasets:
+            print(f"{name}: {record(name)}")
+        return 0
+    failures = check(datasets, modes, args.rtol)
+    for (name, length, mode), problems in failures.items():
+        print(f"\n{name} length={length} {mode}:")
+        for p in problems: print(f"  {p}")
+    print(f"\n{'FAILED' if failures else 'OK'}: {len(failures)} mismatching runs")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Single-thread executor for MetaTrader5 calls.
+
+The MetaTrader5 package drives one terminal over one IPC connection and is
+not thread-safe, so every call goes through the one worker thread here, in
+submission order. Async callers await the returned futures without blocking
+the event loop; identical requests already queued or running (same `key`)
+share one call instead of queueing another.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class MT5Worker:
+    def __init__(self):
+        self._pool     = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mt5')
+        self._inflight = {}   # key -> Future of the call serving it
+        self._pending  = 0    # calls queued or running
+        self._lock     = threading.RLock()
+        self.calls = self.coalesced = 0
+
+    def submit(self, fn, *args, key=None) -> Future:
+        """Queue fn(*args) for the MT5 thread. With `key`, a call still pending
+        under the same key is returned instead of queueing a new one."""
+        with self._lock:
+            fut = self._inflight.get(key) if key is not None else None
+            if fut is not None:
+                self.coalesced += 1
+                return fut
+            fut = self._pool.submit(fn, *args)
+            self.calls += 1; self._pending += 1
+            if key is not None:
+                self._inflight[key] = fut
+        fut.add_done_callback(lambda f: self._done(key, f))
+        return fut
+
+    def _done(self, key, fut):
+        with self._lock:
+            self._pending -= 1
+            if key is not None and self._inflight.get(key) is fut: del self._inflight[key]
+
+    async def call(self, fn, *args, key=None):
+        # shield: a caller that goes away must not cancel a call others share
+        return await asyncio.shield(asyncio.wrap_future(self.submit(fn, *args, key=key)))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced,
+                "pending": self._pending, "in_flight": len(self._inflight)}
@@ -0,0 +1,186 @@
+"""
+Multi-timeframe trend bias from one base-timeframe stream.
+
+stable.pine shows the 15m / 1H / Daily trend through
+`request.security(..., calcTrendForSecurity(size), lookahead = barmerge.lookahead_off)`.
+MTFEngine does the same from the base bars alone: each timeframe has a
+Resampler that folds base bars into higher-timeframe bars and an SMCEngine
+fed only the ones that have closed. A base bar's bias row therefore holds,
+per timeframe, the trend as of the last higher-timeframe bar that had closed
+by the end of that base bar – the forming bar is never seen, so there is no
+lookahead.
+
+A higher-timeframe bar closes on the base bar that ends its interval
+(time + base timeframe reaches the interval end) or, when bars are missing,
+on the first base bar of a later interval. Intervals are aligned to the Unix
+epoch, so 1440 gives UTC days.
+"""
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnStore
+from smc_engine_v2 import SMCEngine
+
+MINUTE = np.timedelta64(60, 's').astype('m8[ns]').astype(np.int64)
+
+
+def tf_label(minutes: int) -> str:
+    if minutes % 1440 == 0: return f"{minutes // 1440}D"
+    if minutes % 60 == 0:   return f"{minutes // 60}H"
+    return f"{minutes}m"
+
+
+def _ns(T) -> np.ndarray:
+    T = np.asarray(T)
+    return T.astype('M8[ns]').view(np.int64) if T.dtype.kind == 'M' else T.astype(np.int64)
+
+
+class Resampler:
+    """Base bars folded into `minutes` bars; `base` (minutes) lets an interval
+    close on its last base bar instead of waiting for the next one."""
+    def __init__(self, minutes: int, base: int = None):
+        self.step    = minutes * MINUTE
+        self.base    = None if base is None else base * MINUTE
+        self.forming = None   # [interval start ns, open, high, low, close]
+
+    def push(self, t: int, o, h, l, c) -> list:
+        """One base bar (time in ns); the bars it closes, oldest first."""
+        b = t - t % self.step
+        f = self.forming
+        closed = []
+        if f is not None and f[0] != b:
+            closed.append(f); f = None
+        if f is None: f = [b, o, h, l, c]
+        else:         f[2] = max(f[2], h); f[3] = min(f[3], l); f[4] = c
+        if self.base is not None and t + self.base >= b + self.step:
+            closed.append(f); f = None
+        self.forming = f
+        return closed
+
+    def extend(self, T, O, H, L, C):
+        """Closed bars among these base bars: (times ns, open, high, low,
+        close, index of the base bar on which each one closed)."""
+        T = _ns(T)
+        n = len(T)
+        bucket = T - T % self.step
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        ends   = np.r_[starts[1:], n]
+        o = O[starts].astype(np.float64); c = C[ends - 1].astype(np.float64)
+        h = np.maximum.reduceat(H, starts).astype(np.float64)
+        l = np.minimum.reduceat(L, starts).astype(np.float64)
+        b = bucket[starts]
+        known = np.r_[starts[1:], n]   # first base bar of the next interval
+
+        f = self.forming
+        if f is not None:
+            if f[0] == b[0]:   # the first group continues the carried-over bar
+                o[0] = f[1]; h[0] = max(h[0], f[2]); l[0] = min(l[0], f[3])
+            else:              # carried-over bar closes on the first new base bar
+                b = np.r_[f[0], b]; o = np.r_[f[1], o]; h = np.r_[f[2], h]
+                l = np.r_[f[3], l]; c = np.r_[f[4], c]; known = np.r_[0, known]
+
+        if self.base is not None:
+            # An interval whose last base bar reaches its end is complete there
+            last = np.r_[np.full(len(b) - len(starts), -1), ends - 1]
+            full = (last >= 0) & (T[np.maximum(last, 0)] + self.base >= b + self.step)
+            known = np.where(full, last, known)
+
+        done = known < n
+        self.forming = None if done[-1] else [b[-1], o[-1], h[-1], l[-1], c[-1]]
+        return b[done], o[done], h[done], l[done], c[done], known[done]
+
+
+class MTFEngine:
+    """One SMCEngine per timeframe over a single base stream, plus a per-bar
+    bias table (see the module docstring). `timeframes` and `base` are in
+    minutes; `base` is inferred from the first bars when not given."""
+    def __init__(self, timeframes=(15, 60, 1440), base: int = None, length: int = 50, rr: float = 3.0):
+        self.timeframes = tuple(sorted(int(tf) for tf in timeframes))
+        self.base       = base
+        self.length     = length
+        self.rr         = rr
+        self.labels     = [tf_label(tf) for tf in self.timeframes]
+        self._reset()
+
+    def _reset(self):
+        self.engines   = {tf: SMCEngine(length=self.length, rr=self.rr) for tf in self.timeframes}
+        self._samplers = None
+        self._held     = None   # first bar, kept until the base timeframe is known
+        self._table    = ColumnStore([('time', 'datetime64[ns]')] + [(lb, 'i1') for lb in self.labels])
+
+    @property
+    def bar_count(self) -> int:
+        return len(self._table)
+
+    def _start(self, T):
+        if self.base is None:
+            gaps = np.diff(_ns(T)[:64])
+            gaps = gaps[gaps > 0]
+            if len(gaps) == 0: return False   # one bar so far: wait for a second
+            self.base = int(gaps.min() // MINUTE)
+        small = [tf for tf in self.timeframes if tf < self.base]
+        if small: raise ValueError(f"timeframes {small} are below the {self.base}m base")
+        self._samplers = {tf: Resampler(tf, self.base) for tf in self.timeframes}
+        return True
+
+    def update(self, df: pd.DataFrame):
+        """Full replay of `df` from a clean state."""
+        self._reset()
+        self.extend(df)
+
+    def extend(self, df: pd.DataFrame):
+        self.extend_arrays(df['time'].values, df['open'].values, df['high'].values,
+                           df['low'].values, df['close'].values)
+
+    def push_bar(self, t, o, h, l, c) -> dict:
+        """One new base bar; returns its bias row {label: trend}."""
+        if self._samplers is None:
+            self.extend_arrays(np.array([t], 'M8[ns]'), np.array([o]), np.array([h]), np.array([l]), np.array([c]))
+            return self.current()
+        t = np.datetime64(t, 'ns')
+        ns = int(t.view(np.int64))
+        row = []
+        for tf in self.timeframes:
+            engine = self.engines[tf]
+            for bar in self._samplers[tf].push(ns, float(o), float(h), float(l), float(c)):
+                engine.push_bar(np.datetime64(int(bar[0]), 'ns'), *bar[1:])
+            row.append(engine.trend)
+        self._table.append(t, *row)
+        return dict(zip(self.labels, row))
+
+    def extend_arrays(self, T, O, H, L, C):
+        """Base bars (after the ones already seen), all timeframes in one pass."""
+        T = np.asarray(T)
+        if len(T) == 0: return
+        if T.dtype.kind == 'O': T = T.astype('M8[ns]')   # Timestamps from push_bar
+        if self._held is not None:
+            T, O, H, L, C = (np.concatenate([a, np.asarray(b)]) for a, b in zip(self._held, (T, O, H, L, C)))
+            self._held = None
+        if self._samplers is None and not self._start(T):
+            self._held = (T, O, H, L, C)   # base timeframe still unknown
+            return
+
+        O, H, L, C = (np.asarray(a, dtype=np.float64) for a in (O, H, L, C))
+        cols = [T.astype('M8[ns]')]
+        for tf in self.timeframes:
+            engine = self.engines[tf]
+            before = engine.trend
+            bt, bo, bh, bl, bc, known = self._samplers[tf].extend(T, O, H, L, C)
+            trend = np.empty(len(bt), np.int8)
+            for k, (t, o, h, l, c) in enumerate(zip(bt.view('M8[ns]'), bo, bh, bl, bc)):
+                engine.push_bar(t, o, h, l, c)
+                trend[k] = engine.trend
+            # trend after the last higher-timeframe bar closed by each base bar
+            last = np.searchsorted(known, np.arange(len(T)), 'right') - 1
+            cols.append(np.where(last >= 0, trend[np.maximum(last, 0)], before) if len(trend)
+                        else np.full(len(T), before, np.int8))
+        self._table.extend(*cols)
+
+    def current(self) -> dict:
+        """Bias as of the last base bar, {label: trend}."""
+        if not len(self._table): return {lb: 0 for lb in self.labels}
+        return {lb: int(self._table[lb][-1]) for lb in self.labels}
+
+    def bias(self) -> pd.DataFrame:
+        """Bias per base bar: time plus one trend column (1 / -1 / 0) per timeframe."""
+        return pd.DataFrame({name: arr.copy() for name, arr in self._table.columns().items()})
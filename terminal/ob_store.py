@@ -0,0 +1,102 @@
+"""
+Order-block container used by SMCEngine.
+
+  • de-duplication   – dict keyed by (time, bias)
+  • active OBs       – sorted (price, seq) lists per bias, so nesting checks and
+                       "which OBs can this bar touch" are bisect lookups
+  • mitigated OBs    – dropped from the price index, kept for output only
+
+Iteration yields newest first, the order stable.pine keeps its `array.unshift`-ed
+order blocks in (and what `SMCEngine.obs` has always returned).
+"""
+from bisect import bisect_left, bisect_right, insort
+
+BULLISH = 1
+BEARISH = -1
+
+_INF = float('inf')
+
+
+class OBStore:
+    def __init__(self):
+        self._all  = []     # creation order, seq == index
+        self._keys = {}     # (time, bias) -> OB
+        # Active OBs as (price, seq), sorted by price
+        self._lows  = {BULLISH: [], BEARISH: []}
+        self._highs = {BULLISH: [], BEARISH: []}
+
+    def __len__(self):
+        return len(self._all)
+
+    def __iter__(self):
+        return reversed(self._all)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    @property
+    def active_count(self):
+        return len(self._lows[BULLISH]) + len(self._lows[BEARISH])
+
+    def active(self):
+        """(seq, OB) for every OB not yet mitigated, oldest first."""
+        seqs = sorted(s for lows in self._lows.values() for _, s in lows)
+        return [(s, self._all[s]) for s in seqs]
+
+    def snapshot(self):
+        """OB count plus the mutable fields of active OBs – mitigated OBs and
+        `is_refined` never change again, so nothing else needs copying."""
+        return len(self._all), tuple((s, ob.partial, ob.cur_h, ob.cur_l) for s, ob in self.active())
+
+    def restore(self, snap):
+        n, active = snap
+        for ob in self._all[n:]:
+            del self._keys[(ob.time, ob.bias)]
+        del self._all[n:]
+        self._lows  = {BULLISH: [], BEARISH: []}
+        self._highs = {BULLISH: [], BEARISH: []}
+        for s, partial, cur_h, cur_l in active:
+            ob = self._all[s]
+            ob.partial = partial; ob.cur_h = cur_h; ob.cur_l = cur_l; ob.mitigated = False
+            self._lows[ob.bias].append((ob.low, s))
+            self._highs[ob.bias].append((ob.high, s))
+        for lists in (self._lows, self._highs):
+            for lst in lists.values(): lst.sort()
+
+    def add(self, ob):
+        seq = len(self._all)
+        self._all.append(ob)
+        self._keys[(ob.time, ob.bias)] = ob
+        if not ob.mitigated:
+            insort(self._lows[ob.bias],  (ob.low,  seq))
+            insort(self._highs[ob.bias], (ob.high, seq))
+        return seq
+
+    def mitigate(self, seq):
+        ob = self._all[seq]
+        ob.mitigated = True
+        lows, highs = self._lows[ob.bias], self._highs[ob.bias]
+        del lows[bisect_left(lows, (ob.low, seq))]
+        del highs[bisect_left(highs, (ob.high, seq))]
+
+    def has_container(self, bias, high, low, time):
+        """Is there an active `bias` OB older than `time` whose range holds [low, high]?"""
+        lows, highs = self._lows[bias], self._highs[bias]
+        n_low  = bisect_right(lows, (low, _INF))               # ob.low  <= low
+        n_high = len(highs) - bisect_left(highs, (high, -1))   # ob.high >= high
+        # Walk whichever side of the index is shorter, check the other bound
+        if n_low <= n_high:
+            cands = (self._all[s] for _, s in lows[:n_low])
+            return any(ob.high >= high and ob.time < time for ob in cands)
+        cands = (self._all[s] for _, s in highs[len(highs) - n_high:])
+        return any(ob.low <= low and ob.time < time for ob in cands)
+
+    def touched(self, h, l, c):
+        """(seq, OB) for every active OB the bar (h, l, c) can tap or mitigate,
+        newest first. Bearish OBs need low < max(h, c); bullish high > min(l, c)."""
+        bear = self._lows[BEARISH]
+        bull = self._highs[BULLISH]
+        seqs = [s for _, s in bear[:bisect_left(bear, (max(h, c), -1))]]
+        seqs += [s for _, s in bull[bisect_right(bull, (min(l, c), _INF)):]]
+        seqs.sort(reverse=True)
+        return [(s, self._all[s]) for s in seqs]
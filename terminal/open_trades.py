@@ -0,0 +1,70 @@
+"""
+Open-trade index for SMCEngine.
+
+Open trades sit in four heaps (long TP / long SL / short TP / short SL), each
+ordered so the level nearest to being hit is on top. A bar only pops the
+trades its high/low actually crosses; closed trades are never looked at again.
+Entries closed through one heap are dropped lazily from the other.
+"""
+from heapq import heapify, heappop, heappush
+
+
+class OpenTrades:
+    def __init__(self):
+        self._long_tp  = []   # ( tp, id)  hit when high >= tp
+        self._long_sl  = []   # (-sl, id)  hit when low  <= sl
+        self._short_tp = []   # (-tp, id)  hit when low  <= tp
+        self._short_sl = []   # ( sl, id)  hit when high >= sl
+        self._open     = set()
+
+    def __len__(self):
+        return len(self._open)
+
+    def __contains__(self, tid):
+        return tid in self._open
+
+    def ids(self):
+        return sorted(self._open)
+
+    def add(self, tid, long: bool, tp, sl):
+        if long:
+            heappush(self._long_tp, (tp, tid))
+            heappush(self._long_sl, (-sl, tid))
+        else:
+            heappush(self._short_tp, (-tp, tid))
+            heappush(self._short_sl, (sl, tid))
+        self._open.add(tid)
+
+    def resolve(self, h, l):
+        """[(id, 'win' | 'loss')] for the trades this bar closes, by id.
+        TP is checked before SL, so a bar spanning both counts as a win."""
+        done  = []
+        open_ = self._open
+
+        def drain(heap, hit, result):
+            while heap and hit(heap[0][0]):
+                tid = heappop(heap)[1]
+                if tid in open_:
+                    open_.discard(tid)
+                    done.append((tid, result))
+
+        drain(self._long_tp,  lambda k: k <= h,  'win')
+        drain(self._short_tp, lambda k: -k >= l, 'win')
+        drain(self._long_sl,  lambda k: -k >= l, 'loss')
+        drain(self._short_sl, lambda k: k <= h,  'loss')
+
+        if done:
+            done.sort()
+            self._compact()
+        return done
+
+    def _compact(self):
+        # Stale entries (closed via the other heap) are only popped when price
+        # reaches them; rebuild once they outnumber the live ones.
+        size = len(self._long_tp) + len(self._long_sl) + len(self._short_tp) + len(self._short_sl)
+        if size <= 4 * len(self._open) + 64: return
+        open_ = self._open
+        for name in ('_long_tp', '_long_sl', '_short_tp', '_short_sl'):
+            heap = [e for e in getattr(self, name) if e[1] in open_]
+            heapify(heap)
+            setattr(self, name, heap)
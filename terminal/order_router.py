@@ -0,0 +1,188 @@
+"""
+Asynchronous order routing for live auto-trading.
+
+The engine's bar loop only reports a signal; `OrderRouter.submit` queues it
+and returns at once, and one background thread turns queued signals into
+`mt5.order_send` requests, so a slow broker round-trip never holds up
+signal processing.
+
+The worker
+  • caches `symbol_info` per symbol for `info_ttl` seconds,
+  • reads one `symbol_info_tick` per order (bid for shorts, ask for longs),
+  • sends at most `rate` orders a second, in bursts of up to `burst`.
+A signal is dropped at `submit` when one with the same (symbol, magic, OB
+time, direction) was already routed, so a replayed or re-fed bar can't fire
+the same order twice.
+
+`stats()` reports signal-to-send latency (time from `submit` to the
+`order_send` call: queueing, rate limiting, the tick read) and the broker
+round-trip separately.
+
+Use:  engine.on_signal = router.signal_handler("EURUSD", lot=0.1)
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+MAGIC        = 234000
+RETCODE_DONE = 10009   # mt5.TRADE_RETCODE_DONE
+SEEN_MAX     = 10_000   # routed signal keys remembered for de-duplication
+LATENCY_MAX  = 1_000    # latency samples kept for stats()
+
+
+class OrderRouter:
+    """Queue + one worker thread in front of `mt5.order_send`; `mt5` is the
+    MetaTrader5 module (or anything with its interface), imported on first
+    use when not given."""
+    def __init__(self, mt5=None, magic: int = MAGIC, deviation: int = 20, rate: float = 5.0,
+                 burst: int = 5, info_ttl: float = 60.0):
+        self._mt5      = mt5
+        self.magic     = magic
+        self.deviation = deviation
+        self.rate      = rate
+        self.burst     = burst
+        self.info_ttl  = info_ttl
+        self._queue    = queue.Queue()
+        self._seen     = OrderedDict()
+        self._info     = {}   # symbol -> (symbol_info, fetched at)
+        self._lock     = threading.Lock()
+        self._tokens   = float(burst)
+        self._refill   = time.monotonic()
+        self._thread   = None
+        self.results   = deque(maxlen=LATENCY_MAX)
+        self._wait_ms  = deque(maxlen=LATENCY_MAX)
+        self._send_ms  = deque(maxlen=LATENCY_MAX)
+        self.submitted = self.duplicates = self.sent = self.failed = 0
+
+    @property
+    def mt5(self):
+        if self._mt5 is None:
+            from data_feed import load_mt5
+            self._mt5 = load_mt5()
+        return self._mt5
+
+    # ─── SIGNALS ──────────────────────────────────────────────────────────────
+    def submit(self, symbol: str, direction: str, sl: float, tp: float, lot: float = 0.1, ob_time=None) -> bool:
+        """Queue one order ('LONG' / 'SHORT'); False when it is a duplicate."""
+        # datetime64 and Timestamp OB times (kernel vs bar loop) must match
+        key = (symbol, self.magic, None if ob_time is None else np.datetime64(ob_time, 'ns'), direction)
+        with self._lock:
+            if key in self._seen:
+                self.duplicates += 1
+                return False
+            self._seen[key] = True
+            if len(self._seen) > SEEN_MAX: self._seen.popitem(last=False)
+            self.submitted += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='order-router', daemon=True)
+                self._thread.start()
+        self._queue.put({"symbol": symbol, "dir": direction, "sl": float(sl), "tp": float(tp),
+                         "lot": float(lot), "ob_time": ob_time, "queued": time.perf_counter()})
+        return True
+
+    def signal_handler(self, symbol: str, lot: float = 0.1):
+        """Callback for `SMCEngine.on_signal` that routes every signal on `symbol`."""
+        def on_signal(t, direction, entry, sl, tp, ob):
+            self.submit(symbol, direction, sl, tp, lot, ob.time)
+        return on_signal
+
+    # ─── WORKER ───────────────────────────────────────────────────────────────
+    def _run(self):
+        while True:
+            order = self._queue.get()
+            try:
+                if order is None: return
+                self._throttle()
+                self._send(order)
+            finally:
+                self._queue.task_done()
+
+    def _throttle(self):
+        """Token bucket: `burst` orders at once, then one per 1/`rate` s."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refill) * self.rate)
+        self._refill = now
+        if self._tokens < 1:
+            time.sleep((1 - self._tokens) / self.rate)
+            self._tokens, self._refill = 1.0, time.monotonic()
+        self._tokens -= 1
+
+    def symbol_info(self, symbol: str):
+        cached = self._info.get(symbol)
+        now = time.monotonic()
+        if cached is None or now - cached[1] > self.info_ttl:
+            cached = self._info[symbol] = (self.mt5.symbol_info(symbol), now)
+        return cached[0]
+
+    def _send(self, order: dict):
+        mt5 = self.mt5
+        result = dict(symbol=order["symbol"], dir=order["dir"], ob_time=order["ob_time"])
+        info = self.symbol_info(order["symbol"]) if mt5 is not None else None
+        tick = mt5.symbol_info_tick(order["symbol"]) if info else None
+        if not tick:
+            self.failed += 1
+            self.results.append(dict(result, retcode=None, comment="no symbol info / tick"))
+            return
+        short = order["dir"] == 'SHORT'
+        request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": order["symbol"],
+            "volume": self._volume(order["lot"], info),
+            "type": mt5.ORDER_TYPE_SELL if short else mt5.ORDER_TYPE_BUY,
+            "price": tick.bid if short else tick.ask,
+            "sl": order["sl"],
+            "tp": order["tp"],
+            "deviation": self.deviation,
+            "magic": self.magic,
+            "comment": f"SMC OB {order['ob_time']}",
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        start = time.perf_counter()
+        self._wait_ms.append((start - order["queued"]) * 1e3)
+        try:
+            res = mt5.order_send(request)
+        except Exception as exc:   # a broker error must not kill the worker
+            res, comment = None, repr(exc)
+        else:
+            comment = getattr(res, 'comment', None)
+        self._send_ms.append((time.perf_counter() - start) * 1e3)
+        retcode = getattr(res, 'retcode', None)
+        ok = retcode == getattr(mt5, 'TRADE_RETCODE_DONE', RETCODE_DONE)
+        if ok: self.sent += 1
+        else:  self.failed += 1
+        self.results.append(dict(result, retcode=retcode, comment=comment, price=request["price"],
+                                 latency_ms=self._wait_ms[-1]))
+
+    @staticmethod
+    def _volume(lot: float, info) -> float:
+        """`lot` on the symbol's volume grid, within its min / max."""
+        step = getattr(info, 'volume_step', 0) or 0
+        if step: lot = round(round(lot / step) * step, 8)
+        lo, hi = getattr(info, 'volume_min', 0) or 0, getattr(info, 'volume_max', 0) or 0
+        if lo: lot = max(lot, lo)
+        if hi: lot = min(lot, hi)
+        return float(lot)
+
+    # ─── CONTROL ──────────────────────────────────────────────────────────────
+    def flush(self):
+        """Block until every queued order has been sent (or failed)."""
+        self._queue.join()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        def pct(samples):
+            if not samples: return None
+            a = np.fromiter(samples, np.float64)
+            return {"p50": float(np.percentile(a, 50)), "p99": float(np.percentile(a, 99)), "max": float(a.max())}
+        return {"submitted": self.submitted, "duplicates": self.duplicates, "sent": self.sent,
+                "failed": self.failed, "pending": self._queue.qsize(), "cached_symbols": len(self._info),
+                "signal_to_send_ms": pct(self._wait_ms), "order_send_ms": pct(self._send_ms)}
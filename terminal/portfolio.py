@@ -0,0 +1,251 @@
+"""
+SMC portfolio backtest  –  one engine per symbol, trades merged on one timeline
+===============================================================================
+Run:  python3 portfolio.py --watchlist --tf 15 --bars 5000 --length 20 --rr 3
+      python3 portfolio.py --api http://127.0.0.1:8085 --tf 15      (watchlist from /api/init)
+      python3 portfolio.py --csv mock_data_15m.csv,other.csv --risk 0.01 --trades trades.csv
+      python3 portfolio.py --symbols EURUSDm,XAUUSDm --store --tf 15   (offline, from bar_store.py)
+
+Each worker process loads one symbol's bars itself (CSV, bar store or the
+SMC_DATA_SOURCE source), runs SMCEngine over them and sends back only its
+trades – entry and exit bar, direction, levels and R result – plus a few
+per-symbol numbers. The parent never holds more than one symbol's trades per
+finished job, so memory tracks the trade count, not the bar count.
+
+A trade's exit is the bar the engine resolved it on (the `exit_bar` trade
+column); it earns +rr R on a win and -1 R on a loss. The
+portfolio equity compounds `risk` of equity per trade at each exit time.
+Exposure is the share of the timeline with at least one position open.
+"""
+import argparse
+import json
+import os
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from columnar import DIRS, RESULTS
+from smc_engine_v2 import SMCEngine
+
+WIN, LOSS, OPEN = RESULTS.index('win'), RESULTS.index('loss'), RESULTS.index('open')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# WORKER
+# ─────────────────────────────────────────────────────────────────────────────
+def _load(job):
+    """Bars for one job: ('csv', path, …), ('store', root, symbol, tf, …) or
+    ('source', spec, symbol, tf, bars)."""
+    kind, arg, symbol, tf, bars = job
+    if kind == 'csv':
+        return pd.read_csv(arg, parse_dates=['time'])
+    if kind == 'store':
+        from bar_store import BarStore, DEFAULT_ROOT
+        return BarStore(arg or DEFAULT_ROOT).read(symbol, tf)
+    from data_source import source_from_spec
+    return source_from_spec(arg).fetch(symbol, tf, count=bars)
+
+
+def backtest_symbol(name, job, length, rr) -> dict:
+    bars = _load(job)
+    T = np.asarray(bars['time']).astype('M8[ns]')
+    H = np.asarray(bars['high'], dtype=np.float64)
+    L = np.asarray(bars['low'], dtype=np.float64)
+    engine = SMCEngine(length=length, rr=rr, columnar=True)
+    engine.update_arrays(T, H, L, np.asarray(bars['close'], dtype=np.float64))
+    del bars
+
+    tr = {k: v.copy() for k, v in engine.columns().trades.columns().items()}
+    entry_idx = np.searchsorted(T, tr['time'])
+    exit_idx = tr['exit_bar']
+    closed = exit_idx >= 0
+    r = np.where(tr['result'] == WIN, rr, np.where(tr['result'] == LOSS, -1.0, 0.0))
+
+    # Bars with at least one position open (entry bar through exit bar)
+    n = len(T)
+    depth = np.zeros(n + 1, np.int64)
+    np.add.at(depth, entry_idx, 1)
+    np.add.at(depth, np.where(closed, exit_idx + 1, n), -1)
+    depth = np.cumsum(depth[:n])
+    return {
+        'symbol': name, 'bars': n,
+        'first': T[0] if n else None, 'last': T[-1] if n else None,
+        'exposure': float((depth > 0).mean()) if n else 0.0, 'max_open': int(depth.max()) if n else 0,
+        'trades': {'entry_time': tr['time'], 'exit_time': np.where(closed, T[np.maximum(exit_idx, 0)], np.datetime64('NaT')),
+                   'dir': tr['dir'], 'entry': tr['entry'], 'sl': tr['sl'], 'tp': tr['tp'],
+                   'result': tr['result'], 'r': r, 'bars_held': np.where(closed, exit_idx - entry_idx, -1)},
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PORTFOLIO
+# ─────────────────────────────────────────────────────────────────────────────
+def _drawdown(equity: np.ndarray) -> np.ndarray:
+    return equity / np.maximum.accumulate(equity) - 1 if len(equity) else equity
+
+
+def symbol_stats(res: dict) -> dict:
+    t = res['trades']
+    wins, losses = int((t['result'] == WIN).sum()), int((t['result'] == LOSS).sum())
+    closed = wins + losses
+    order = np.argsort(t['exit_time'][t['result'] != OPEN], kind='stable')
+    curve = np.cumsum(t['r'][t['result'] != OPEN][order])
+    return {
+        'symbol':      res['symbol'],
+        'bars':        res['bars'],
+        'trades':      len(t['r']),
+        'wins':        wins,
+        'losses':      losses,
+        'open':        len(t['r']) - closed,
+        'win_rate':    wins / closed * 100 if closed else 0.0,
+        'pnl_r':       float(curve[-1]) if closed else 0.0,
+        'avg_r':       float(curve[-1]) / closed if closed else 0.0,
+        'max_dd_r':    float((np.maximum.accumulate(np.r_[0.0, curve]) - np.r_[0.0, curve]).max()),
+        'exposure':    res['exposure'] * 100,
+        'max_open':    res['max_open'],
+    }
+
+
+def timeline(trades: pd.DataFrame, risk: float, capital: float) -> pd.DataFrame:
+    """Equity after every exit, oldest first: R total, compounded equity,
+    drawdown and positions still open at that moment."""
+    closed = trades[trades['result'] != 'open'].sort_values('exit_time', kind='stable')
+    eq = capital * np.cumprod(1 + risk * closed['r'].values)
+    entries = np.sort(trades['entry_time'].values)
+    exits = np.sort(closed['exit_time'].values)
+    t = closed['exit_time'].values
+    open_now = np.searchsorted(entries, t, 'right') - np.searchsorted(exits, t, 'right')
+    return pd.DataFrame({'time': t, 'symbol': closed['symbol'].values, 'r': closed['r'].values,
+                         'equity_r': np.cumsum(closed['r'].values), 'equity': eq,
+                         'drawdown': _drawdown(eq), 'open_positions': open_now})
+
+
+def exposure(trades: pd.DataFrame, start, end) -> dict:
+    """Share of [start, end] with any position open, time-weighted average of
+    open positions, and the most open at once."""
+    if trades.empty or start is None: return {'exposure': 0.0, 'avg_open': 0.0, 'max_open': 0}
+    entry = trades['entry_time'].values
+    exit_ = trades['exit_time'].fillna(pd.Timestamp(end)).values
+    times = np.concatenate([entry, exit_])
+    delta = np.r_[np.ones(len(entry), np.int64), -np.ones(len(exit_), np.int64)]
+    order = np.lexsort((delta, times))           # exits before entries at the same instant
+    times, depth = times[order], np.cumsum(delta[order])
+    span = (np.datetime64(end, 'ns') - np.datetime64(start, 'ns')).astype(np.float64)
+    dt = np.diff(np.r_[times, np.datetime64(end, 'ns')]).astype(np.float64)
+    return {'exposure': float(dt[depth > 0].sum() / span * 100) if span else 0.0,
+            'avg_open': float((dt * depth).sum() / span) if span else 0.0,
+            'max_open': int(depth.max())}
+
+
+def run_portfolio(jobs: dict, length: int = 20, rr: float = 3.0, risk: float = 0.01, capital: float = 10_000.0,
+                  workers: int = None, progress=None) -> dict:
+    """
+    jobs : name -> ('csv', path, …) / ('store', root, symbol, tf, …) / ('source', spec, symbol, tf, bars)
+    Returns {'trades', 'equity', 'symbols'} DataFrames and a 'summary' dict.
+    `progress(stats)` is called as each symbol finishes.
+    """
+    frames, stats = [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(backtest_symbol, name, job, length, rr) for name, job in jobs.items()]
+        for fut in as_completed(futures):
+            res = fut.result()
+            stats.append(dict(symbol_stats(res), first=res['first'], last=res['last']))
+            t = res['trades']
+            frames.append(pd.DataFrame(dict(t, symbol=res['symbol'],
+                                            dir=np.asarray(DIRS, dtype=object)[t['dir']],
+                                            result=np.asarray(RESULTS, dtype=object)[t['result']])))
+            if progress: progress(stats[-1])
+
+    cols = ['symbol', 'entry_time', 'exit_time', 'dir', 'entry', 'sl', 'tp', 'result', 'r', 'bars_held']
+    trades = pd.concat(frames, ignore_index=True)[cols] if frames else pd.DataFrame(columns=cols)
+    trades = trades.sort_values(['entry_time', 'symbol'], kind='stable').reset_index(drop=True)
+    equity = timeline(trades, risk, capital)
+    symbols = pd.DataFrame(stats).sort_values('pnl_r', ascending=False).reset_index(drop=True) if stats else pd.DataFrame()
+
+    starts = [s['first'] for s in stats if s['first'] is not None]
+    ends = [s['last'] for s in stats if s['last'] is not None]
+    start, end = (pd.Timestamp(min(starts)), pd.Timestamp(max(ends))) if starts else (None, None)
+    wins, losses = int((trades['result'] == 'win').sum()), int((trades['result'] == 'loss').sum())
+    summary = {
+        'symbols': len(stats), 'start': start, 'end': end, 'trades': len(trades),
+        'wins': wins, 'losses': losses, 'open': len(trades) - wins - losses,
+        'win_rate': wins / (wins + losses) * 100 if wins + losses else 0.0,
+        'pnl_r': float(equity['equity_r'].iloc[-1]) if len(equity) else 0.0,
+        'final_equity': float(equity['equity'].iloc[-1]) if len(equity) else capital,
+        'return_pct': (float(equity['equity'].iloc[-1]) / capital - 1) * 100 if len(equity) else 0.0,
+        'max_drawdown_pct': float(-equity['drawdown'].min()) * 100 if len(equity) else 0.0,
+        **exposure(trades, start, end),
+    }
+    return {'trades': trades, 'equity': equity, 'symbols': symbols.drop(columns=['first', 'last'], errors='ignore'),
+            'summary': summary}
+
+
+def api_watchlist(url: str) -> list:
+    """Watchlist the running API server reports at /api/init."""
+    with urllib.request.urlopen(url.rstrip('/') + '/api/init', timeout=10) as resp:
+        return json.load(resp).get('watchlist') or []
+
+
+def make_jobs(csv_files=(), symbols=(), tf: int = 15, bars: int = 5000, store=None, source=None) -> dict:
+    jobs = {}
+    for path in csv_files:
+        jobs[os.path.splitext(os.path.basename(path))[0]] = ('csv', path, None, tf, bars)
+    for sym in symbols:
+        jobs[sym] = ('store', store, sym, tf, bars) if store is not None else ('source', source, sym, tf, bars)
+    return jobs
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Portfolio backtest of SMCEngine over symbols and CSV files")
+    ap.add_argument('--csv', default='', help="comma-separated CSV files (time,open,high,low,close)")
+    ap.add_argument('--symbols', default='', help="comma-separated symbols")
+    ap.add_argument('--watchlist', action='store_true', help="add the data source's watchlist (as /api/init lists it)")
+    ap.add_argument('--api', default=None, metavar='URL', help="add the watchlist from a running server's /api/init")
+    ap.add_argument('--source', default=None, help="data source spec (default: SMC_DATA_SOURCE or mt5)")
+    ap.add_argument('--store', nargs='?', const='', default=None, metavar='ROOT',
+                    help="read symbols from the local bar store instead of the data source")
+    ap.add_argument('--tf', type=int, default=15, help="timeframe in minutes")
+    ap.add_argument('--bars', type=int, default=5000, help="bars to fetch per symbol")
+    ap.add_argument('--length', type=int, default=20)
+    ap.add_argument('--rr', type=float, default=3.0)
+    ap.add_argument('--risk', type=float, default=0.01, help="fraction of equity risked per trade")
+    ap.add_argument('--capital', type=float, default=10_000.0)
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--trades', default=None, help="write the merged trade list to this CSV")
+    ap.add_argument('--equity', default=None, help="write the equity curve to this CSV")
+    args = ap.parse_args(argv)
+
+    symbols = [s for s in args.symbols.split(',') if s]
+    if args.watchlist:
+        from data_source import source_from_spec, DEFAULT_WATCHLIST
+        symbols += source_from_spec(args.source).symbols() or DEFAULT_WATCHLIST
+    if args.api:
+        symbols += api_watchlist(args.api)
+    jobs = make_jobs([p for p in args.csv.split(',') if p], list(dict.fromkeys(symbols)),
+                     args.tf, args.bars, args.store, args.source)
+    if not jobs:
+        ap.error("give --csv files, --symbols, --watchlist or --api")
+
+    fmt = lambda v: f"{v:.2f}"
+    out = run_portfolio(jobs, args.length, args.rr, args.risk, args.capital, args.workers,
+                        progress=lambda s: print(f"  {s['symbol']:<16} {s['trades']:>5} trades  "
+                                                 f"{s['pnl_r']:>+8.1f} R", flush=True))
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        print("\n" + out['symbols'].to_string(index=False, float_format=fmt))
+    s = out['summary']
+    print(f"\n{s['symbols']} symbols  {s['start']} → {s['end']}")
+    print(f"trades {s['trades']} (win {s['wins']} / loss {s['losses']} / open {s['open']})  "
+          f"win rate {s['win_rate']:.1f}%  P&L {s['pnl_r']:+.1f} R")
+    print(f"equity {args.capital:,.0f} → {s['final_equity']:,.0f} ({s['return_pct']:+.1f}% at {args.risk:.1%} risk)  "
+          f"max drawdown {s['max_drawdown_pct']:.1f}%")
+    print(f"exposure {s['exposure']:.1f}% of the time  avg open {s['avg_open']:.2f}  max open {s['max_open']}")
+    if args.trades:
+        out['trades'].to_csv(args.trades, index=False); print(f"{len(out['trades'])} trades → {args.trades}")
+    if args.equity:
+        out['equity'].to_csv(args.equity, index=False); print(f"{len(out['equity'])} equity points → {args.equity}")
+
+
+if __name__ == '__main__':
+    main()
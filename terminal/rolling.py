@@ -0,0 +1,85 @@
+"""
+Sliding-window extrema for pivot (leg) detection.
+
+  • SlidingExtrema  – monotonic deques, O(1) amortized per bar (incremental path)
+  • rolling_max/min – van Herk / Gil-Werman block scans, O(n) NumPy (batch path)
+  • leg_series      – whole-array equivalent of stable.pine `leg()`
+"""
+from collections import deque
+
+import numpy as np
+
+
+class SlidingExtrema:
+    """Max of highs / min of lows over the last `size` pushed bars."""
+    __slots__ = ('size', '_n', '_hi', '_lo')
+
+    def __init__(self, size: int):
+        self.size = size
+        self._n   = 0
+        self._hi  = deque()   # (index, high), highs strictly decreasing
+        self._lo  = deque()   # (index, low),  lows strictly increasing
+
+    def push(self, h, l):
+        n = self._n; self._n = n + 1
+        expired = n - self.size
+
+        hi = self._hi
+        while hi and hi[-1][1] <= h: hi.pop()
+        hi.append((n, h))
+        if hi[0][0] <= expired: hi.popleft()
+
+        lo = self._lo
+        while lo and lo[-1][1] >= l: lo.pop()
+        lo.append((n, l))
+        if lo[0][0] <= expired: lo.popleft()
+
+    def clear(self):
+        self._n = 0; self._hi.clear(); self._lo.clear()
+
+    @property
+    def max(self): return self._hi[0][1]
+
+    @property
+    def min(self): return self._lo[0][1]
+
+
+def rolling_max(a, size: int) -> np.ndarray:
+    """out[i] = a[i-size+1 : i+1].max() for i >= size-1, NaN before."""
+    a   = np.asarray(a, dtype=np.float64)
+    n   = len(a)
+    out = np.full(n, np.nan)
+    if size <= 0 or n < size: return out
+
+    pad    = (-n) % size
+    blocks = np.concatenate([a, np.full(pad, -np.inf)]).reshape(-1, size)
+    fwd    = np.maximum.accumulate(blocks, axis=1).ravel()                 # block start → i
+    bwd    = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()  # j → block end
+
+    i = np.arange(size - 1, n)
+    out[size - 1:] = np.maximum(bwd[i - size + 1], fwd[i])
+    return out
+
+
+def rolling_min(a, size: int) -> np.ndarray:
+    """out[i] = a[i-size+1 : i+1].min() for i >= size-1, NaN before."""
+    return -rolling_max(-np.asarray(a, dtype=np.float64), size)
+
+
+def leg_series(H, L, size: int) -> np.ndarray:
+    """
+    Mirrors Pine Script for every bar at once:
+      if high[size] > ta.highest(size) => 0 (Bearish leg starts / High found)
+      if low[size]  < ta.lowest(size)  => 1 (Bullish leg starts / Low found)
+    else -1. `ta.highest(size)` at bar `idx` looks at H[idx-size+1 : idx+1].
+    """
+    H = np.asarray(H, dtype=np.float64)
+    L = np.asarray(L, dtype=np.float64)
+    n = len(H)
+    legs = np.full(n, -1, dtype=np.int8)
+    if size <= 0 or n <= size: return legs
+
+    bear = H[:-size] > rolling_max(H, size)[size:]
+    bull = L[:-size] < rolling_min(L, size)[size:]
+    legs[size:] = np.where(bear, 0, np.where(bull, 1, -1))
+    return legs
@@ -0,0 +1,127 @@
+"""
+Column-wise response building for the API server.
+
+Bar windows and SMCEngine(columnar=True) result tables are turned into JSON-
+ready lists one column at a time: time columns become epoch seconds in a
+single vectorized cast, value columns go through `tolist()` (native Python
+floats / bools / ints), and row dicts – when the client wants rows – are
+zipped together at the end. Nothing is parsed or type-probed per value.
+
+Every builder returns a dict of equal-length column lists; `rows()` turns it
+into the row-per-record format the frontend reads, and the server returns
+the dict as-is for `format=columns`.
+"""
+import numpy as np
+import pandas as pd
+
+from columnar import KINDS, DIRS, RESULTS
+
+try:
+    import orjson
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    import json
+    def dumps(obj) -> str:
+        return json.dumps(obj, separators=(',', ':'))
+
+BULLISH = 1
+BEARISH = -1
+
+_KINDS   = np.array(KINDS, dtype=object)
+_DIRS    = np.array(DIRS, dtype=object)
+_RESULTS = np.array(RESULTS, dtype=object)
+
+
+def epoch_seconds(values) -> np.ndarray:
+    """int64 epoch seconds for a column of datetimes, date strings or numbers.
+    Numbers above 1e11 are taken as epoch nanoseconds, smaller ones as seconds."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == 'M':
+        return arr.astype('datetime64[s]').astype(np.int64)
+    if arr.dtype.kind in 'iuf':
+        num = arr.astype(np.int64)
+        return np.where(num > 10**11, num // 10**9, num)
+    stamps = pd.to_datetime(pd.Series(arr), utc=True).dt.tz_localize(None)
+    return stamps.to_numpy('datetime64[s]').astype(np.int64)
+
+
+def epoch_second(value):
+    """Scalar form of `epoch_seconds`; None stays None."""
+    if value is None or value is pd.NaT: return None
+    return int(epoch_seconds([value])[0])
+
+
+def rows(columns: dict) -> list:
+    """Row dicts from a dict of equal-length column lists."""
+    names = tuple(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def _bias(codes) -> list:
+    return np.where(codes == BULLISH, 'bullish', 'bearish').tolist()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# BARS
+# ─────────────────────────────────────────────────────────────────────────────
+def candle_columns(df: pd.DataFrame) -> dict:
+    out = {'time': epoch_seconds(df['time'].to_numpy()).tolist()}
+    for name in ('open', 'high', 'low', 'close'):
+        out[name] = df[name].to_numpy(np.float64).tolist()
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ENGINE RESULTS  (SMCEngine(columnar=True).columns())
+# ─────────────────────────────────────────────────────────────────────────────
+def _take(cols: dict, idx) -> dict:
+    return cols if idx is None else {name: arr[idx] for name, arr in cols.items()}
+
+
+def ob_columns(tables, idx=None) -> dict:
+    """Order blocks newest first, the same order as `SMCEngine.obs`; `idx`
+    selects rows (OB seqs) instead."""
+    c = _take(tables.obs.columns(), slice(None, None, -1) if idx is None else idx)
+    return {
+        'time':       epoch_seconds(c['time']).tolist(),
+        'high':       c['high'].tolist(),
+        'low':        c['low'].tolist(),
+        'bias':       _bias(c['bias']),
+        'partial':    c['partial'].tolist(),
+        'cur_h':      c['cur_h'].tolist(),
+        'cur_l':      c['cur_l'].tolist(),
+        'mitigated':  c['mitigated'].tolist(),
+        'is_refined': c['is_refined'].tolist(),
+    }
+
+
+def structure_columns(tables, idx=None) -> dict:
+    c = _take(tables.structure.columns(), idx)
+    return {
+        'time':      epoch_seconds(c['time']).tolist(),
+        'level':     c['level'].tolist(),
+        'kind':      _KINDS[c['kind']].tolist(),
+        'direction': _bias(c['direction']),
+    }
+
+
+def trade_columns(tables, n_targets: int = 0, idx=None) -> dict:
+    """Trades oldest first (or the rows in `idx`); with `n_targets` RR targets
+    each trade also gets its per-target `tps` / `results` lists."""
+    c = _take(tables.trades.columns(), idx)
+    out = {
+        'time':   epoch_seconds(c['time']).tolist(),
+        'dir':    _DIRS[c['dir']].tolist(),
+        'entry':  c['entry'].tolist(),
+        'sl':     c['sl'].tolist(),
+        'tp':     c['tp'].tolist(),
+        'result': _RESULTS[c['result']].tolist(),
+    }
+    if n_targets:
+        tgt = tables.targets.columns()
+        tps = _take({'tp': tgt['tp'].reshape(-1, n_targets),
+                     'result': tgt['result'].reshape(-1, n_targets)}, idx)
+        out['tps']     = tps['tp'].tolist()
+        out['results'] = _RESULTS[tps['result']].tolist()
+    return out
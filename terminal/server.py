@@ -1,53 +1,100 @@
 import fastapi
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import uvicorn
 import pandas as pd
 import numpy as np
-import MetaTrader5 as mt5
 from typing import Dict, List, Optional
 from datetime import datetime
 from contextlib import asynccontextmanager
 import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 # Import the extracted engine
 from smc_engine_v2 import SMCEngine, BULLISH, BEARISH
-from data_feed import fetch_mt5_data
-import numpy as np
+from data_source import source_from_spec, DEFAULT_WATCHLIST
+from analysis_cache import LRUCache, AnalysisCache, data_version
+from stream import StreamHub
+from mt5_worker import MT5Worker
+from mtf import MTFEngine
+from serialize import (dumps, epoch_second, epoch_seconds, rows, candle_columns, ob_columns,
+                       structure_columns, trade_columns)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with serialize.dumps (orjson when installed)."""
+    def render(self, content) -> bytes:
+        return dumps(content).encode()
+
+# Bars come from SMC_DATA_SOURCE (default: MT5 with a synthetic fallback; see
+# data_source.py). Every data-source call runs on the MT5 worker thread; engine
+# replays and response building run on ENGINE_POOL, so neither blocks the loop.
+SOURCE = source_from_spec()
+MT5 = MT5Worker()
+ENGINE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="engine")
+
+def run_engine(fn, *args):
+    return asyncio.get_running_loop().run_in_executor(ENGINE_POOL, fn, *args)
+
+# Fetched bar windows are reused for a few seconds; engine state per
+# (symbol, tf, length, rr, rr_targets) lives until idle for `ttl`.
+BAR_CACHE = LRUCache(maxsize=32, ttl=5.0)
+ANALYSIS_CACHE = AnalysisCache(maxsize=64, ttl=900.0)
+
+def fetch_bars(symbol: str, timeframe: int, count: int) -> pd.DataFrame:
+    """Newest `count` bars for (symbol, timeframe) straight from the source."""
+    return SOURCE.fetch(symbol, timeframe, count=count)
+
+async def read_bars(symbol: str, timeframe: int, count: int) -> pd.DataFrame:
+    """`fetch_bars` on the MT5 thread; concurrent identical reads share one call."""
+    return await MT5.call(fetch_bars, symbol, timeframe, count, key=(symbol, timeframe, count))
+
+async def load_bars(symbol: str, timeframe: int, count: int) -> pd.DataFrame:
+    """Bars for (symbol, timeframe), served from BAR_CACHE while fresh."""
+    key = (symbol, timeframe, count)
+    df = BAR_CACHE.get(key)
+    if df is None:
+        df = await read_bars(symbol, timeframe, count)
+        BAR_CACHE.put(key, df)
+    return df
+
+# Live streams: one poll per (symbol, tf), one engine per (symbol, tf, length, rr)
+STREAM_HUB = StreamHub(read_bars, interval=1.0, pool=ENGINE_POOL)
+
+def terminal_info() -> dict:
+    """Account and watchlist for /api/init (runs on the MT5 thread)."""
+    account = SOURCE.account()
+    watchlist = SOURCE.symbols()
+    if account is None:
+        return {
+            "status": "error", 
+            "message": f"MT5 not connected. Error: {SOURCE.error}",
+            "account": None,
+            "watchlist": watchlist or DEFAULT_WATCHLIST
+        }
+    return {"account": account, "watchlist": watchlist}
 
-def to_seconds(val):
-    if val is None: return None
-    try:
-        # Handle datetime objects
-        if hasattr(val, 'timestamp'):
-            return int(val.timestamp())
-        # Handle pandas/numpy timestamps
-        if isinstance(val, (np.datetime64, pd.Timestamp)):
-            return int(pd.to_datetime(val).timestamp())
-        # Handle strings
-        if isinstance(val, str):
-            return int(pd.to_datetime(val).timestamp())
-        # Handle numbers (assume seconds if small, nanoseconds if huge)
-        num = int(val)
-        if num > 10**11: # Likely nanoseconds or milliseconds
-            return int(pd.to_datetime(num).timestamp())
-        return num
-    except:
-        return None
+def connect() -> bool:
+    if not SOURCE.connect():
+        print("MT5 initialization failed: ", SOURCE.error)
+        return False
+    print(f"Data source '{SOURCE.name}' connected for API")
+    return True
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Initialize MT5
-    if not mt5.initialize():
-        print("MT5 initialization failed: ", mt5.last_error())
-    else:
-        print("MT5 connected for API")
+    await MT5.call(connect)
     yield
     # Shutdown: Clean up
-    mt5.shutdown()
+    await MT5.call(SOURCE.close)
+    MT5.shutdown()
+    ENGINE_POOL.shutdown(wait=False)
     print("MT5 connection closed")
 
-app = FastAPI(title="SMC Terminal API", lifespan=lifespan)
+app = FastAPI(title="SMC Terminal API", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -59,62 +106,15 @@ app.add_middleware(
 
 @app.get("/api/init")
 async def get_init():
-    if not mt5.initialize():
-        return {
-            "status": "error", 
-            "message": f"MT5 not connected. Error: {mt5.last_error()}",
-            "account": None,
-            "watchlist": ["BTCUSDm", "EURUSDm", "XAUUSDm"]
-        }
-    
-    acc = mt5.account_info()
-    symbols = mt5.symbols_get()
-    watchlist = []
-    if symbols:
-        watchlist = [s.name for s in symbols if s.visible]
-        if not watchlist:
-            watchlist = [s.name for s in symbols[:50]]
-
-    return {
-        "account": {
-            "name": str(getattr(acc, "name", "N/A")),
-            "server": str(getattr(acc, "server", "N/A")),
-            "balance": float(getattr(acc, "balance", 0.0)),
-            "equity": float(getattr(acc, "equity", 0.0)),
-            "currency": str(getattr(acc, "currency", "USD")),
-            "trade_mode": int(getattr(acc, "trade_mode", 0)), 
-        },
-        "watchlist": watchlist
-    }
+    return await MT5.call(terminal_info)
 
 @app.get("/api/history")
-async def get_history(symbol: str = "EURUSD", timeframe: int = 15, count: int = 2000):
-    tf_map = {1: mt5.TIMEFRAME_M1, 5: mt5.TIMEFRAME_M5, 15: mt5.TIMEFRAME_M15, 60: mt5.TIMEFRAME_H1, 240: mt5.TIMEFRAME_H4}
-    mt5_tf = tf_map.get(timeframe, mt5.TIMEFRAME_M15)
-    
-    df = fetch_mt5_data(symbol, mt5_tf, count)
-    if df.empty:
-        # Smart synthetic fallback
-        start_px = 1.10
-        s_upper = symbol.upper()
-        if "BTC" in s_upper: start_px = 65000.0
-        elif "ETH" in s_upper: start_px = 2500.0
-        elif "BCH" in s_upper: start_px = 520.0
-        elif "XAU" in s_upper or "GOLD" in s_upper: start_px = 2300.0
-        
-        from data_feed import generate_data
-        df = generate_data(count, start_price=start_px)
-    
-    candles = []
-    for _, row in df.iterrows():
-        candles.append({
-            "time": to_seconds(row['time']),
-            "open": float(row['open']),
-            "high": float(row['high']),
-            "low": float(row['low']),
-            "close": float(row['close'])
-        })
-    return {"candles": candles}
+async def get_history(symbol: str = "EURUSD", timeframe: int = 15, count: int = 2000,
+                      format: str = "rows"):
+    df = await load_bars(symbol, timeframe, count)
+    candles = candle_columns(df)
+    # format=columns: {"time": [...], "open": [...], ...} instead of one object per bar
+    return {"candles": candles if format == "columns" else rows(candles)}
 
 @app.post("/api/engine/analyze")
 async def analyze_data(payload: Dict):
@@ -122,83 +122,99 @@ async def analyze_data(payload: Dict):
     tf = payload.get("timeframe", 15)
     current_idx = payload.get("currentIndex", 200)
     rr = payload.get("rr", 3.0)
+    # Optional list of RR values evaluated in the same engine pass
+    rr_targets = payload.get("rr_targets") or []
+    columnar = payload.get("format") == "columns"
 
-    tf_map = {1: mt5.TIMEFRAME_M1, 5: mt5.TIMEFRAME_M5, 15: mt5.TIMEFRAME_M15, 60: mt5.TIMEFRAME_H1, 240: mt5.TIMEFRAME_H4}
-    mt5_tf = tf_map.get(tf, mt5.TIMEFRAME_M15)
-
-    # Estimate a starting price for synthetic fallback based on common symbols
-    # EURUSD ~1.1, BTC ~60k, ETH ~2500, BCH ~500, Gold ~2000
-    start_px = 1.10
-    s_upper = symbol.upper()
-    if "BTC" in s_upper: start_px = 65000.0
-    elif "ETH" in s_upper: start_px = 2500.0
-    elif "BCH" in s_upper: start_px = 520.0
-    elif "XAU" in s_upper or "GOLD" in s_upper: start_px = 2300.0
-    elif "USD" in s_upper: start_px = 1.10
-
-    df = fetch_mt5_data(symbol, mt5_tf, 2000)
-    if df.empty:
-        # If fetch fails, try to get at least something that isn't hardcoded to EURUSD price
-        from data_feed import generate_data
-        df = generate_data(2000, start_price=start_px)
+    df = await load_bars(symbol, tf, 2000)
 
     # The engine needs a rolling window or the full history up to now to detect structure
     length = payload.get("length", 20)
     
-    # Slice data to the current "visible" range (for bar replay support)
-    visible_df = df.iloc[:current_idx] if current_idx < len(df) else df
-    
-    # Run engine (matches "stable" config with length=20 by default)
-    engine = SMCEngine(length=length, rr=rr) 
-    engine.update(visible_df)
-
-    obs_data = []
-    for ob in engine.obs:
-        obs_data.append({
-            "time": to_seconds(ob.time),
-            "high": float(ob.high),
-            "low": float(ob.low),
-            "bias": "bullish" if ob.bias == BULLISH else "bearish",
-            "partial": bool(ob.partial),
-            "cur_h": float(ob.cur_h),
-            "cur_l": float(ob.cur_l),
-            "mitigated": bool(ob.mitigated),
-            "is_refined": bool(ob.is_refined)
-        })
-
-    struc_data = []
-    for ev in engine.structure:
-        struc_data.append({
-            "time": to_seconds(ev.time),
-            "level": float(ev.level),
-            "kind": str(ev.kind),
-            "direction": "bullish" if ev.direction == BULLISH else "bearish"
-        })
-
-    processed_trades = []
-    for tr in engine.trades:
-        processed_trades.append({
-            "time": to_seconds(tr['time']),
-            "dir": str(tr['dir']),
-            "entry": float(tr['entry']),
-            "sl": float(tr['sl']),
-            "tp": float(tr['tp']),
-            "result": str(tr['result'])
-        })
-
-    return {
-        "status": "success",
-        "trend": "bullish" if engine.trend == BULLISH else "bearish" if engine.trend == BEARISH else "neutral",
-        "obs": obs_data,
-        "structure": struc_data,
-        "trades": processed_trades,
-        "trails": {
-            "top": float(engine.trail_top) if engine.trail_top is not None else None,
-            "top_time": to_seconds(engine.trail_top_time),
-            "bottom": float(engine.trail_bottom) if engine.trail_bottom is not None else None,
-            "bottom_time": to_seconds(engine.trail_bot_time),
+    # Slice data to the current "visible" range (for bar replay support); a
+    # replay step forward extends the cached engine by the new bars only
+    upto = min(current_idx, len(df))
+    key = (symbol, tf, length, rr, tuple(rr_targets))
+    factory = lambda: SMCEngine(length=length, rr=rr, rr_targets=rr_targets, columnar=True)
+    return await run_engine(analysis_payload, key, df, upto, factory, len(rr_targets), columnar)
+
+def analysis_payload(key, df, upto, factory, n_targets, columnar) -> dict:
+    with ANALYSIS_CACHE.engine_for(key, df, data_version(df), upto, factory) as engine:
+        # Responses are built straight from the engine's column tables
+        tables = engine.columns()
+        obs_data   = ob_columns(tables)
+        struc_data = structure_columns(tables)
+        trade_data = trade_columns(tables, n_targets)
+        if not columnar:
+            obs_data, struc_data, trade_data = rows(obs_data), rows(struc_data), rows(trade_data)
+
+        return {
+            "status": "success",
+            "trend": "bullish" if engine.trend == BULLISH else "bearish" if engine.trend == BEARISH else "neutral",
+            "obs": obs_data,
+            "structure": struc_data,
+            "trades": trade_data,
+            "rr_comparison": engine.rr_summary() if n_targets else [],
+            # running figures, O(1) whatever the number of trades
+            "stats": engine.stats.summary(float(df['close'].iloc[upto - 1]) if upto else None),
+            "trails": {
+                "top": float(engine.trail_top) if engine.trail_top is not None else None,
+                "top_time": epoch_second(engine.trail_top_time),
+                "bottom": float(engine.trail_bottom) if engine.trail_bottom is not None else None,
+                "bottom_time": epoch_second(engine.trail_bot_time),
+            }
         }
-    }
+
+@app.get("/api/engine/mtf")
+async def mtf_bias(symbol: str = "EURUSD", timeframe: int = 15, count: int = 2000,
+                   timeframes: str = "15,60,1440", length: int = 50, format: str = "rows"):
+    """Trend per higher timeframe for every bar, all resampled from the one
+    `timeframe` series (see mtf.py) – nothing else is fetched."""
+    tfs = [int(tf) for tf in timeframes.split(',') if tf]
+    if any(tf < timeframe for tf in tfs):
+        raise HTTPException(status_code=400, detail="timeframes must not be below the base timeframe")
+    df = await load_bars(symbol, timeframe, count)
+    return await run_engine(mtf_payload, df, timeframe, tfs, length, format == "columns")
+
+def mtf_payload(df, timeframe, tfs, length, columnar) -> dict:
+    engine = MTFEngine(tfs, base=timeframe, length=length)
+    engine.update(df)
+    table = engine.bias()
+    cols = {"time": epoch_seconds(table["time"].values).tolist(),
+            **{label: table[label].tolist() for label in engine.labels}}
+    return {"timeframes": engine.labels, "current": engine.current(),
+            "bias": cols if columnar else rows(cols)}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return {"bars": BAR_CACHE.stats(), "analysis": ANALYSIS_CACHE.stats(),
+            "streams": STREAM_HUB.stats(), "mt5": MT5.stats()}
+
+async def _until_closed(ws: WebSocket):
+    try:
+        while True:
+            await ws.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+@app.websocket("/ws/stream")
+async def stream(ws: WebSocket, symbol: str = "EURUSD", tf: int = 15, length: int = 20, rr: float = 3.0):
+    """Snapshot, then deltas as bars arrive (see stream.py for the messages)."""
+    await ws.accept()
+    closed = asyncio.create_task(_until_closed(ws))
+    try:
+        async with STREAM_HUB.subscribe(symbol, tf, length, rr) as queue:
+            while True:
+                msg = asyncio.create_task(queue.get())
+                await asyncio.wait({msg, closed}, return_when=asyncio.FIRST_COMPLETED)
+                if not msg.done():
+                    msg.cancel()
+                    break
+                await ws.send_text(msg.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        closed.cancel()
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8085)
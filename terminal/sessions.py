@@ -0,0 +1,116 @@
+"""
+Per-session replay state for the Dash app.
+
+Each browser page load gets a session id (a `dcc.Store` filled in by the
+layout function) and `SessionRegistry` maps it to a `ReplaySession`: the
+bar window being replayed, its incremental SMCEngine + Checkpoints, and the
+FigureSync that knows what that page's chart holds. Tabs no longer share one
+engine, and replays on one server run side by side.
+
+Memory is bounded on both axes: the registry keeps at most `maxsize`
+sessions and drops ones idle for `ttl` seconds (least recently used first),
+and a session keeps at most `max_bars` bars, `max_snapshots` checkpoints
+and a capped candle window in the browser. Sessions live in this process –
+several workers need sticky sessions.
+"""
+import threading
+
+from analysis_cache import LRUCache
+from checkpoints import Checkpoints
+from figure_patch import FigureSync
+from smc_engine_v2 import SMCEngine
+
+MAX_SESSIONS  = 64
+SESSION_TTL   = 3600     # seconds idle before a session is dropped
+MAX_BARS      = 5000     # bars a session replays over
+MAX_SNAPSHOTS = 16
+
+
+class ReplaySession:
+    """One page's bar replay: `data[:idx]` is on screen and in the engine
+    (live mode replaces `visible` with the newest fetched bars)."""
+    def __init__(self, data, prime: int, visible: int, length: int = 50, rr: float = 3.0,
+                 max_bars: int = MAX_BARS, max_snapshots: int = MAX_SNAPSHOTS):
+        self.prime         = prime
+        self.length        = length
+        self.max_bars      = max_bars
+        self.max_snapshots = max_snapshots
+        self.lock          = threading.Lock()   # one callback per session at a time
+        self.chart         = FigureSync(max_candles=visible * 3)
+        self.load(data, rr)
+
+    def load(self, data, rr: float, on_signal=None):
+        """Start over on `data`; signals from bars after the first `prime`
+        go to `on_signal` (past bars never trade)."""
+        self.data      = data.iloc[-self.max_bars:]
+        self.idx       = self.prime
+        self.visible   = self.data.iloc[:self.prime]
+        self.on_signal = on_signal
+        self.engine    = SMCEngine(length=self.length, rr=rr)
+        self.engine.on_signal = self._signal
+        self.replay    = Checkpoints(self.engine, every=50, max_snapshots=self.max_snapshots)
+        self._traded   = None    # newest bar time whose signals are spent
+        self._run(self.replay.seek, self.data, self.prime, full=True)
+        self.chart.reset()
+
+    def step(self, advance: int, rr: float):
+        """Move the replay `advance` bars (negative: back)."""
+        self.idx = max(self.prime, min(self.idx + advance, len(self.data)))
+        self.visible = self.data.iloc[:self.idx]
+        if rr != self.engine.rr:
+            self._run(self.engine.update, self.visible, rr=rr, full=True)   # RR changed – re-price all TPs
+            self.replay.clear()
+        else:
+            # Forward: only the new bars; back: nearest checkpoint + the gap
+            self._run(self.replay.seek, self.data, self.idx)
+
+    def live(self, new_df, rr: float):
+        """Newest fetched bars. The last one is still forming: the engine only
+        gets closed bars, and only those after the last it processed once it
+        has caught up, so each signal fires once, as its bar closes."""
+        closed = new_df.iloc[:-1]
+        last = self.engine.last_time
+        fresh = closed if last is None else closed[closed['time'] > last]
+        if rr == self.engine.rr and len(fresh) < len(closed):
+            self._run(self.engine.extend, fresh)
+        else:
+            self._run(self.engine.update, closed, rr=rr, full=True)
+        self.visible = new_df
+        self.replay.clear()   # snapshots belong to the replay data
+
+    # ─── SIGNALS ──────────────────────────────────────────────────────────────
+    def _run(self, call, *args, full: bool = False, **kwargs):
+        """One engine call. A full replay passes on no signals (the Python
+        loop would re-log every past trade, the kernel none); otherwise only
+        bars newer than any processed before trade, so stepping back and
+        forward again doesn't repeat an order."""
+        self._quiet = full
+        try:
+            call(*args, **kwargs)
+        finally:
+            self._quiet = False
+        t = self.engine.last_time
+        if t is not None and (self._traded is None or t > self._traded): self._traded = t
+
+    def _signal(self, t, *args):
+        if self.on_signal is not None and not self._quiet and (self._traded is None or t > self._traded):
+            self.on_signal(t, *args)
+
+
+class SessionRegistry:
+    """session id -> session made by `factory()` on first use; LRU + idle
+    TTL bounded (see the module docstring)."""
+    def __init__(self, factory, maxsize: int = MAX_SESSIONS, ttl: float = SESSION_TTL):
+        self.factory  = factory
+        self.sessions = LRUCache(maxsize, ttl)
+        self._lock    = threading.Lock()
+
+    def get(self, sid: str):
+        with self._lock:
+            session = self.sessions.get(sid)
+            if session is None: session = self.factory()
+            self.sessions.put(sid, session)   # restarts the idle clock
+        return session
+
+    def stats(self) -> dict:
+        return self.sessions.stats()
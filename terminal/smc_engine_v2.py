@@ -1,6 +1,15 @@
+from collections import deque
+from itertools import islice
+
 import pandas as pd
 import numpy as np
-import MetaTrader5 as mt5
+
+import smc_kernel
+from columnar import ResultColumns, KINDS, DIRS, RESULTS
+from ob_store import OBStore
+from open_trades import OpenTrades
+from rolling import SlidingExtrema, leg_series
+from trade_stats import TradeStats
 
 # Constants
 BULLISH = 1
@@ -27,32 +36,41 @@ class SMCEngine:
       • Trailing extremes– trailing.top = max(high), trailing.bottom = min(low)
       • BOS/CHoCH        – price crossover of swing pivots
       • OB detection     – bar[-2] sweep + FVG
-    """
-    def __init__(self, length: int = 20, rr: float = 3.0):
-        self.length = length
-        self.rr     = rr
-        
-        # Swing pivot state
-        self.sh_level    = None
-        self.sh_last     = None
-        self.sh_time     = None
-        self.sh_crossed  = False
-        self.sl_level    = None
-        self.sl_last     = None
-        self.sl_time     = None
-        self.sl_crossed  = False
-        self.trend       = 0
 
-        # Trailing extremes
-        self.trail_top         = None
-        self.trail_bottom      = None
-        self.trail_top_time    = None
-        self.trail_bot_time    = None
+    `update(df)` replays a whole frame; `extend(df_tail)` / `push_bar(...)`
+    continue from the current state one bar at a time.
 
-        # Output arrays
-        self.obs       = []
-        self.structure = []
-        self.trades    = []
+    With `columnar=True` structure events and trades are stored only in NumPy
+    column tables (see columnar.py) and OB rows are mirrored there too;
+    `obs` / `structure` / `trades` still return the usual objects and dicts.
+
+    `backend` picks how a replay from an empty state runs: 'python' is the
+    bar loop below, 'numba' the compiled kernel in smc_kernel.py, 'auto' the
+    kernel when Numba is installed and the bar times allow it. Both produce
+    identical results; incremental bars always go through the Python loop.
+
+    `rr_targets` evaluates several RR values in the same pass: pivots,
+    structure and OBs don't depend on rr, so every logged trade just carries
+    `tps` / `results` lists aligned with `rr_targets` next to its own
+    `tp` / `result`. `rr_summary()` tallies them per target.
+
+    `on_signal` is called for each trade the bar loop opens (not for a
+    replay through the compiled kernel); live orders go through
+    order_router.py rather than from inside the loop.
+    """
+    def __init__(self, length: int = 20, rr: float = 3.0, columnar: bool = False,
+                 backend: str = 'auto', rr_targets=None):
+        if backend not in ('auto', 'python', 'numba'):
+            raise ValueError(f"unknown backend {backend!r}")
+        if backend == 'numba' and not smc_kernel.HAVE_NUMBA:
+            raise ImportError("backend='numba' requires the numba package")
+        self.length   = length
+        self.rr       = rr
+        self.rr_targets = tuple(float(r) for r in rr_targets) if rr_targets else ()
+        self.columnar = columnar
+        self.backend  = backend
+        self.on_signal = None   # on_signal(t, dir, entry, sl, tp, ob) per new trade, e.g. an OrderRouter's
+        self._reset_state()
 
     def _reset_state(self):
         # Swing pivot state
@@ -73,214 +91,445 @@ class SMCEngine:
         self.trail_bot_time    = None
 
         # Output arrays
-        self.obs       = []
-        self.structure = []
-        self.trades    = []
-
-    @staticmethod
-    def _leg(H, L, idx, size):
-        """
-        Mirrors Pine Script:
-          if high[size] > ta.highest(size) => 0 (Bearish leg starts / High found)
-          if low[size]  < ta.lowest(size)  => 1 (Bullish leg starts / Low found)
-        `ta.highest(size)` at bar `idx` looks at H[idx-size+1 : idx+1]
-        """
-        if idx < size: return -1
-        
-        pivot_h = H[idx - size]
-        pivot_l = L[idx - size]
-        
-        # Window of bars AFTER the potential pivot
-        win_h = H[idx - size + 1 : idx + 1]
-        win_l = L[idx - size + 1 : idx + 1]
-        
-        if len(win_h) == 0: return -1
-        
-        if pivot_h > win_h.max(): return 0   # Bearish leg starts (High pivot)
-        if pivot_l < win_l.min(): return 1   # Bullish leg starts (Low pivot)
+        self._obs       = OBStore()
+        self._structure = []
+        self._trades    = []
+        self._cols      = ResultColumns(targets=bool(self.rr_targets)) if self.columnar else None
+        self._open      = OpenTrades()   # (trade index, target) still open; target -1 is `rr`
+        self.stats      = TradeStats(self.rr)   # running figures over the `rr` trades
+
+        # Incremental bar state – only the last `length + 1` bars are needed
+        # (pivot candidate + leg window, and bar[3] for OB detection)
+        self.bar_count   = 0
+        self._prev_leg   = -1
+        self._prev_close = None
+        keep = max(self.length + 1, 4)
+        self._H = deque(maxlen=keep)
+        self._L = deque(maxlen=keep)
+        self._T = deque(maxlen=keep)
+        self._window = SlidingExtrema(self.length)
+
+    @property
+    def last_time(self):
+        """Time of the newest bar processed, None before the first."""
+        return self._T[-1] if self._T else None
+
+    @property
+    def obs(self):
+        """All order blocks, newest first (mitigated ones included)."""
+        return list(self._obs)
+
+    @property
+    def structure(self):
+        if not self.columnar: return self._structure
+        cols = self._cols.structure.columns()
+        return [StructureEvent(KINDS[k], lv, t, d) for t, lv, k, d in
+                zip(cols['time'], cols['level'], cols['kind'].tolist(), cols['direction'].tolist())]
+
+    @property
+    def trades(self):
+        if not self.columnar: return self._trades
+        cols = self._cols.trades.columns()
+        out = [{'time': t, 'dir': DIRS[d], 'entry': e, 'sl': sl, 'tp': tp, 'result': RESULTS[r]}
+               for t, d, e, sl, tp, r in zip(cols['time'], cols['dir'].tolist(), cols['entry'],
+                                             cols['sl'], cols['tp'], cols['result'].tolist())]
+        if self.rr_targets:
+            m   = len(self.rr_targets)
+            tgt = self._cols.targets.columns()
+            tps, res = tgt['tp'], tgt['result'].tolist()
+            for i, tr in enumerate(out):
+                tr['tps']     = list(tps[i * m:(i + 1) * m])
+                tr['results'] = [RESULTS[r] for r in res[i * m:(i + 1) * m]]
+        return out
+
+    def rr_summary(self):
+        """Per-RR tallies over all trades: the engine's `rr` first, then each
+        of `rr_targets` – [{rr, trades, wins, losses, open, win_rate, pnl_r}]."""
+        trades = self.trades
+        columns = [(self.rr, [tr['result'] for tr in trades])]
+        for k, rr in enumerate(self.rr_targets):
+            columns.append((rr, [tr['results'][k] for tr in trades]))
+        out = []
+        for rr, results in columns:
+            wins, losses = results.count('win'), results.count('loss')
+            closed = wins + losses
+            out.append({'rr': rr, 'trades': len(results), 'wins': wins, 'losses': losses,
+                        'open': len(results) - closed,
+                        'win_rate': wins / closed * 100 if closed else 0.0,
+                        'pnl_r': wins * rr - losses})
+        return out
+
+    def columns(self) -> ResultColumns:
+        """Result tables (columnar mode only); active OB rows are synced first."""
+        if not self.columnar:
+            raise RuntimeError("SMCEngine was created with columnar=False")
+        for seq, ob in self._obs.active():
+            self._cols.sync_ob(seq, ob)
+        return self._cols
+
+    def pending(self):
+        """Rows later bars can still change: seqs of active OBs (their row in
+        `columns().obs`) and ids of trades with a result still open."""
+        return [s for s, _ in self._obs.active()], sorted({tid for tid, _ in self._open.ids()})
+
+    # Scalar state captured by snapshot()
+    _SCALARS = ('sh_level', 'sh_last', 'sh_time', 'sh_crossed', 'sl_level', 'sl_last', 'sl_time',
+                'sl_crossed', 'trend', 'trail_top', 'trail_bottom', 'trail_top_time', 'trail_bot_time',
+                'bar_count', '_prev_leg', '_prev_close')
+
+    def snapshot(self):
+        """State after `bar_count` bars, for `restore`. Outputs are append-only,
+        so only their lengths are kept, plus the fields that can still change:
+        active OBs (see OBStore.snapshot), which trade targets are open and
+        the running trade statistics."""
+        n_struct = len(self._cols.structure) if self.columnar else len(self._structure)
+        n_trades = len(self._cols.trades)    if self.columnar else len(self._trades)
+        return (tuple(getattr(self, a) for a in self._SCALARS),
+                (tuple(self._H), tuple(self._L), tuple(self._T)),
+                self._obs.snapshot(), n_struct, n_trades, tuple(self._open.ids()), self.stats.snapshot())
+
+    def restore(self, snap):
+        """Rewind to a `snapshot()` taken earlier on this same engine."""
+        scalars, (H, L, T), obs, n_struct, n_trades, open_keys, stats = snap
+        for attr, value in zip(self._SCALARS, scalars):
+            setattr(self, attr, value)
+        keep = self._H.maxlen
+        self._H = deque(H, maxlen=keep); self._L = deque(L, maxlen=keep); self._T = deque(T, maxlen=keep)
+        self._reseed_window()
+        self._obs.restore(obs)
+
+        if self.columnar:
+            self._cols.obs.truncate(len(self._obs))
+            self._cols.structure.truncate(n_struct)
+            self._cols.trades.truncate(n_trades)
+            if self._cols.targets is not None:
+                self._cols.targets.truncate(n_trades * len(self.rr_targets))
+        else:
+            del self._structure[n_struct:]
+            del self._trades[n_trades:]
+
+        self.stats.restore(stats)
+        self._open = OpenTrades()
+        for key in open_keys:
+            self._set_result(key, 'open')
+            self._open.add(key, *self._trade_levels(key))
+
+    def _trade_levels(self, key):
+        """(is_long, tp, sl) of one trade target."""
+        tid, k = key
+        if self.columnar:
+            tr = self._cols.trades
+            tp = tr.get(tid, 'tp') if k < 0 else self._cols.targets.get(tid * len(self.rr_targets) + k, 'tp')
+            return tr.get(tid, 'dir') == DIRS.index('LONG'), tp, tr.get(tid, 'sl')
+        tr = self._trades[tid]
+        return tr['dir'] == 'LONG', tr['tp'] if k < 0 else tr['tps'][k], tr['sl']
+
+    def _current_leg(self):
+        """stable.pine `leg()` for the bar just pushed, from the sliding window."""
+        size = self.length
+        if self.bar_count <= size or size == 0: return -1
+        win = self._window
+        if self._H[-size - 1] > win.max: return 0   # Bearish leg starts (High pivot)
+        if self._L[-size - 1] < win.min: return 1   # Bullish leg starts (Low pivot)
         return -1
 
-    def update(self, df: pd.DataFrame, rr: float = None):
+    def update(self, df: pd.DataFrame, rr: float = None, rr_targets=None):
+        """Full replay of `df` from a clean state."""
+        if rr is not None: self.rr = rr
+        if rr_targets is not None: self.rr_targets = tuple(float(r) for r in rr_targets)
+        self._reset_state()
+        self.extend(df)
+
+    def extend(self, df: pd.DataFrame):
+        """Process only the bars in `df`, continuing from the current state.
+        `update(df[:k])` followed by `extend(df[k:])` equals `update(df)`."""
+        self.extend_arrays(df['time'].values, df['high'].values, df['low'].values, df['close'].values)
+
+    def update_arrays(self, T, H, L, C, rr: float = None, rr_targets=None):
+        """`update` over bare column arrays (no DataFrame needed)."""
         if rr is not None: self.rr = rr
+        if rr_targets is not None: self.rr_targets = tuple(float(r) for r in rr_targets)
         self._reset_state()
+        self.extend_arrays(T, H, L, C)
+
+    def extend_arrays(self, T, H, L, C):
+        """`extend` over bare column arrays (no DataFrame needed)."""
+        T, H, L, C = np.asarray(T), np.asarray(H), np.asarray(L), np.asarray(C)
+        if len(H) == 0: return
+        if self.bar_count == 0 and self.columnar: self._cols.set_time_dtype(T.dtype)
+        if self.bar_count == 0 and self._kernel_ok(T):
+            self._run_kernel(T, H, L, C)
+            return
+
+        # Legs for the whole chunk in one vectorized pass; the last `length`
+        # buffered bars are prepended so pivots spanning the seam are kept.
+        size  = self.length
+        prior = min(size, len(self._H))
+        legs  = leg_series(np.concatenate([list(islice(self._H, len(self._H) - prior, None)), H]),
+                           np.concatenate([list(islice(self._L, len(self._L) - prior, None)), L]),
+                           size)[prior:]
 
-        H = df['high'].values
-        L = df['low'].values
-        C = df['close'].values
-        T = df['time'].values
-        n = len(df)
+        for t, h, l, c, leg in zip(T, H, L, C, legs.tolist()):
+            self._step(t, h, l, c, leg)
+        self._reseed_window()
+
+    def _kernel_ok(self, T):
+        if self.backend == 'python' or not smc_kernel.HAVE_NUMBA: return False
+        # The kernel de-duplicates OBs by scanning back over sorted int64 times
+        if T.dtype.kind not in 'Mi': return False
+        return len(T) < 2 or bool((T[1:] >= T[:-1]).all())
+
+    def _run_kernel(self, T, H, L, C):
+        """Full replay through smc_kernel.run, then rebuild the Python-side
+        state from its tables so `extend` / `push_bar` can carry on."""
+        K = smc_kernel
+        H = np.asarray(H, dtype=np.float64)
+        L = np.asarray(L, dtype=np.float64)
+        C = np.asarray(C, dtype=np.float64)
+        TI = T.view(np.int64) if T.dtype.kind == 'M' else T.astype(np.int64)
+        rrs = np.array((self.rr,) + self.rr_targets, dtype=np.float64)
+        obs, st, tr, state = K.run(H, L, C, TI, leg_series(H, L, self.length), self.length, rrs)
+
+        for bar, high, low, bias, partial, cur_h, cur_l, mitigated, refined in obs:
+            ob = OB(high, low, T[int(bar)], int(bias))
+            ob.partial = partial == 1; ob.mitigated = mitigated == 1; ob.is_refined = refined == 1
+            ob.cur_h = cur_h; ob.cur_l = cur_l
+            self._add_ob(ob)
+        for bar, level, kind, direction in st:
+            self._add_structure(KINDS[int(kind)], level, T[int(bar)], int(direction))
+        for row in tr:
+            bar, d, entry, sl, tp, result = row[:6]
+            self._add_trade(T[int(bar)], DIRS[int(d)], entry, sl, tp, RESULTS[int(result)],
+                            row[6:-1:2], [RESULTS[int(r)] for r in row[7:-1:2]], int(row[-1]))
+        # closes in the order the bar loop reports them: by bar, then trade id
+        exits = tr[:, -1] if len(tr) else np.empty(0)
+        for tid in np.lexsort((np.arange(len(tr)), exits)):
+            if exits[tid] >= 0:
+                self.stats.close(int(tid), RESULTS[int(tr[tid, K.TR_RESULT])], T[int(exits[tid])])
+
+        def level(v): return None if np.isnan(v) else v
+        def time(b):  return None if b < 0 else T[int(b)]
+        self.trend          = int(state[K.S_TREND])
+        self.sh_level       = level(state[K.S_SH_LEVEL]); self.sh_last = level(state[K.S_SH_LAST])
+        self.sh_time        = time(state[K.S_SH_BAR]);    self.sh_crossed = state[K.S_SH_CROSSED] == 1
+        self.sl_level       = level(state[K.S_SL_LEVEL]); self.sl_last = level(state[K.S_SL_LAST])
+        self.sl_time        = time(state[K.S_SL_BAR]);    self.sl_crossed = state[K.S_SL_CROSSED] == 1
+        self.trail_top      = level(state[K.S_TRAIL_TOP]);    self.trail_top_time = time(state[K.S_TRAIL_TOP_BAR])
+        self.trail_bottom   = level(state[K.S_TRAIL_BOTTOM]); self.trail_bot_time = time(state[K.S_TRAIL_BOT_BAR])
+        self._prev_leg      = int(state[K.S_PREV_LEG])
+
+        keep = self._H.maxlen
+        self._H.extend(H[-keep:]); self._L.extend(L[-keep:]); self._T.extend(T[-keep:])
+        self._prev_close = C[-1]
+        self.bar_count   = len(H)
+        self._reseed_window()
+
+    def push_bar(self, t, o, h, l, c):
+        """Process a single new bar (open is unused by the stable.pine logic)."""
+        if self.bar_count == 0 and self.columnar: self._cols.set_time_dtype(np.asarray(t).dtype)
+        self._step(t, h, l, c)
+
+    def _reseed_window(self):
+        win = self._window
+        win.clear()
+        for h, l in zip(islice(self._H, max(len(self._H) - self.length, 0), None),
+                        islice(self._L, max(len(self._L) - self.length, 0), None)):
+            win.push(h, l)
+
+    def _step(self, t, h, l, c, leg=None):
+        """One bar of the stable.pine loop; `leg` is passed in by batch callers
+        that precomputed it with `leg_series`, otherwise the window is used."""
+        H, L, T = self._H, self._L, self._T
+        H.append(h); L.append(l); T.append(t)
+        i = self.bar_count
+        self.bar_count += 1
         size = self.length
-        prev_leg = -1
 
-        for i in range(n):
-            h, l, c, t = H[i], L[i], C[i], T[i]
+        # Resolve open trades – only those whose TP/SL this bar crosses
+        for tid, result in self._open.resolve(h, l):
+            self._set_result(tid, result, i)
+            if tid[1] < 0: self.stats.close(tid[0], result, t)
+
+        # updateTrailingExtremes
+        if self.trail_top is None or h > self.trail_top:
+            self.trail_top      = h
+            self.trail_top_time = t
+        if self.trail_bottom is None or l < self.trail_bottom:
+            self.trail_bottom   = l
+            self.trail_bot_time = t
+
+        # getCurrentStructure
+        if leg is None:
+            self._window.push(h, l)
+            leg = self._current_leg()
+        cur_leg = leg
+        new_pivot       = (cur_leg != -1 and cur_leg != self._prev_leg)
+        pivot_low       = (cur_leg == 1)
 
-            # Resolve open trades
-            for tr in self.trades:
-                if tr['result'] == 'open':
-                    if tr['dir'] == 'LONG':
-                        if h >= tr['tp']:  tr['result'] = 'win'
-                        elif l <= tr['sl']: tr['result'] = 'loss'
+        if new_pivot:
+            pi = -size - 1   # bar[size] in the buffer
+            if self.trend == 0:
+                self.trend = BULLISH if pivot_low else BEARISH
+
+            if pivot_low:
+                self.sl_last   = self.sl_level
+                self.sl_level  = L[pi]
+                self.sl_time   = T[pi]
+                self.sl_crossed = False
+                self.trail_bottom   = L[pi]
+                self.trail_bot_time = T[pi]
+            else:
+                self.sh_last   = self.sh_level
+                self.sh_level  = H[pi]
+                self.sh_time   = T[pi]
+                self.sh_crossed = False
+                self.trail_top      = H[pi]
+                self.trail_top_time = T[pi]
+
+        if cur_leg != -1:
+            self._prev_leg = cur_leg
+
+        # displayStructure – BOS / CHoCH
+        pc = self._prev_close
+        self._prev_close = c
+        if i > 0:
+            if (self.sh_level is not None and not self.sh_crossed
+                    and pc <= self.sh_level and c > self.sh_level):
+                kind = 'CHoCH' if self.trend == BEARISH else 'BOS'
+                self.trend      = BULLISH
+                self.sh_crossed = True
+                self._add_structure(kind, self.sh_level, t, BULLISH)
+
+            if (self.sl_level is not None and not self.sl_crossed
+                    and pc >= self.sl_level and c < self.sl_level):
+                kind = 'CHoCH' if self.trend == BULLISH else 'BOS'
+                self.trend      = BEARISH
+                self.sl_crossed = True
+                self._add_structure(kind, self.sl_level, t, BEARISH)
+
+        # OB detection
+        if i >= 3:
+            c2h, c2l = H[-3], L[-3]   # OB candle (bar[2])
+            c1h, c1l = H[-2], L[-2]   # Middle candle (bar[1])
+            c3h, c3l = H[-4], L[-4]   # Candle before OB (bar[3])
+
+            # 1. Liquidity sweep at bar[2]
+            bull_sweep = c2l < c3l
+            bear_sweep = c2h > c3h
+            
+            # 2. Middle candle MUST NOT take liquidity of OB candle (Strict Dominance)
+            # Matches: low[1] >= low[2] and high[1] <= high[2]
+            bull_filter = c1l >= c2l 
+            bear_filter = c1h <= c2h
+
+            # 3. FVG must exist between bar[2] (OB) and bar[0] (Current)
+            # Matches: low > high[2] (Bullish) / high < low[2] (Bearish)
+            bull_fvg   = l > c2h
+            bear_fvg   = h < c2l
+
+            ob_time    = T[-3]
+
+            if bull_sweep and bull_filter and bull_fvg and self.trend == BULLISH:
+                if (ob_time, BULLISH) not in self._obs:
+                    new_ob = OB(c2h, c2l, ob_time, BULLISH)
+                    # Nested/Refined detection
+                    if self._obs.has_container(BULLISH, new_ob.high, new_ob.low, new_ob.time):
+                        new_ob.is_refined = True
+                    self._add_ob(new_ob)
+
+            if bear_sweep and bear_filter and bear_fvg and self.trend == BEARISH:
+                if (ob_time, BEARISH) not in self._obs:
+                    new_ob = OB(c2h, c2l, ob_time, BEARISH)
+                    # Nested/Refined detection
+                    if self._obs.has_container(BEARISH, new_ob.high, new_ob.low, new_ob.time):
+                        new_ob.is_refined = True
+                    self._add_ob(new_ob)
+
+        # Mitigation – only OBs whose range this bar reaches
+        for seq, ob in self._obs.touched(h, l, c):
+            if ob.bias == BEARISH:
+                # Full Mitigation (Body Close Above)
+                if c > ob.high:
+                    self._mitigate(seq, ob)
+                # Partial Mitigation (Wick Sweep)
+                elif h > ob.low:
+                    if not ob.partial:
+                        ob.cur_h = ob.high; ob.cur_l = h
+                        self._log(ob, c, BEARISH, t)
+                    else:
+                        ob.cur_l = max(ob.cur_l, h)
+                    ob.partial = True
+            else:
+                # Full Mitigation (Body Close Below)
+                if c < ob.low:
+                    self._mitigate(seq, ob)
+                # Partial Mitigation (Wick Sweep)
+                elif l < ob.high:
+                    if not ob.partial:
+                        ob.cur_h = l; ob.cur_l = ob.low
+                        self._log(ob, c, BULLISH, t)
                     else:
-                        if l <= tr['tp']:  tr['result'] = 'win'
-                        elif h >= tr['sl']: tr['result'] = 'loss'
-
-            # updateTrailingExtremes
-            if self.trail_top is None or h > self.trail_top:
-                self.trail_top      = h
-                self.trail_top_time = t
-            if self.trail_bottom is None or l < self.trail_bottom:
-                self.trail_bottom   = l
-                self.trail_bot_time = t
-
-            # getCurrentStructure
-            cur_leg = self._leg(H, L, i, size)
-            new_pivot       = (cur_leg != -1 and cur_leg != prev_leg)
-            pivot_low       = (cur_leg == 1)
-
-            if new_pivot:
-                pi = i - size
-                if self.trend == 0:
-                    self.trend = BULLISH if pivot_low else BEARISH
-
-                if pivot_low:
-                    self.sl_last   = self.sl_level
-                    self.sl_level  = L[pi]
-                    self.sl_time   = T[pi]
-                    self.sl_crossed = False
-                    self.trail_bottom   = L[pi]
-                    self.trail_bot_time = T[pi]
-                else:
-                    self.sh_last   = self.sh_level
-                    self.sh_level  = H[pi]
-                    self.sh_time   = T[pi]
-                    self.sh_crossed = False
-                    self.trail_top      = H[pi]
-                    self.trail_top_time = T[pi]
-
-            if cur_leg != -1:
-                prev_leg = cur_leg
-
-            # displayStructure – BOS / CHoCH
-            if i > 0:
-                pc = C[i-1]
-                if (self.sh_level is not None and not self.sh_crossed
-                        and pc <= self.sh_level and c > self.sh_level):
-                    kind = 'CHoCH' if self.trend == BEARISH else 'BOS'
-                    self.trend      = BULLISH
-                    self.sh_crossed = True
-                    self.structure.append(StructureEvent(kind, self.sh_level, t, BULLISH))
-
-                if (self.sl_level is not None and not self.sl_crossed
-                        and pc >= self.sl_level and c < self.sl_level):
-                    kind = 'CHoCH' if self.trend == BULLISH else 'BOS'
-                    self.trend      = BEARISH
-                    self.sl_crossed = True
-                    self.structure.append(StructureEvent(kind, self.sl_level, t, BEARISH))
-
-            # OB detection
-            if i >= 3:
-                c2h, c2l = H[i-2], L[i-2]   # OB candle (bar[2])
-                c1h, c1l = H[i-1], L[i-1]   # Middle candle (bar[1])
-                c3h, c3l = H[i-3], L[i-3]   # Candle before OB (bar[3])
-
-                # 1. Liquidity sweep at bar[2]
-                bull_sweep = c2l < c3l
-                bear_sweep = c2h > c3h
-                
-                # 2. Middle candle MUST NOT take liquidity of OB candle (Strict Dominance)
-                # Matches: low[1] >= low[2] and high[1] <= high[2]
-                bull_filter = c1l >= c2l 
-                bear_filter = c1h <= c2h
-
-                # 3. FVG must exist between bar[2] (OB) and bar[0] (Current)
-                # Matches: low > high[2] (Bullish) / high < low[2] (Bearish)
-                bull_fvg   = l > c2h
-                bear_fvg   = h < c2l
-
-                ob_time    = T[i-2]
-
-                if bull_sweep and bull_filter and bull_fvg and self.trend == BULLISH:
-                    if not any(ob.time == ob_time and ob.bias == BULLISH for ob in self.obs):
-                        new_ob = OB(c2h, c2l, ob_time, BULLISH)
-                        # Nested/Refined detection
-                        if any(ob.bias == BULLISH and not ob.mitigated and ob.time < new_ob.time and 
-                               new_ob.high <= ob.high and new_ob.low >= ob.low for ob in self.obs):
-                            new_ob.is_refined = True
-                        self.obs.insert(0, new_ob)
-
-                if bear_sweep and bear_filter and bear_fvg and self.trend == BEARISH:
-                    if not any(ob.time == ob_time and ob.bias == BEARISH for ob in self.obs):
-                        new_ob = OB(c2h, c2l, ob_time, BEARISH)
-                        # Nested/Refined detection
-                        if any(ob.bias == BEARISH and not ob.mitigated and ob.time < new_ob.time and 
-                               new_ob.high <= ob.high and new_ob.low >= ob.low for ob in self.obs):
-                            new_ob.is_refined = True
-                        self.obs.insert(0, new_ob)
-
-            # Mitigation
-            for ob in self.obs:
-                if ob.mitigated: continue # Already greyed out
-
-                if ob.bias == BEARISH:
-                    # Full Mitigation (Body Close Above)
-                    if c > ob.high:
-                        ob.mitigated = True
-                    # Partial Mitigation (Wick Sweep)
-                    elif h > ob.low:
-                        if not ob.partial:
-                            ob.cur_h = ob.high; ob.cur_l = h
-                            self._log(ob, c, BEARISH, t)
-                        else:
-                            ob.cur_l = max(ob.cur_l, h)
-                        ob.partial = True
-                else:
-                    # Full Mitigation (Body Close Below)
-                    if c < ob.low:
-                        ob.mitigated = True
-                    # Partial Mitigation (Wick Sweep)
-                    elif l < ob.high:
-                        if not ob.partial:
-                            ob.cur_h = l; ob.cur_l = ob.low
-                            self._log(ob, c, BULLISH, t)
-                        else:
-                            ob.cur_h = min(ob.cur_h, l)
-                        ob.partial = True
-
-    def _log(self, ob, entry, direction, t, live=False, symbol="EURUSD", lot=0.1):
+                        ob.cur_h = min(ob.cur_h, l)
+                    ob.partial = True
+
+    def _add_structure(self, kind, level, t, direction):
+        if self.columnar:
+            self._cols.structure.append(t, level, KINDS.index(kind), direction)
+        else:
+            self._structure.append(StructureEvent(kind, level, t, direction))
+
+    def _add_ob(self, ob):
+        seq = self._obs.add(ob)
+        if self.columnar: self._cols.add_ob(ob)   # row == seq
+        return seq
+
+    def _mitigate(self, seq, ob):
+        self._obs.mitigate(seq)
+        if self.columnar: self._cols.sync_ob(seq, ob)
+
+    def _set_result(self, key, result, bar: int = -1):
+        tid, k = key
+        if k < 0:
+            if self.columnar: self._cols.trades.set(tid, result=RESULTS.index(result), exit_bar=bar)
+            else:             self._trades[tid]['result'] = result
+        else:
+            if self.columnar: self._cols.targets.set(tid * len(self.rr_targets) + k, result=RESULTS.index(result))
+            else:             self._trades[tid]['results'][k] = result
+
+    def _add_trade(self, t, trade_dir, entry, sl, tp, result='open', tps=(), results=(), exit_bar=-1):
+        long = trade_dir == 'LONG'
+        if self.columnar:
+            tid = self._cols.trades.append(t, DIRS.index(trade_dir), entry, sl, tp, RESULTS.index(result), exit_bar)
+            for rr, tp_k, res_k in zip(self.rr_targets, tps, results):
+                self._cols.targets.append(tid, rr, tp_k, RESULTS.index(res_k))
+        else:
+            tid = len(self._trades)
+            trade = {
+                'time':   t,
+                'dir':    trade_dir,
+                'entry':  entry,
+                'sl':     sl,
+                'tp':     tp,
+                'result': result
+            }
+            if self.rr_targets:
+                trade['tps'] = list(tps); trade['results'] = list(results)
+            self._trades.append(trade)
+        self.stats.open(tid, long, entry, sl)
+        if result == 'open':
+            self._open.add((tid, -1), long, tp, sl)
+        for k, (tp_k, res_k) in enumerate(zip(tps, results)):
+            if res_k == 'open': self._open.add((tid, k), long, tp_k, sl)
+
+    def _log(self, ob, entry, direction, t):
         sl   = ob.high if direction == BEARISH else ob.low
         risk = abs(entry - sl)
         if risk == 0: return
         tp = entry - risk * self.rr if direction == BEARISH else entry + risk * self.rr
         
         trade_dir = 'SHORT' if direction == BEARISH else 'LONG'
-        self.trades.append({
-            'time':   t,
-            'dir':    trade_dir,
-            'entry':  entry,
-            'sl':     sl,
-            'tp':     tp,
-            'result': 'open'
-        })
+        tps = [entry - risk * r if direction == BEARISH else entry + risk * r for r in self.rr_targets]
+        self._add_trade(t, trade_dir, entry, sl, tp, 'open', tps, ['open'] * len(tps))
         
-        if live:
-            order_type = mt5.ORDER_TYPE_SELL if trade_dir == 'SHORT' else mt5.ORDER_TYPE_BUY
-            info = mt5.symbol_info(symbol)
-            if not info: return
-            price = mt5.symbol_info_tick(symbol).bid if trade_dir == 'SHORT' else mt5.symbol_info_tick(symbol).ask
-
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": float(lot),
-                "type": order_type,
-                "price": price,
-                "sl": float(sl),
-                "tp": float(tp),
-                "deviation": 20,
-                "magic": 234000,
-                "comment": f"SMC OB {ob.time}",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            }
-            mt5.order_send(request)
+        if self.on_signal is not None:
+            self.on_signal(t, trade_dir, entry, sl, tp, ob)
@@ -0,0 +1,235 @@
+"""
+Compiled full-replay kernel for SMCEngine(backend='numba').
+
+Same pivot / BOS-CHoCH / OB / mitigation / trade logic as `SMCEngine._step`,
+written over flat float64 / int64 arrays so Numba can compile it. Times are
+passed as int64 (datetime64 viewed as i8) and results come back as 2-D float64
+tables keyed by bar index; SMCEngine turns them back into OB / StructureEvent
+objects and trade dicts.
+
+Without Numba installed HAVE_NUMBA is False and the engine keeps using its
+pure-Python path; `run.py_func` (or `run` itself) is still importable so the
+kernel logic can be checked against the engine anywhere.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+def _jit(fn):
+    return njit(cache=True)(fn) if HAVE_NUMBA else fn
+
+# Column layout of the result tables
+OB_BAR, OB_HIGH, OB_LOW, OB_BIAS, OB_PARTIAL, OB_CUR_H, OB_CUR_L, OB_MITIGATED, OB_REFINED = range(9)
+ST_BAR, ST_LEVEL, ST_KIND, ST_DIR = range(4)                     # kind: 0 BOS, 1 CHoCH
+TR_BAR, TR_DIR, TR_ENTRY, TR_SL, TR_TP, TR_RESULT = range(6)     # dir: 0 LONG, 1 SHORT; result: 0 open, 1 win, 2 loss
+# With several RR targets, target k's TP / result sit at TR_TP + 2k / TR_RESULT + 2k;
+# the last column is the bar on which the `rr` target (k = 0) closed, -1 while open
+
+# Final engine state (NaN / -1 stand for None)
+(S_TREND, S_SH_LEVEL, S_SH_LAST, S_SH_BAR, S_SH_CROSSED, S_SL_LEVEL, S_SL_LAST, S_SL_BAR,
+ S_SL_CROSSED, S_TRAIL_TOP, S_TRAIL_TOP_BAR, S_TRAIL_BOTTOM, S_TRAIL_BOT_BAR, S_PREV_LEG) = range(14)
+
+
+@_jit
+def _grow(a):
+    b = np.empty((a.shape[0] * 2, a.shape[1]))
+    b[:a.shape[0]] = a
+    return b
+
+
+@_jit
+def _grow_idx(a):
+    b = np.empty(a.shape[0] * 2, np.int64)
+    b[:a.shape[0]] = a
+    return b
+
+
+@_jit
+def _has_ob(obs, n_ob, T, ob_time, bias):
+    # Times are non-decreasing, so only the newest OBs can share `ob_time`
+    for j in range(n_ob - 1, -1, -1):
+        t = T[int(obs[j, OB_BAR])]
+        if t < ob_time: return False
+        if t == ob_time and obs[j, OB_BIAS] == bias: return True
+    return False
+
+
+@_jit
+def _is_nested(obs, active, n_act, T, bias, high, low, ob_time):
+    for j in range(n_act):
+        k = active[j]
+        if (obs[k, OB_BIAS] == bias and T[int(obs[k, OB_BAR])] < ob_time
+                and high <= obs[k, OB_HIGH] and low >= obs[k, OB_LOW]):
+            return True
+    return False
+
+
+@_jit
+def run(H, L, C, T, legs, size, rrs):
+    """`rrs[0]` is the engine's rr, any further entries its `rr_targets`."""
+    n = H.shape[0]
+    m = rrs.shape[0]
+    obs = np.empty((64, 9)); n_ob = 0
+    st  = np.empty((64, 4)); n_st = 0
+    tr  = np.empty((64, 5 + 2 * m)); n_tr = 0
+    tr_exit = 4 + 2 * m
+    active = np.empty(64, np.int64); n_act  = 0   # OB rows not mitigated, oldest first
+    open_  = np.empty(64, np.int64); n_open = 0   # trade rows still open
+
+    trend = 0
+    sh_level = np.nan; sh_last = np.nan; sh_bar = -1; sh_crossed = False
+    sl_level = np.nan; sl_last = np.nan; sl_bar = -1; sl_crossed = False
+    trail_top = np.nan; trail_top_bar = -1
+    trail_bottom = np.nan; trail_bot_bar = -1
+    prev_leg = -1
+
+    for i in range(n):
+        h = H[i]; l = L[i]; c = C[i]
+
+        # Resolve open trades (TP before SL), each RR target on its own
+        k = 0
+        for j in range(n_open):
+            r = open_[j]
+            still_open = False
+            for q in range(m):
+                if tr[r, TR_RESULT + 2 * q] != 0: continue
+                tp = tr[r, TR_TP + 2 * q]
+                res = 0
+                if tr[r, TR_DIR] == 0:
+                    if h >= tp:             res = 1
+                    elif l <= tr[r, TR_SL]: res = 2
+                else:
+                    if l <= tp:             res = 1
+                    elif h >= tr[r, TR_SL]: res = 2
+                if res != 0:
+                    tr[r, TR_RESULT + 2 * q] = res
+                    if q == 0: tr[r, tr_exit] = i
+                else:
+                    still_open = True
+            if still_open:
+                open_[k] = r; k += 1
+        n_open = k
+
+        # updateTrailingExtremes
+        if trail_top_bar == -1 or h > trail_top:
+            trail_top = h; trail_top_bar = i
+        if trail_bot_bar == -1 or l < trail_bottom:
+            trail_bottom = l; trail_bot_bar = i
+
+        # getCurrentStructure
+        leg = legs[i]
+        if leg != -1 and leg != prev_leg:
+            pi = i - size
+            if trend == 0:
+                trend = 1 if leg == 1 else -1
+            if leg == 1:
+                sl_last = sl_level; sl_level = L[pi]; sl_bar = pi; sl_crossed = False
+                trail_bottom = L[pi]; trail_bot_bar = pi
+            else:
+                sh_last = sh_level; sh_level = H[pi]; sh_bar = pi; sh_crossed = False
+                trail_top = H[pi]; trail_top_bar = pi
+        if leg != -1:
+            prev_leg = leg
+
+        # displayStructure – BOS / CHoCH
+        if i > 0:
+            pc = C[i - 1]
+            if sh_bar != -1 and not sh_crossed and pc <= sh_level and c > sh_level:
+                if n_st == st.shape[0]: st = _grow(st)
+                st[n_st, ST_BAR] = i; st[n_st, ST_LEVEL] = sh_level
+                st[n_st, ST_KIND] = 1 if trend == -1 else 0; st[n_st, ST_DIR] = 1
+                n_st += 1
+                trend = 1; sh_crossed = True
+            if sl_bar != -1 and not sl_crossed and pc >= sl_level and c < sl_level:
+                if n_st == st.shape[0]: st = _grow(st)
+                st[n_st, ST_BAR] = i; st[n_st, ST_LEVEL] = sl_level
+                st[n_st, ST_KIND] = 1 if trend == 1 else 0; st[n_st, ST_DIR] = -1
+                n_st += 1
+                trend = -1; sl_crossed = True
+
+        # OB detection
+        if i >= 3:
+            c2h = H[i - 2]; c2l = L[i - 2]
+            c1h = H[i - 1]; c1l = L[i - 1]
+            c3h = H[i - 3]; c3l = L[i - 3]
+            ob_time = T[i - 2]
+            for bias in (1, -1):
+                if bias == 1:
+                    ok = c2l < c3l and c1l >= c2l and l > c2h and trend == 1
+                else:
+                    ok = c2h > c3h and c1h <= c2h and h < c2l and trend == -1
+                if ok and not _has_ob(obs, n_ob, T, ob_time, bias):
+                    if n_ob == obs.shape[0]: obs = _grow(obs)
+                    obs[n_ob, OB_BAR] = i - 2; obs[n_ob, OB_HIGH] = c2h; obs[n_ob, OB_LOW] = c2l
+                    obs[n_ob, OB_BIAS] = bias; obs[n_ob, OB_PARTIAL] = 0
+                    obs[n_ob, OB_CUR_H] = c2h; obs[n_ob, OB_CUR_L] = c2l; obs[n_ob, OB_MITIGATED] = 0
+                    obs[n_ob, OB_REFINED] = 1 if _is_nested(obs, active, n_act, T, bias, c2h, c2l, ob_time) else 0
+                    if n_act == active.shape[0]: active = _grow_idx(active)
+                    active[n_act] = n_ob; n_act += 1
+                    n_ob += 1
+
+        # Mitigation – newest first, same order the engine logs trades in
+        any_mitigated = False
+        for j in range(n_act - 1, -1, -1):
+            r = active[j]
+            bear = obs[r, OB_BIAS] == -1
+            if bear:
+                if c > obs[r, OB_HIGH]:
+                    obs[r, OB_MITIGATED] = 1; any_mitigated = True
+                    continue
+                if not h > obs[r, OB_LOW]: continue
+                first = obs[r, OB_PARTIAL] == 0
+                if first:
+                    obs[r, OB_CUR_H] = obs[r, OB_HIGH]; obs[r, OB_CUR_L] = h
+                else:
+                    obs[r, OB_CUR_L] = max(obs[r, OB_CUR_L], h)
+                sl = obs[r, OB_HIGH]
+            else:
+                if c < obs[r, OB_LOW]:
+                    obs[r, OB_MITIGATED] = 1; any_mitigated = True
+                    continue
+                if not l < obs[r, OB_HIGH]: continue
+                first = obs[r, OB_PARTIAL] == 0
+                if first:
+                    obs[r, OB_CUR_H] = l; obs[r, OB_CUR_L] = obs[r, OB_LOW]
+                else:
+                    obs[r, OB_CUR_H] = min(obs[r, OB_CUR_H], l)
+                sl = obs[r, OB_LOW]
+            obs[r, OB_PARTIAL] = 1
+
+            # _log
+            if first:
+                risk = abs(c - sl)
+                if risk != 0:
+                    if n_tr == tr.shape[0]: tr = _grow(tr)
+                    tr[n_tr, TR_BAR] = i; tr[n_tr, TR_DIR] = 1 if bear else 0
+                    tr[n_tr, TR_ENTRY] = c; tr[n_tr, TR_SL] = sl
+                    for q in range(m):
+                        tr[n_tr, TR_TP + 2 * q] = c - risk * rrs[q] if bear else c + risk * rrs[q]
+                        tr[n_tr, TR_RESULT + 2 * q] = 0
+                    tr[n_tr, tr_exit] = -1
+                    if n_open == open_.shape[0]: open_ = _grow_idx(open_)
+                    open_[n_open] = n_tr; n_open += 1
+                    n_tr += 1
+
+        if any_mitigated:
+            k = 0
+            for j in range(n_act):
+                if obs[active[j], OB_MITIGATED] == 0:
+                    active[k] = active[j]; k += 1
+            n_act = k
+
+    state = np.empty(14)
+    state[S_TREND] = trend
+    state[S_SH_LEVEL] = sh_level; state[S_SH_LAST] = sh_last; state[S_SH_BAR] = sh_bar
+    state[S_SH_CROSSED] = 1 if sh_crossed else 0
+    state[S_SL_LEVEL] = sl_level; state[S_SL_LAST] = sl_last; state[S_SL_BAR] = sl_bar
+    state[S_SL_CROSSED] = 1 if sl_crossed else 0
+    state[S_TRAIL_TOP] = trail_top; state[S_TRAIL_TOP_BAR] = trail_top_bar
+    state[S_TRAIL_BOTTOM] = trail_bottom; state[S_TRAIL_BOT_BAR] = trail_bot_bar
+    state[S_PREV_LEG] = prev_leg
+    return obs[:n_ob], st[:n_st], tr[:n_tr], state
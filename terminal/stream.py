@@ -0,0 +1,229 @@
+"""
+Live SMC streams for the /ws/stream endpoint.
+
+One Feed per (symbol, tf) polls the upstream for its newest bars. One Channel
+per (length, rr) on that feed keeps an incremental SMCEngine over the closed
+bars. Clients on the same feed share the poll; clients on the same channel
+share the engine and every encoded message.
+
+A client gets one `snapshot` message, then `delta` messages with
+  candles                  – bars closed since the last message + the forming bar
+  obs_new / obs_updated    – OBs found, or tapped / mitigated, on those bars
+  structure                – new BOS / CHoCH events
+  trades_new / trades_updated
+  trend, trails
+OB, structure and trade rows carry an `id` (their row in the engine's column
+tables) so updates can be matched to what the client already holds. The
+forming bar is only drawn, never fed to the engine: results change when a
+bar closes, exactly as in a bar replay.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pandas as pd
+
+from smc_engine_v2 import SMCEngine, BULLISH, BEARISH
+from serialize import (dumps, epoch_second, rows, candle_columns, ob_columns,
+                       structure_columns, trade_columns)
+
+HISTORY_BARS = 2000   # window loaded when a feed starts (and on resync)
+POLL_BARS    = 10     # newest bars read per poll; a longer gap forces a resync
+QUEUE_SIZE   = 256    # messages buffered per client before it gets a fresh snapshot
+
+
+def _with_ids(cols: dict, idx) -> list:
+    return rows(dict(id=np.asarray(idx, dtype=np.int64).tolist(), **cols))
+
+
+def _bar(row) -> tuple:
+    return (row['time'], row['open'], row['high'], row['low'], row['close'])
+
+
+class Channel:
+    """Incremental engine for one (length, rr) of a feed, and its clients."""
+    def __init__(self, length: int, rr: float, closed: pd.DataFrame):
+        self.engine = SMCEngine(length=length, rr=rr, columnar=True)
+        self.queues = set()
+        self.reset(closed)
+
+    def reset(self, closed: pd.DataFrame):
+        self.engine.update(closed)
+
+    def _state(self) -> dict:
+        e = self.engine
+        return {
+            "trend": "bullish" if e.trend == BULLISH else "bearish" if e.trend == BEARISH else "neutral",
+            "trails": {
+                "top": None if e.trail_top is None else float(e.trail_top),
+                "top_time": epoch_second(e.trail_top_time),
+                "bottom": None if e.trail_bottom is None else float(e.trail_bottom),
+                "bottom_time": epoch_second(e.trail_bot_time),
+            },
+        }
+
+    def snapshot(self) -> dict:
+        t = self.engine.columns()
+        ob_idx = np.arange(len(t.obs))[::-1]   # newest first, like SMCEngine.obs
+        return dict(obs=_with_ids(ob_columns(t, ob_idx), ob_idx),
+                    structure=_with_ids(structure_columns(t), np.arange(len(t.structure))),
+                    trades=_with_ids(trade_columns(t), np.arange(len(t.trades))),
+                    **self._state())
+
+    def advance(self, closed: pd.DataFrame) -> dict:
+        """Extend the engine by newly closed bars; everything they changed."""
+        e = self.engine
+        t = e.columns()
+        n_ob, n_st, n_tr = len(t.obs), len(t.structure), len(t.trades)
+        active, open_ = (np.asarray(x, dtype=np.int64) for x in e.pending())
+        fields = lambda: np.column_stack([t.obs[f][active].astype(np.float64)
+                                          for f in ('partial', 'cur_h', 'cur_l', 'mitigated')])
+        ob_before, tr_before = fields(), t.trades['result'][open_].copy()
+
+        if len(closed): e.extend(closed)
+
+        t = e.columns()
+        ob_upd = active[(fields() != ob_before).any(axis=1)][::-1] if len(active) else active
+        tr_upd = open_[t.trades['result'][open_] != tr_before]
+        ob_new = np.arange(n_ob, len(t.obs))[::-1]
+        st_new = np.arange(n_st, len(t.structure))
+        tr_new = np.arange(n_tr, len(t.trades))
+        return dict(obs_new=_with_ids(ob_columns(t, ob_new), ob_new),
+                    obs_updated=_with_ids(ob_columns(t, ob_upd), ob_upd),
+                    structure=_with_ids(structure_columns(t, st_new), st_new),
+                    trades_new=_with_ids(trade_columns(t, idx=tr_new), tr_new),
+                    trades_updated=_with_ids(trade_columns(t, idx=tr_upd), tr_upd),
+                    **self._state())
+
+
+class Feed:
+    """Bars of one (symbol, tf) – closed history plus the forming last bar –
+    polled every `hub.interval` seconds while any client is subscribed.
+    Engine work runs on `hub.pool`, one step at a time under `lock`."""
+    def __init__(self, hub, symbol: str, tf: int):
+        self.hub = hub; self.symbol = symbol; self.tf = tf
+        self.bars = None
+        self.channels = {}
+        self.lock = asyncio.Lock()
+        self.task = None
+        self.loaded = asyncio.ensure_future(self._load())
+
+    async def _load(self):
+        self.bars = await self.hub.fetch(self.symbol, self.tf, HISTORY_BARS)
+        self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task is not None: self.task.cancel()
+        self.loaded.cancel()
+
+    def join(self, length: int, rr: float):
+        """(channel, snapshot message) for a new client of (length, rr)."""
+        ch = self.channels.get((length, rr))
+        if ch is None:
+            ch = self.channels[(length, rr)] = Channel(length, rr, self.bars.iloc[:-1])
+        return ch, self.snapshot(ch)
+
+    def snapshot(self, ch: Channel) -> str:
+        e = ch.engine
+        return dumps(dict(type="snapshot", symbol=self.symbol, tf=self.tf, length=e.length, rr=e.rr,
+                          candles=rows(candle_columns(self.bars)), **ch.snapshot()))
+
+    def publish(self, ch: Channel, msg: str):
+        for q in ch.queues:
+            try:
+                q.put_nowait(msg)
+            except asyncio.QueueFull:
+                # Too far behind to catch up on deltas – start it over
+                while not q.empty(): q.get_nowait()
+                q.put_nowait(self.snapshot(ch))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.hub.interval)
+            try:
+                recent = await self.hub.fetch(self.symbol, self.tf, POLL_BARS)
+                await self.apply(recent)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"stream {self.symbol}/{self.tf}: poll failed: {e}")
+
+    async def apply(self, recent: pd.DataFrame):
+        """Merge the newest bars into the feed and publish the deltas."""
+        if recent.empty: return
+        async with self.lock:
+            channels = list(self.channels.values())
+            out = await self.hub.run(self._merge, recent, channels)
+            if out is None:   # bars missing in between, or a different series
+                bars = await self.hub.fetch(self.symbol, self.tf, HISTORY_BARS)
+                out = await self.hub.run(self._reset, bars, channels)
+            for ch, msg in out:
+                self.publish(ch, msg)
+
+    def _merge(self, recent, channels):
+        forming = self.bars.iloc[-1]
+        rt = recent['time']
+        if rt.iloc[0] > forming['time'] or rt.iloc[-1] < forming['time']: return None
+
+        fresh = recent[rt >= forming['time']]
+        closed = fresh.iloc[:-1]
+        if closed.empty and _bar(fresh.iloc[-1]) == _bar(forming): return []
+
+        self.bars = pd.concat([self.bars.iloc[:-1], fresh], ignore_index=True).iloc[-HISTORY_BARS:]
+        candles = rows(candle_columns(fresh))
+        return [(ch, dumps(dict(type="delta", candles=candles, **ch.advance(closed)))) for ch in channels]
+
+    def _reset(self, bars, channels):
+        if bars.empty or (len(bars) == len(self.bars) and _bar(bars.iloc[-1]) == _bar(self.bars.iloc[-1])):
+            return []
+        self.bars = bars
+        out = []
+        for ch in channels:
+            ch.reset(bars.iloc[:-1])
+            out.append((ch, self.snapshot(ch)))
+        return out
+
+
+class StreamHub:
+    """Feeds by (symbol, tf). `fetch(symbol, tf, count)` is the async upstream
+    read; engine work runs in `pool` (the loop's default executor if None)."""
+    def __init__(self, fetch, interval: float = 1.0, pool=None):
+        self.fetch    = fetch
+        self.interval = interval
+        self.pool     = pool
+        self.feeds    = {}
+
+    def run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    @asynccontextmanager
+    async def subscribe(self, symbol: str, tf: int, length: int, rr: float):
+        """Queue of encoded messages for one client, starting with a snapshot."""
+        key = (symbol, tf)
+        feed = self.feeds.get(key)
+        if feed is None:
+            feed = self.feeds[key] = Feed(self, symbol, tf)
+        try:
+            await asyncio.shield(feed.loaded)
+        except Exception:
+            if self.feeds.get(key) is feed and not feed.channels: del self.feeds[key]
+            raise
+
+        queue = asyncio.Queue(QUEUE_SIZE)
+        async with feed.lock:
+            ch, snapshot = await self.run(feed.join, length, rr)
+            queue.put_nowait(snapshot)
+            ch.queues.add(queue)
+        try:
+            yield queue
+        finally:
+            ch.queues.discard(queue)
+            if not ch.queues and feed.channels.get((length, rr)) is ch:
+                del feed.channels[(length, rr)]
+            if not feed.channels and self.feeds.get(key) is feed:
+                feed.stop()
+                del self.feeds[key]
+
+    def stats(self) -> dict:
+        return {f"{s}/{tf}": {f"{length}/{rr}": len(ch.queues) for (length, rr), ch in feed.channels.items()}
+                for (s, tf), feed in self.feeds.items()}
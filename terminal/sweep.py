@@ -0,0 +1,185 @@
+"""
+SMC parameter sweep  –  length / rr grid over symbols and CSV files
+===================================================================
+Run:  python3 sweep.py --csv mock_data_15m.csv --length 10,20,50 --rr 1,2,3
+      python3 sweep.py --symbols EURUSDm,XAUUSDm --tf 15 --length 10:60:10 --rr 1:5:0.5 --samples 40
+      python3 sweep.py --symbols EURUSDm --store --tf 15 --length 20   (offline, from bar_store.py)
+
+Each dataset's OHLC columns are copied once into shared memory; worker
+processes attach to them instead of receiving pickled DataFrames. Settings
+that differ only in `rr` share one engine pass per (dataset, length): the
+other rr values ride along as the engine's `rr_targets`.
+"""
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from smc_engine_v2 import SMCEngine
+
+COLUMNS = ('time', 'high', 'low', 'close')
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SHARED OHLC
+# ─────────────────────────────────────────────────────────────────────────────
+class SharedOHLC:
+    """time/high/low/close of one dataset (a DataFrame or bar-store records)
+    in a single shared-memory block."""
+    def __init__(self, df):
+        n = len(df)
+        self.n   = n
+        self.shm = shared_memory.SharedMemory(create=True, size=max(n, 1) * 8 * len(COLUMNS))
+        for name, arr in attach(self.shm.buf, n).items():
+            arr[:] = np.asarray(df[name])
+        self.name = self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach(buf, n):
+    """Column views over a SharedOHLC buffer (time as datetime64[ns])."""
+    out = {}
+    for k, name in enumerate(COLUMNS):
+        dtype = 'datetime64[ns]' if name == 'time' else np.float64
+        out[name] = np.ndarray(n, dtype=dtype, buffer=buf, offset=k * n * 8)
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# WORKER
+# ─────────────────────────────────────────────────────────────────────────────
+def _score(dataset, length, rr, tally):
+    closed = tally['wins'] + tally['losses']
+    return {
+        'dataset':  dataset,
+        'length':   length,
+        'rr':       rr,
+        'trades':   tally['trades'],
+        'wins':     tally['wins'],
+        'losses':   tally['losses'],
+        'open':     tally['open'],
+        'win_rate': tally['win_rate'],
+        'pnl_r':    tally['pnl_r'],
+        'avg_r':    tally['pnl_r'] / closed if closed else 0.0,
+    }
+
+
+def _run_group(shm_name, n, dataset, length, rrs):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        cols   = attach(shm.buf, n)
+        engine = SMCEngine(length=length, rr=rrs[0], rr_targets=rrs[1:])
+        engine.update_arrays(cols['time'], cols['high'], cols['low'], cols['close'])
+        del cols
+        return [_score(dataset, length, row['rr'], row)
+                for row in engine.rr_summary()]
+    finally:
+        shm.close()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SWEEP
+# ─────────────────────────────────────────────────────────────────────────────
+def parse_values(spec: str, cast=float):
+    """'10,20,50' or 'start:stop:step' (stop inclusive)."""
+    if ':' in spec:
+        start, stop, step = (float(x) for x in spec.split(':'))
+        vals = np.arange(start, stop + step / 2, step)
+        return [cast(round(v, 10)) for v in vals]
+    return [cast(v) for v in spec.split(',') if v]
+
+
+def run_sweep(datasets: dict, lengths, rrs, samples: int = None, seed: int = 0,
+              workers: int = None) -> pd.DataFrame:
+    """
+    datasets : name -> DataFrame (or BarStore records) with time/high/low/close
+    lengths, rrs : grid values; with `samples` only that many random
+                   (length, rr) pairs are evaluated
+    Returns one row per (dataset, length, rr), best R P&L first.
+    """
+    grid = [(length, rr) for length in lengths for rr in rrs]
+    if samples and samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    by_length = {}
+    for length, rr in grid:
+        by_length.setdefault(length, []).append(rr)
+
+    shared = {name: SharedOHLC(df) for name, df in datasets.items()}
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_group, sh.name, sh.n, name, length, sorted(rr_list))
+                       for name, sh in shared.items()
+                       for length, rr_list in by_length.items()]
+            for fut in as_completed(futures):
+                rows.extend(fut.result())
+    finally:
+        for sh in shared.values():
+            sh.close()
+
+    table = pd.DataFrame(rows)
+    if table.empty: return table
+    return table.sort_values(['pnl_r', 'win_rate', 'trades'], ascending=False).reset_index(drop=True)
+
+
+def load_datasets(csv_files=(), symbols=(), tf: int = 15, bars: int = 2000, store=None) -> dict:
+    """With a BarStore, `symbols` are read from it (all stored bars, memory-mapped)
+    instead of being fetched from the SMC_DATA_SOURCE source (MT5 by default)."""
+    out = {}
+    for path in csv_files:
+        out[os.path.splitext(os.path.basename(path))[0]] = pd.read_csv(path, parse_dates=['time'])
+    if store is not None:
+        for sym in symbols:
+            out[sym] = store.read(sym, tf)
+    elif symbols:
+        from data_source import source_from_spec
+        src = source_from_spec()
+        for sym in symbols:
+            out[sym] = src.fetch(sym, tf, count=bars)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sweep SMCEngine length/rr over symbols and CSV files")
+    ap.add_argument('--csv', default='', help="comma-separated CSV files (time,open,high,low,close)")
+    ap.add_argument('--symbols', default='', help="comma-separated MT5 symbols")
+    ap.add_argument('--tf', type=int, default=15, help="MT5 timeframe in minutes for --symbols")
+    ap.add_argument('--bars', type=int, default=2000, help="bars to fetch per MT5 symbol")
+    ap.add_argument('--store', nargs='?', const='', default=None, metavar='ROOT',
+                    help="read --symbols from the local bar store instead of MT5")
+    ap.add_argument('--length', default='10,20,50', help="list '10,20' or range 'start:stop:step'")
+    ap.add_argument('--rr', default='1,2,3', help="list '1,2,3' or range 'start:stop:step'")
+    ap.add_argument('--samples', type=int, default=None, help="random sample size from the grid")
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--top', type=int, default=20, help="rows to print")
+    ap.add_argument('--out', default=None, help="write the full table to this CSV")
+    args = ap.parse_args(argv)
+
+    store = None
+    if args.store is not None:
+        from bar_store import BarStore
+        store = BarStore(args.store) if args.store else BarStore()
+    datasets = load_datasets([p for p in args.csv.split(',') if p],
+                             [s for s in args.symbols.split(',') if s], args.tf, args.bars, store)
+    if not datasets:
+        ap.error("give at least one --csv file or --symbols entry")
+
+    table = run_sweep(datasets, parse_values(args.length, int), parse_values(args.rr),
+                      args.samples, args.seed, args.workers)
+    with pd.option_context('display.width', 140, 'display.max_columns', None):
+        print(table.head(args.top).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"\n{len(table)} rows → {args.out}")
+
+
+if __name__ == '__main__':
+    main()
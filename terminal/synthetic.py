@@ -0,0 +1,157 @@
+"""
+Vectorized synthetic OHLC bars
+==============================
+Run:  python3 synthetic.py 10000000 --symbol SYN --tf 1 --seed 7      (into the bar store)
+
+`generate` returns NumPy columns (time as datetime64[s], open/high/low/close
+float64) from a regime-switching random walk: the market sits in one of
+REGIMES – each a (drift, volatility, wick size, mean length in bars) – for a
+geometrically distributed number of bars, then jumps to another one. Bars are
+built BLOCK at a time from a generator seeded with (seed, block number), so the
+same seed gives the same bars however they are chunked: `generate_chunks`
+streams them in pieces of any size for series that should not sit in memory
+at once.
+
+`random_walk` is the single-regime walk the terminal has always used for its
+mock data (np.random.seed + cumprod of normal returns), drawn in bulk.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BLOCK = 1 << 16
+
+# name: (drift per bar, volatility per bar, wick size, mean bars in the regime) – as fractions of price
+REGIMES = {
+    'range':     (0.0,      0.0010, 0.0005, 400),
+    'uptrend':   (0.00025,  0.0015, 0.0006, 250),
+    'downtrend': (-0.00025, 0.0015, 0.0006, 250),
+    'volatile':  (0.0,      0.0040, 0.0015, 100),
+}
+COLUMNS = ('time', 'open', 'high', 'low', 'close')
+
+
+def _regime_table(regimes) -> np.ndarray:
+    table = np.array(list(regimes.values()) if isinstance(regimes, dict) else regimes, dtype=np.float64)
+    if table.ndim != 2 or table.shape[1] != 4 or (table[:, 3] < 1).any():
+        raise ValueError("regimes are (drift, vol, wick, mean_bars) rows with mean_bars >= 1")
+    return table
+
+
+def _regimes(rng, n: int, state: int, left: int, mean: np.ndarray):
+    """Regime of each of the next n bars, starting with `left` more bars of
+    `state`; returns (regimes, last state, bars of it still to come)."""
+    if len(mean) == 1: return np.zeros(n, np.int64), 0, n
+    if left >= n: return np.full(n, state, np.int64), state, left - n
+    states, runs = [np.array([state])], [np.array([left])]
+    need = n - left
+    while need > 0:
+        k = int(need // mean.min()) + 16
+        # every switch goes to one of the other regimes, uniformly
+        s = (state + np.cumsum(rng.integers(1, len(mean), k))) % len(mean)
+        r = rng.geometric(1.0 / mean[s])
+        states.append(s); runs.append(r)
+        state = int(s[-1]); need -= int(r.sum())
+    s, r = np.concatenate(states), np.concatenate(runs)
+    end = np.cumsum(r)
+    stop = int(np.searchsorted(end, n, 'left')) + 1   # runs up to the one covering bar n-1
+    return np.repeat(s[:stop], r[:stop])[:n], int(s[stop - 1]), int(end[stop - 1] - n)
+
+
+def _block(rng, n: int, price: float, state: int, left: int, table: np.ndarray):
+    drift, vol, wick, mean = table.T
+    regime, state, left = _regimes(rng, n, state, left, mean)
+    z = rng.standard_normal((3, n))
+    close = price * np.exp(np.cumsum(drift[regime] + vol[regime] * z[0]))
+    open_ = np.empty(n); open_[0] = price; open_[1:] = close[:-1]
+    w = wick[regime] * close
+    high = np.maximum(open_, close) + np.abs(z[1]) * w
+    low  = np.minimum(open_, close) - np.abs(z[2]) * w
+    return (open_, high, low, close), float(close[-1]), state, left
+
+
+def _blocks(rows: int, seed: int, start_price: float, table: np.ndarray):
+    price = float(start_price)
+    rng = np.random.default_rng([seed, 0])
+    state = int(rng.integers(len(table))); left = int(rng.geometric(1.0 / table[state, 3]))
+    for b, offset in enumerate(range(0, rows, BLOCK)):
+        rng = np.random.default_rng([seed, b + 1])
+        ohlc, price, state, left = _block(rng, min(BLOCK, rows - offset), price, state, left, table)
+        yield offset, ohlc
+
+
+def _columns(offset: int, ohlc, tf: int, start, decimals) -> dict:
+    t0 = np.datetime64(pd.Timestamp(start).to_datetime64(), 's')
+    step = np.timedelta64(int(tf) * 60, 's')
+    cols = {'time': t0 + (offset + np.arange(len(ohlc[0]))) * step}
+    for name, values in zip(COLUMNS[1:], ohlc):
+        cols[name] = values if decimals is None else np.round(values, decimals)
+    return cols
+
+
+def generate_chunks(rows: int, chunk: int = 1 << 20, seed: int = 0, tf: int = 15, start_price: float = 100.0,
+                    start='2025-01-01', regimes=REGIMES, decimals=None):
+    """`generate`'s columns in consecutive pieces of `chunk` bars (the last
+    one shorter)."""
+    table = _regime_table(regimes)
+    buf, have, offset = [], 0, 0
+    for _, ohlc in _blocks(rows, seed, start_price, table):
+        buf.append(ohlc); have += len(ohlc[0])
+        while have >= chunk or (have and offset + have == rows):
+            joined = [np.concatenate(col) for col in zip(*buf)]
+            take = min(chunk, have)
+            yield _columns(offset, [c[:take] for c in joined], tf, start, decimals)
+            buf = [[c[take:] for c in joined]] if take < have else []
+            have -= take; offset += take
+
+
+def generate(rows: int, seed: int = 0, tf: int = 15, start_price: float = 100.0,
+             start='2025-01-01', regimes=REGIMES, decimals=None) -> dict:
+    """`rows` bars of `tf` minutes as {time, open, high, low, close} arrays."""
+    parts = list(generate_chunks(rows, max(rows, 1), seed, tf, start_price, start, regimes, decimals))
+    if not parts: return _columns(0, [np.empty(0)] * 4, tf, start, None)
+    return parts[0]
+
+
+def generate_frame(rows: int, **kwargs) -> pd.DataFrame:
+    return to_frame(generate(rows, **kwargs))
+
+
+def to_frame(cols: dict) -> pd.DataFrame:
+    """The usual time/open/high/low/close DataFrame (time as datetime64[ns])."""
+    return pd.DataFrame({name: cols[name].astype('M8[ns]') if name == 'time' else cols[name] for name in COLUMNS})
+
+
+def random_walk(rows: int, seed: int = 99, start_price: float = 1.10, vol: float = 0.0018, wick: float = 0.0006,
+                tf: int = 15, start='2025-01-01', decimals=None) -> pd.DataFrame:
+    """Closes compound N(0, vol) returns; each wick reaches |N(0, wick * close)|
+    beyond the body. Draws come in the order a per-bar loop makes them, so a
+    given seed reproduces the bars that loop gave."""
+    rs = np.random.RandomState(seed)
+    close = np.cumprod(1 + rs.normal(0, vol, rows)) * start_price
+    open_ = np.r_[close[:1], close[:-1]]
+    hl = np.abs(rs.normal(0, 1, (rows, 2))) * (wick * close)[:, None]
+    ohlc = (open_, np.maximum(open_, close) + hl[:, 0], np.minimum(open_, close) - hl[:, 1], close)
+    return to_frame(_columns(0, ohlc, tf, start, decimals))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write regime-switching synthetic bars to the bar store")
+    ap.add_argument('rows', type=int)
+    ap.add_argument('--symbol', default='SYN')
+    ap.add_argument('--tf', type=int, default=15, help="timeframe in minutes")
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--price', type=float, default=100.0, help="starting price")
+    ap.add_argument('--root', default=None, help="bar store root (default: bar_store.DEFAULT_ROOT)")
+    args = ap.parse_args(argv)
+
+    from bar_store import BarStore, DEFAULT_ROOT
+    store = BarStore(args.root or DEFAULT_ROOT)
+    for cols in generate_chunks(args.rows, seed=args.seed, tf=args.tf, start_price=args.price):
+        store.append(args.symbol, args.tf, cols)
+    print(f"{args.symbol}/{args.tf}: {store.count(args.symbol, args.tf)} bars stored")
+
+
+if __name__ == '__main__':
+    main()
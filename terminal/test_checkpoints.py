@@ -0,0 +1,41 @@
+import pandas as pd
+from checkpoints import Checkpoints
+from smc_engine_v2 import SMCEngine
+
+def snapshot(e):
+    obs = [(o.time, o.bias, o.high, o.low, o.partial, o.cur_h, o.cur_l, o.mitigated, o.is_refined) for o in e.obs]
+    st  = [(s.kind, s.level, s.time, s.direction) for s in e.structure]
+    return obs, st, e.trades, e.trend, e.trail_top, e.trail_bottom, e.bar_count
+
+df = pd.read_csv('mock_data_15m.csv', parse_dates=['time'])
+
+def fresh(length, columnar, idx):
+    e = SMCEngine(length=length, rr=2.0, columnar=columnar)
+    e.update(df.iloc[:idx])
+    return snapshot(e)
+
+for columnar in (False, True):
+    for length in (5, 20):
+        # Seeking back and forth lands on exactly a fresh run to that bar,
+        # also once the bounded store has thinned out its oldest snapshots
+        e = SMCEngine(length=length, rr=2.0, columnar=columnar)
+        ck = Checkpoints(e, every=10, max_snapshots=6)
+        ck.seek(df, len(df))
+        assert len(ck) <= 6 and ck.every > 10, (len(ck), ck.every)
+        for idx in (len(df) // 2, 3, len(df) - 1, 37, len(df) // 3, 0, 250, 249, len(df)):
+            replayed = ck.seek(df, idx)
+            assert snapshot(e) == fresh(length, columnar, idx), (columnar, length, idx)
+            assert replayed <= max(ck.every, idx), (idx, replayed)
+
+        # restore + extend == one uninterrupted update, wherever the cut is
+        full = SMCEngine(length=length, rr=2.0, columnar=columnar); full.update(df)
+        for cut in (1, 150, len(df) // 2, len(df) - 1):
+            e = SMCEngine(length=length, rr=2.0, columnar=columnar)
+            e.update(df.iloc[:cut]); snap = e.snapshot()
+            e.extend(df.iloc[cut:])
+            e.restore(snap)
+            assert snapshot(e) == fresh(length, columnar, cut), (columnar, length, cut)
+            e.extend(df.iloc[cut:])
+            assert snapshot(e) == snapshot(full), (columnar, length, cut)
+            assert e.stats.summary() == full.stats.summary()
+    print(f"columnar={columnar}: checkpoints OK")
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from smc_engine_v2 import SMCEngine
+
+df = pd.read_csv('mock_data_15m.csv', parse_dates=['time'])
+epoch = df.assign(time=df['time'].values.astype('datetime64[s]').astype(np.int64))
+
+def rows(e):
+    st = [(s.kind, s.level, s.time, s.direction) for s in e.structure]
+    return st, e.trades
+
+for data, kind in ((df, 'M'), (epoch, 'i')):
+    for backend in ('python', 'auto'):
+        obj = SMCEngine(length=20, rr=2.0, backend=backend); obj.update(data)
+        col = SMCEngine(length=20, rr=2.0, backend=backend, columnar=True); col.update(data)
+        assert rows(col) == rows(obj), (kind, backend)
+
+        # Time columns keep the bars' own time type
+        frames = col.columns().to_frames()
+        for name in ('obs', 'structure', 'trades'):
+            assert frames[name]['time'].dtype.kind == kind, (name, frames[name]['time'].dtype)
+        assert list(frames['trades']['time']) == [t['time'] for t in obj.trades]
+        assert list(frames['structure']['time']) == [s.time for s in obj.structure]
+        assert sorted(frames['obs']['time']) == sorted(o.time for o in obj.obs)
+
+    # Exit bars: the bar the engine closed each trade on, on every path
+    exits = col.columns().trades['exit_bar']
+    closed = exits >= 0
+    assert (closed == (col.columns().trades['result'] != 0)).all()
+    assert sorted(data['time'].values[exits[closed]].tolist()) == sorted(np.asarray(col.stats.equity_time).tolist())
+    chunks = SMCEngine(length=20, rr=2.0, backend='python', columnar=True)
+    for i in range(0, len(data), 97): chunks.extend(data.iloc[i:i + 97])
+    assert (chunks.columns().trades['exit_bar'] == exits).all()
+    half = SMCEngine(length=20, rr=2.0, columnar=True); half.update(data.iloc[:len(data) // 2])
+    snap = half.snapshot(); half.extend(data.iloc[len(data) // 2:]); half.restore(snap)
+    half.extend(data.iloc[len(data) // 2:])
+    assert (half.columns().trades['exit_bar'] == exits).all()
+
+    # Bar by bar from an empty engine too
+    inc = SMCEngine(length=20, rr=2.0, columnar=True)
+    for row in data.itertuples():
+        inc.push_bar(row.time, row.open, row.high, row.low, row.close)
+    assert rows(inc) == rows(obj) and inc.columns().trades['time'].dtype.kind == kind
+    print(f"time kind {kind!r}: {len(obj.trades)} trades, columnar OK")
@@ -0,0 +1,41 @@
+import time
+
+import pandas as pd
+from data_source import DataSource, CSVSource, ReplaySource, SyntheticSource, FallbackSource, MT5Source, source_from_spec
+
+df = pd.read_csv('mock_data_15m.csv', parse_dates=['time'])
+csv = CSVSource()
+
+# start <= time < end, newest `count` of them, oldest first
+t = df['time']
+assert (csv.fetch('ANY', 15, count=50)['time'].values == t.iloc[-50:].values).all()
+win = csv.fetch('ANY', 15, start=t[100], end=t[200])
+assert len(win) == 100 and win['time'][0] == t[100]
+assert (csv.fetch('ANY', 15, end=t[200], count=10)['time'].values == t.iloc[190:200].values).all()
+
+# Replay reveals one more bar per 1/speed seconds
+rep = ReplaySource(csv, start=300, speed=20.0)
+first = rep.fetch('ANY', 15, count=5)
+assert first['time'].iloc[-1] == t[299]
+time.sleep(0.2)
+later = rep.fetch('ANY', 15, count=5)
+assert later['time'].iloc[-1] > first['time'].iloc[-1]
+assert next(rep.subscribe('ANY', 15, count=5))['time'].iloc[-1] >= later['time'].iloc[-1]
+
+# Synthetic bars are one series whatever the count, priced per symbol
+syn = SyntheticSource()
+assert (syn.fetch('EURUSD', 15, count=10).values == syn.fetch('EURUSD', 15, count=2000).iloc[-10:].values).all()
+assert syn.fetch('BTCUSDm', 15, count=1)['close'].iloc[0] > 1000
+
+# Without a terminal the default falls through to synthetic bars
+src = source_from_spec('mt5')
+assert isinstance(src, FallbackSource) and isinstance(src.sources[0], MT5Source)
+assert len(src.fetch('EURUSD', 15, count=100)) == 100
+
+# A source without fetch fails where it's made, not mid-run
+class NoFetch(DataSource): pass
+try:
+    NoFetch(); raise AssertionError("abstract fetch not enforced")
+except TypeError:
+    pass
+print("data sources OK")
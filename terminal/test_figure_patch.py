@@ -0,0 +1,68 @@
+import os
+os.environ.setdefault('SMC_DATA_SOURCE', 'synthetic')
+
+import dash
+from plotly.io.json import to_json_plotly
+from figure_patch import FigureSync
+from smc_engine_v2 import SMCEngine
+from synthetic import random_walk
+import app
+
+
+def browser(parts: dict) -> dict:
+    """The figure as the browser holds it: nested dicts / lists."""
+    fig = {'data': [{}, {}], 'layout': {}}
+    for path, value in parts.items():
+        node = fig
+        for key in path[:-1]:
+            node = node.setdefault(key, {}) if isinstance(node, dict) else node[key]
+        node[path[-1]] = _copy(value)
+    return fig
+
+
+def _copy(v):
+    return [_copy(x) for x in v] if isinstance(v, list) else dict((k, _copy(x)) for k, x in v.items()) if isinstance(v, dict) else v
+
+
+def apply(fig: dict, patch) -> None:
+    for op in patch.to_plotly_json()['operations']:
+        *loc, last = op['location']
+        node = fig
+        for key in loc: node = node[key]
+        value = _copy(op['params']['value'])
+        if op['operation'] == 'Assign':   node[last] = value
+        elif op['operation'] == 'Extend': node[last].extend(value)
+        else: raise AssertionError(op)
+
+
+def read(fig: dict, path):
+    for key in path: fig = fig[key]
+    return fig
+
+
+df = random_walk(1500, seed=5, start_price=68000, decimals=2)
+engine = SMCEngine(length=20)
+engine.update(df.iloc[:200])
+sync = FigureSync(max_candles=360)
+fig, sizes = None, []
+n = 200
+for step in [1] * 300 + [10] * 40 + [-10, -1, 1] + [50] * 5:
+    n = max(200, min(len(df), n + step))
+    engine.update(df.iloc[:n]) if step < 0 else engine.extend(df.iloc[engine.bar_count:n])
+    start = sync.window(n, app.VISIBLE)
+    parts = app.chart_parts(df.iloc[start:n], engine)
+    out = sync.update(parts, app.figure_from_parts)
+    if out is dash.no_update: continue
+    if isinstance(out, dash.Patch):
+        apply(fig, out); sizes.append(len(to_json_plotly(out.to_plotly_json())))
+    else:
+        fig = browser(parts)
+    for path, value in parts.items():   # what the browser holds == a full rebuild
+        assert read(fig, path) == value, (n, path)
+    assert len(fig['data'][0]['x']) <= 2 * 360
+
+full = len(app.figure_from_parts(parts).to_json())
+sizes.sort()
+assert sync.patches > 10 * sync.full and sizes[len(sizes) // 2] * 5 < full, (sync.full, sync.patches, sizes[len(sizes) // 2], full)
+print(f"figure patch OK: {sync.full} full figures, {sync.patches} patches "
+      f"(median {sizes[len(sizes) // 2]:,} B vs {full:,} B full)")
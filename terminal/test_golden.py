@@ -0,0 +1,8 @@
+"""Every engine mode against the recorded golden outputs (see golden.py)."""
+from golden import DATASETS, LENGTHS, MODES, check
+
+failures = check(verbose=False)
+for (name, length, mode), problems in failures.items():
+    print(f"{name} length={length} {mode}:"); print('\n'.join(f"  {p}" for p in problems))
+assert not failures, f"{len(failures)} runs differ from golden/ (python3 golden.py check)"
+print(f"golden: {len(DATASETS)} datasets × {len(LENGTHS)} lengths × {len(MODES)} modes OK")
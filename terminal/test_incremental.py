@@ -0,0 +1,22 @@
+import pandas as pd
+from smc_engine_v2 import SMCEngine
+
+def snapshot(e):
+    obs = [(o.time, o.bias, o.high, o.low, o.partial, o.cur_h, o.cur_l, o.mitigated, o.is_refined) for o in e.obs]
+    st  = [(s.kind, s.level, s.time, s.direction) for s in e.structure]
+    return obs, st, e.trades, e.trend, e.trail_top, e.trail_bottom
+
+df = pd.read_csv('mock_data_15m.csv', parse_dates=['time'])
+
+for length in (5, 20, 50):
+    full = SMCEngine(length=length)
+    full.update(df)
+
+    inc = SMCEngine(length=length)
+    inc.extend(df.iloc[:300])
+    for row in df.iloc[300:600].itertuples():
+        inc.push_bar(row.time.to_datetime64(), row.open, row.high, row.low, row.close)
+    inc.extend(df.iloc[600:])
+
+    assert snapshot(inc) == snapshot(full), f"incremental != full replay (length={length})"
+    print(f"length={length}: OBs={len(full.obs)} Structure={len(full.structure)} Trades={len(full.trades)} OK")
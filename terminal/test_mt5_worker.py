@@ -0,0 +1,24 @@
+import asyncio
+import threading
+import time
+from mt5_worker import MT5Worker
+
+w = MT5Worker()
+gate, order = threading.Event(), []
+
+# One thread, submission order; same-key calls still pending share one call
+futs = [w.submit(gate.wait)] + [w.submit(lambda i=i: order.append(i) or time.sleep(0.01), key=i % 2) for i in range(4)]
+s = w.stats()
+assert (s['calls'], s['coalesced'], s['pending'], s['in_flight']) == (3, 2, 3, 2), s
+assert futs[1] is futs[3] and futs[2] is futs[4]
+gate.set()
+for f in futs: f.result()
+time.sleep(0.02)
+assert order == [0, 1] and w.stats()['pending'] == 0 and w.stats()['in_flight'] == 0
+
+async def main():
+    return await asyncio.gather(*(w.call(time.sleep, 0.02, key='k') for _ in range(5)), w.call(sum, [1, 2]))
+
+assert asyncio.run(main())[-1] == 3 and w.stats()['calls'] == 5 and w.stats()['pending'] == 0
+w.shutdown()
+print("mt5 worker OK")
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from mtf import MTFEngine
+from smc_engine_v2 import SMCEngine
+from synthetic import generate_frame
+
+TFS = (5, 15, 60, 240)
+df = generate_frame(6000, seed=4, tf=5)
+df = df.drop(index=range(3000, 3040)).reset_index(drop=True)   # a gap: intervals close on a later bar
+
+def reference(df, tf, length=10):
+    """Trend per base bar from a pandas resample of the whole frame, each
+    higher-timeframe bar applied from the base bar that completes it."""
+    g = df.set_index('time').resample(f'{tf}min', label='left', closed='left')
+    htf = g.agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}).dropna()
+    last = df.groupby(df['time'].dt.floor(f'{tf}min')).apply(lambda x: x.index[-1]).loc[htf.index].values
+    end = htf.index + pd.Timedelta(minutes=tf)
+    e, trend = SMCEngine(length=length), []
+    for r in htf.itertuples():
+        e.push_bar(r.Index, r.open, r.high, r.low, r.close); trend.append(e.trend)
+    # bar closes on its own last bar when complete, else on the next base bar
+    complete = (df['time'].values[last] + np.timedelta64(5, 'm')) >= end.values
+    known = np.where(complete, last, last + 1)
+    idx = np.searchsorted(known, np.arange(len(df)), 'right') - 1
+    return np.where(idx >= 0, np.asarray(trend)[np.maximum(idx, 0)], 0)
+
+full = MTFEngine(TFS, length=10); full.update(df)
+bias = full.bias()
+assert len(bias) == len(df) and full.base == 5
+for tf, label in zip(TFS, full.labels):
+    assert (bias[label].values == reference(df, tf)).all(), f"bias mismatch for {label}"
+    assert (bias[label].values != 0).any()
+
+# Chunked and bar-by-bar streams give the same table
+chunked = MTFEngine(TFS, length=10)
+for i in range(0, len(df), 777): chunked.extend(df.iloc[i:i + 777])
+streamed = MTFEngine(TFS, length=10)
+for r in df.iloc[:1500].itertuples(): streamed.push_bar(r.time, r.open, r.high, r.low, r.close)
+assert chunked.bias().equals(bias) and streamed.bias().equals(bias.iloc[:1500])
+
+# No lookahead: a bar's row only depends on the bars up to it
+for j in (100, 1234, 2999, 3000, 4321):
+    part = MTFEngine(TFS, length=10); part.update(df.iloc[:j + 1])
+    assert part.current() == {lb: int(bias[lb].iloc[j]) for lb in full.labels}
+print(f"mtf: {len(df)} bars, {full.current()} OK")
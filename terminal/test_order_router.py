@@ -0,0 +1,65 @@
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+from order_router import OrderRouter
+from smc_engine_v2 import SMCEngine
+
+
+class FakeMT5:
+    """The parts of MetaTrader5 the router uses, with a slow order_send."""
+    TRADE_ACTION_DEAL = 1; ORDER_TYPE_BUY = 0; ORDER_TYPE_SELL = 1
+    ORDER_TIME_GTC = 0; ORDER_FILLING_IOC = 1; TRADE_RETCODE_DONE = 10009
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.info_calls = self.tick_calls = 0
+        self.orders = []
+
+    def symbol_info(self, symbol):
+        self.info_calls += 1
+        return SimpleNamespace(volume_min=0.01, volume_max=5.0, volume_step=0.01) if symbol != "NOPE" else None
+
+    def symbol_info_tick(self, symbol):
+        self.tick_calls += 1
+        return SimpleNamespace(bid=1.1000, ask=1.1002)
+
+    def order_send(self, request):
+        time.sleep(self.delay)
+        self.orders.append(request)
+        return SimpleNamespace(retcode=self.TRADE_RETCODE_DONE, comment="done")
+
+
+# Submitting doesn't wait for the broker; duplicates never reach it
+mt5 = FakeMT5()
+router = OrderRouter(mt5, rate=25, burst=2)
+t = time.perf_counter()
+ok = [router.submit(sym, 'LONG' if i % 2 else 'SHORT', 1.09, 1.12, 0.123, ob_time=i)
+      for i in range(5) for sym in ("EURUSD", "GBPUSD")]
+ok += [router.submit("EURUSD", 'SHORT', 1.09, 1.12, ob_time=0), router.submit("NOPE", 'LONG', 1, 2)]
+assert time.perf_counter() - t < 0.01 and ok == [True] * 10 + [False, True]
+router.flush()
+elapsed = time.perf_counter() - t
+assert elapsed >= (11 - 2) / 25 * 0.9, elapsed   # rate limited after the burst
+assert len(mt5.orders) == 10 and mt5.info_calls == 3 and mt5.tick_calls == 10
+assert {o["volume"] for o in mt5.orders} == {0.12}
+assert all(o["price"] == (1.1000 if o["type"] == mt5.ORDER_TYPE_SELL else 1.1002) for o in mt5.orders)
+s = router.stats()
+assert (s["submitted"], s["duplicates"], s["sent"], s["failed"]) == (11, 1, 10, 1)
+assert s["signal_to_send_ms"]["max"] > s["signal_to_send_ms"]["p50"] > 0 and s["order_send_ms"]["p50"] >= 15
+
+# Engine signals go through the router; re-running the same bars fires nothing new
+df = pd.read_csv('mock_data_15m.csv', parse_dates=['time'])
+router = OrderRouter(FakeMT5(delay=0), rate=1e6, burst=1000)
+engine = SMCEngine(length=20, backend='python')
+engine.on_signal = router.signal_handler("EURUSD")
+engine.update(df.iloc[:500])
+for row in df.iloc[500:].itertuples(index=False):
+    engine.push_bar(row.time, row.open, row.high, row.low, row.close)
+replayed = SMCEngine(length=20, backend='python')
+replayed.on_signal = router.signal_handler("EURUSD")
+replayed.update(df)
+router.flush(); router.close()
+n = len(engine.trades)
+assert n and router.submitted == n and router.duplicates == n and router.sent == n, (n, router.stats())
+print(f"order router OK ({n} engine signals, {elapsed * 1e3:.0f} ms for 10 orders)")
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from portfolio import make_jobs, run_portfolio
+from smc_engine_v2 import SMCEngine
+
+if __name__ == '__main__':   # worker processes re-import this file where they are spawned
+    out = run_portfolio(make_jobs(['mock_data_15m.csv'], ['EURUSD', 'BTCUSDm'], tf=15, bars=3000, source='synthetic'),
+                        length=20, rr=2.0, risk=0.01, workers=2)
+    trades, equity, symbols, s = out['trades'], out['equity'], out['symbols'], out['summary']
+
+    # Per-symbol trades are the engine's own, merged in entry-time order
+    df = pd.read_csv('mock_data_15m.csv', parse_dates=['time'])
+    e = SMCEngine(length=20, rr=2.0); e.update(df)
+    mine = trades[trades['symbol'] == 'mock_data_15m']
+    assert [(t['time'], t['dir'], t['result']) for t in e.trades] == list(zip(mine['entry_time'], mine['dir'], mine['result']))
+    assert trades['entry_time'].is_monotonic_increasing and set(symbols['symbol']) == {'mock_data_15m', 'EURUSD', 'BTCUSDm'}
+
+    # Exits follow entries; the timeline adds up to the per-symbol totals
+    closed = trades[trades['result'] != 'open']
+    assert (closed['exit_time'] > closed['entry_time']).all() and trades.loc[trades['result'] == 'open', 'exit_time'].isna().all()
+    mine_exits = mine.loc[mine['result'] != 'open', 'exit_time']
+    assert sorted(mine_exits) == sorted(pd.Timestamp(t) for t in e.stats.equity_time)   # the engine's own exits
+    assert equity['time'].is_monotonic_increasing and len(equity) == len(closed)
+    assert np.isclose(equity['equity_r'].iloc[-1], symbols['pnl_r'].sum()) and np.isclose(s['pnl_r'], symbols['pnl_r'].sum())
+    assert np.isclose(s['final_equity'], 10_000 * np.prod(1 + 0.01 * equity['r'].values))
+    assert (equity['drawdown'] <= 0).all() and 0 < s['exposure'] <= 100 and s['max_open'] >= symbols['max_open'].max()
+    print(f"portfolio: {s['trades']} trades over {s['symbols']} symbols, {s['pnl_r']:+.1f} R OK")
@@ -0,0 +1,95 @@
+import os
+os.environ.setdefault('SMC_DATA_SOURCE', 'synthetic')
+
+import time
+
+import pandas as pd
+
+import smc_kernel
+from sessions import ReplaySession, SessionRegistry
+from smc_engine_v2 import SMCEngine
+from synthetic import random_walk
+import app
+
+df = random_walk(3000, seed=5, start_price=68000, decimals=2)
+
+# Bounded: LRU eviction, idle expiry, bars per session
+made = []
+reg = SessionRegistry(lambda: made.append(1) or ReplaySession(df, 200, 120, length=20, max_bars=1000),
+                      maxsize=2, ttl=0.2)
+a, b = reg.get('a'), reg.get('b')
+assert reg.get('a') is a and len(made) == 2 and len(a.data) == 1000
+reg.get('c')                          # evicts 'b', the least recently used
+assert reg.get('a') is a and reg.get('b') is not b
+time.sleep(0.25)
+assert reg.get('a') is not a and reg.stats()['expirations'] >= 1
+
+# Sessions replay independently and match a fresh engine
+a, b = reg.get('x'), reg.get('y')
+for step in (1, 10, 50, -10, 1, 50, -1):
+    a.step(step, 3.0)
+b.step(10, 2.0)
+for s, idx, rr in ((a, 200 + 101, 3.0), (b, 210, 2.0)):
+    ref = SMCEngine(length=20, rr=rr); ref.update(s.data.iloc[:idx])
+    assert s.idx == idx and s.engine.bar_count == idx and s.engine.trades == ref.trades
+
+# Live straight after a replay step: the fetched window overlaps the bars the
+# engine already has, and none of them is fed twice
+s = ReplaySession(df, 200, 120, length=20)
+s.step(100, 3.0)
+s.live(df.iloc[150:306], 3.0)                        # closed bars up to 305, 300..304 new
+ref = SMCEngine(length=20, rr=3.0); ref.update(df.iloc[:305])
+assert s.engine.bar_count == 305 and s.engine.trades == ref.trades
+assert s.engine.last_time == df['time'].values[304]
+
+# Auto trade: past bars never trade, on either backend – not the first live
+# tick's full replay, not an rr change, not stepping over bars seen before
+have_numba, smc_kernel.HAVE_NUMBA = smc_kernel.HAVE_NUMBA, False
+sent = []
+s = ReplaySession(df.iloc[:2000], 200, 120, length=20)
+s.load(df.iloc[:2000], 3.0, on_signal=lambda t, *a: sent.append(t))
+s.step(300, 3.0); s.step(-200, 3.0); s.step(150, 3.0)
+assert sent and len(sent) == len(set(sent)) and min(sent) > df['time'].values[199]
+assert max(sent) <= df['time'].values[499]
+n = len(sent)
+s.step(10, 2.0)                                      # rr change: full replay
+assert len(sent) == n
+s.live(df.iloc[1500:2201], 2.0)                      # first live tick: full replay
+assert len(sent) == n
+s.live(df.iloc[1500:2202], 3.0)                      # rr change while live
+assert len(sent) == n
+for end in range(2203, 2600):                        # then each signal once, as its bar closes
+    s.live(df.iloc[end - 700:end], 3.0)
+ref = SMCEngine(length=20, rr=3.0); ref.update(df.iloc[1500:2200])
+ref.extend(df.iloc[2200:2598])
+new = [pd.Timestamp(t['time']) for t in ref.trades if t['time'] > df['time'].iloc[2200]]
+assert new and [pd.Timestamp(t) for t in sent[n:]] == new
+smc_kernel.HAVE_NUMBA = have_numba
+
+# Two pages of the Dash app: each keeps its own replay position
+client = app.app.server.test_client()
+dep = client.get('/_dash-dependencies').json[0]
+names = [('btn-next', 'n_clicks'), ('btn-n10', 'n_clicks'), ('btn-n50', 'n_clicks'), ('btn-reset', 'n_clicks'),
+         ('btn-prev', 'n_clicks'), ('btn-b10', 'n_clicks'), ('live-interval', 'n_intervals'),
+         ('inp-symbol', 'value'), ('inp-tf', 'value')]
+
+def click(sid, n50, prev):
+    values = [0, 0, n50, 0, 0, 0, 0, 'EURUSD', 15]
+    body = {'output': dep['output'],
+            'outputs': [dict(zip(('id', 'property'), o.split('.'))) for o in dep['output'].strip('.').split('...')],
+            'inputs': [{'id': i, 'property': p, 'value': v} for (i, p), v in zip(names, values)],
+            'state': [{'id': 'clk', 'property': 'data', 'value': dict(prev, n50=n50 - 1)},
+                      {'id': 'inp-rr', 'property': 'value', 'value': 3},
+                      {'id': 'live-toggle', 'property': 'value', 'value': []},
+                      {'id': 'inp-lot', 'property': 'value', 'value': 0.1},
+                      {'id': 'session', 'property': 'data', 'value': sid}],
+            'changedPropIds': ['btn-n50.n_clicks']}
+    r = client.post('/_dash-update-component', json=body)
+    assert r.status_code == 200, r.data[:500]
+    return int(r.json['response']['s-bars']['children'])
+
+prev = {'n': 0, 'n10': 0, 'nr': 0, 'np': 0, 'nb10': 0}
+assert [click('tab1', k, prev) for k in (1, 2, 3)] == [250, 300, 350]
+assert click('tab2', 1, prev) == 250 and click('tab1', 4, prev) == 400
+assert len(app.SESSIONS.sessions) == 2
+print("sessions OK")
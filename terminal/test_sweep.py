@@ -0,0 +1,22 @@
+import pandas as pd
+from smc_engine_v2 import SMCEngine
+from sweep import parse_values, run_sweep
+
+df = pd.read_csv('mock_data_15m.csv', parse_dates=['time'])
+
+assert parse_values('10:30:10', int) == [10, 20, 30] and parse_values('1,2.5') == [1.0, 2.5]
+
+table = run_sweep({'mock': df}, [10, 20], [1.0, 2.5, 3.0], workers=2)
+assert len(table) == 6 and list(table['pnl_r']) == sorted(table['pnl_r'], reverse=True)
+
+# Every grid cell matches a direct SMCEngine(length, rr) run
+for row in table.itertuples():
+    e = SMCEngine(length=row.length, rr=row.rr); e.update(df)
+    res = [t['result'] for t in e.trades]
+    assert (row.trades, row.wins, row.losses, row.open) == \
+           (len(res), res.count('win'), res.count('loss'), res.count('open')), row
+    assert abs(row.pnl_r - (res.count('win') * row.rr - res.count('loss'))) < 1e-9, row
+
+sample = run_sweep({'mock': df}, [10, 20, 30], [1.0, 2.0], samples=3, seed=1, workers=2)
+assert len(sample) == 3 and len(set(zip(sample['length'], sample['rr']))) == 3
+print(f"sweep OK (best: length={table['length'][0]} rr={table['rr'][0]} pnl={table['pnl_r'][0]:.1f}R)")
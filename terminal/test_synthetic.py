@@ -0,0 +1,30 @@
+import numpy as np
+from synthetic import COLUMNS, BLOCK, generate, generate_chunks, random_walk
+
+rows = 3 * BLOCK + 1234
+full = generate(rows, seed=7, tf=5)
+
+# Same bars whatever the chunking
+for chunk in (1000, BLOCK, 100_000, rows + 1):
+    parts = list(generate_chunks(rows, chunk, seed=7, tf=5))
+    assert [len(p['time']) for p in parts[:-1]] == [chunk] * (len(parts) - 1)
+    for name in COLUMNS:
+        assert (np.concatenate([p[name] for p in parts]) == full[name]).all(), f"chunk={chunk} {name}"
+
+# Valid candles on a gapless tf grid
+o, h, l, c = (full[name] for name in COLUMNS[1:])
+assert (h >= np.maximum(o, c)).all() and (l <= np.minimum(o, c)).all() and (o[1:] == c[:-1]).all()
+assert (np.diff(full['time']) == np.timedelta64(300, 's')).all()
+assert not (generate(1000, seed=8)['close'] == generate(1000, seed=7)['close']).all()
+
+# random_walk matches the per-bar loop it replaced
+np.random.seed(99)
+closes = np.cumprod(1 + np.random.normal(0, 0.0018, 500)) * 1.10
+highs, lows = [], []
+for i in range(500):
+    cl = closes[i]; op = closes[i-1] if i > 0 else cl
+    highs.append(round(max(op, cl) + abs(np.random.normal(0, cl * 0.0006)), 5))
+    lows.append(round(min(op, cl) - abs(np.random.normal(0, cl * 0.0006)), 5))
+walk = random_walk(500, seed=99, decimals=5)
+assert (walk['high'].values == highs).all() and (walk['low'].values == lows).all()
+print(f"synthetic OK ({rows} bars)")
@@ -0,0 +1,57 @@
+from itertools import groupby
+
+import numpy as np
+import pandas as pd
+
+import smc_kernel
+from checkpoints import Checkpoints
+from smc_engine_v2 import SMCEngine
+from synthetic import generate_frame
+
+sets = [pd.read_csv('mock_data_15m.csv', parse_dates=['time']), generate_frame(6000, seed=11, tf=1, decimals=1)]
+
+
+def figures(e):
+    return e.stats.summary(1.0), list(e.stats.equity), [pd.Timestamp(t) for t in e.stats.equity_time]
+
+
+for data in sets:
+    for length in (5, 20):
+        ref = SMCEngine(length=length, rr=2.5, backend='python'); ref.update(data)
+        s, trades = ref.stats, ref.trades
+
+        # Running figures agree with a rescan of the trades / the equity curve
+        res = [t['result'] for t in trades]
+        assert (s.opened, s.wins, s.losses, s.open_count) == \
+               (len(trades), res.count('win'), res.count('loss'), res.count('open'))
+        assert np.isclose(s.pnl_r, res.count('win') * 2.5 - res.count('loss'))
+        eq = np.array(s.equity)
+        assert np.isclose(s.max_drawdown_r, (np.maximum.accumulate(np.r_[0, eq]) - np.r_[0, eq]).max())
+        steps = np.sign(np.diff(np.r_[0, eq]))
+        runs = [len(list(g)) * k for k, g in groupby(steps)]
+        assert s.max_win_streak == max([r for r in runs if r > 0], default=0)
+        assert s.max_loss_streak == -min([r for r in runs if r < 0], default=0)
+        assert list(s.equity_time) == sorted(s.equity_time)
+        if res.count('open'):
+            last = max(i for i, r in enumerate(res) if r == 'open')
+            t = trades[last]; close = data['close'].iloc[-1]
+            direction, fr = s.floating_r(close)
+            assert direction == t['dir'] and np.isclose(fr, (close - t['entry'] if direction == 'LONG' else t['entry'] - close)
+                                                          / abs(t['entry'] - t['sl']))
+
+        # Same figures, same close order, from every way of building the engine
+        modes = {}
+        if smc_kernel.HAVE_NUMBA:
+            e = SMCEngine(length=length, rr=2.5, backend='numba'); e.update(data); modes['numba'] = e
+            e = SMCEngine(length=length, rr=2.5, backend='numba', columnar=True)
+            e.update(data.iloc[:len(data) // 2]); e.extend(data.iloc[len(data) // 2:]); modes['kernel+extend'] = e
+        e = SMCEngine(length=length, rr=2.5, backend='python')
+        for i in range(0, len(data), 97): e.extend(data.iloc[i:i + 97])
+        modes['chunks'] = e
+        e = SMCEngine(length=length, rr=2.5, columnar=True)
+        ck = Checkpoints(e, every=50)
+        for idx in (len(data) // 2, len(data) // 5, len(data) - 3, 17, len(data)): ck.seek(data, idx)
+        modes['checkpoints'] = e
+        for name, e in modes.items():
+            assert figures(e) == figures(ref), (name, length)
+print(f"trade stats OK ({len(sets)} datasets)")